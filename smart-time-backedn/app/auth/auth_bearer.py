@@ -1,25 +1,41 @@
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.orm import Session
 from app.auth.auth_handler import SECRET_KEY, ALGORITHM
 from app.models.user import User
-from app.database import SessionLocal
+from app.database import SessionLocal, get_db
+from app.services.principal_cache import Principal, principal_cache
 
 security = HTTPBearer()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # The route's own session: FastAPI resolves get_db once per request.
+    return user_from_token(token, db)
+
+def user_from_token(token: str, db: Session = None) -> Principal:
+    """The user a token was issued to, from the principal cache when it has
+    them. On a miss the user is read with `db`, or with a session of its
+    own if none is given."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    db = SessionLocal()
-    user = db.query(User).filter(User.id == user_id).first()
-    db.close()
-    if not user:
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    generation = principal_cache.generation
+    session = db or SessionLocal()
+    try:
+        user = session.get(User, user_id)
+        principal = Principal.from_user(user) if user else None
+    finally:
+        if db is None:
+            session.close()
+    if principal is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    principal_cache.remember(principal, generation)
+    return principal
@@ -1,12 +1,18 @@
 from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
+from app.config import BCRYPT_ROUNDS
 
 SECRET_KEY = "your_secret_key"  # replace with a real secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 300
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with another cost count as deprecated, so verify_and_update
+# returns a new hash for them.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def get_password_hash(password: str):
     return pwd_context.hash(password)
@@ -14,6 +20,11 @@ def get_password_hash(password: str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(verified, new hash or None); a new hash when the stored one was made
+    with other parameters than the current ones."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -0,0 +1,87 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.auth.auth_handler import get_password_hash, verify_and_update_password
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+from app.services.metrics import increment
+
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing a hash when `max_pending` are already
+    queued or running."""
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification in a pool of worker processes. A hash
+    costs a few hundred milliseconds of CPU; run in the server process, a
+    burst of logins would hold up every other request. Callers await the
+    result without holding a thread.
+
+    At most `max_pending` hashes are queued or running; past that, calls
+    fail at once with PasswordHasherBusy rather than queueing work that
+    would time out on the client anyway. With `workers` at 0 the hashing
+    runs on the threadpool, still bounded by `max_pending`.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the worker processes, so that the first login does not
+        pay for it; otherwise they start on first use. Returns the pool."""
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                # Spawned rather than forked: the server process has threads
+                # and open connections that a fork would copy.
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                for _ in range(self.workers):
+                    self._executor.submit(int)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                increment("auth.password_hash_rejected")
+                raise PasswordHasherBusy()
+            self.pending += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            executor = self.start()
+            try:
+                return await asyncio.wrap_future(executor.submit(fn, *args))
+            except BrokenProcessPool:
+                # A worker died; the next call starts a new pool.
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        """(verified, new hash or None), as verify_and_update_password."""
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+
+password_hasher = PasswordHasher()
@@ -5,6 +5,76 @@ import secrets
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Apply pending migrations (alembic upgrade head) when the app starts
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+# Connection pool (app/database.py). Each worker holds up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections; a request waits up to
+# DB_POOL_TIMEOUT seconds for one. Connections older than DB_POOL_RECYCLE
+# seconds are replaced (-1: never), and with DB_POOL_PRE_PING each is
+# checked before use, so that ones the server dropped are not handed out.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 SECRET_KEY = os.getenv("SECRET_KEY") or secrets.token_urlsafe(32)
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Conversation state cache (app/services/conversation_state.py)
+CONVERSATION_STATE_CACHE_TTL_SECONDS = float(os.getenv("CONVERSATION_STATE_CACHE_TTL_SECONDS", "60"))
+CONVERSATION_STATE_CACHE_MAX_USERS = int(os.getenv("CONVERSATION_STATE_CACHE_MAX_USERS", "10000"))
+# Authenticated user cache (app/services/principal_cache.py)
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_USERS = int(os.getenv("PRINCIPAL_CACHE_MAX_USERS", "10000"))
+
+# Availability engine defaults (app/services/availability.py)
+WORKING_HOURS_START = int(os.getenv("WORKING_HOURS_START", "9"))
+WORKING_HOURS_END = int(os.getenv("WORKING_HOURS_END", "17"))
+SLOT_GRANULARITY_MINUTES = int(os.getenv("SLOT_GRANULARITY_MINUTES", "30"))
+SLOT_SEARCH_HORIZON_DAYS = int(os.getenv("SLOT_SEARCH_HORIZON_DAYS", "7"))
+SLOT_SUGGESTION_COUNT = int(os.getenv("SLOT_SUGGESTION_COUNT", "3"))
+FREEBUSY_MAX_DAYS = int(os.getenv("FREEBUSY_MAX_DAYS", "366"))
+GROUP_AVAILABILITY_RESOLUTION_MINUTES = int(os.getenv("GROUP_AVAILABILITY_RESOLUTION_MINUTES", "5"))
+GROUP_AVAILABILITY_MAX_USERS = int(os.getenv("GROUP_AVAILABILITY_MAX_USERS", "100"))
+GROUP_AVAILABILITY_MAX_DAYS = int(os.getenv("GROUP_AVAILABILITY_MAX_DAYS", "31"))
+
+# Auto-scheduler (app/services/auto_scheduler.py)
+AUTO_SCHEDULE_HORIZON_DAYS = int(os.getenv("AUTO_SCHEDULE_HORIZON_DAYS", "14"))
+AUTO_SCHEDULE_MAX_DAYS = int(os.getenv("AUTO_SCHEDULE_MAX_DAYS", "90"))
+AUTO_SCHEDULE_DEFAULT_TASK_MINUTES = int(os.getenv("AUTO_SCHEDULE_DEFAULT_TASK_MINUTES", "20"))
+AUTO_SCHEDULE_LOCAL_SEARCH_PASSES = int(os.getenv("AUTO_SCHEDULE_LOCAL_SEARCH_PASSES", "10"))
+
+# List endpoints (app/services/pagination.py)
+LIST_PAGE_SIZE_DEFAULT = int(os.getenv("LIST_PAGE_SIZE_DEFAULT", "100"))
+LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", "500"))
+
+# Bulk endpoints (app/services/bulk.py)
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+
+# Calendar event stream (app/services/events.py)
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "100"))
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "25"))
+# Streams end after this long and the client reconnects; an endless stream
+# would hold up graceful shutdown.
+EVENT_STREAM_MAX_SECONDS = float(os.getenv("EVENT_STREAM_MAX_SECONDS", "300"))
+
+# Reminders (app/services/reminders.py)
+MEETING_REMINDER_MINUTES = int(os.getenv("MEETING_REMINDER_MINUTES", "15"))
+TASK_REMINDER_MINUTES = int(os.getenv("TASK_REMINDER_MINUTES", "60"))
+# The scheduler holds the reminders due this far ahead in memory.
+REMINDER_WINDOW_MINUTES = int(os.getenv("REMINDER_WINDOW_MINUTES", "10"))
+# The scheduler rereads its window this often, for reminders committed by
+# other processes, which do not notify it.
+REMINDER_RESCAN_SECONDS = float(os.getenv("REMINDER_RESCAN_SECONDS", "30"))
+# Set to "false" on processes that should not send reminders. With several
+# workers each may run one; every reminder is still sent once. Reminders
+# written by a process without a scheduler are picked up by the rescan.
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Password hashing (app/auth/password_pool.py)
+# bcrypt cost; stored hashes with another cost are rehashed at login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker processes for bcrypt; 0 hashes on the threadpool instead.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))
+# Hashes queued or running before logins and registrations get a 503.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
@@ -1,16 +1,176 @@
 # app/database.py
-from sqlalchemy import create_engine
+import time
+from pathlib import Path
+from sqlalchemy import Boolean, create_engine, event, exc, inspect
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.functions import FunctionElement
+from app.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+from app.services.metrics import get_counters, get_histogram, increment, observe
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited, connecting
+    included, in the db.pool.wait_ms histogram. The pool events only fire
+    once a connection is handed out, so the wait is timed here."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            increment("db.pool.timeouts")
+            raise
+        finally:
+            observe("db.pool.wait_ms", (time.perf_counter() - started) * 1000)
+
+def engine_options(url: str) -> dict:
+    """Pool settings for create_engine. In-memory SQLite keeps its default
+    pool of one connection per thread, which takes none of them."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+# How long connections stay checked out, and how often they are opened or
+# dropped; GET /metrics/db-pool reports them with the pool's state.
+@event.listens_for(engine, "checkout")
+def record_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+@event.listens_for(engine, "checkin")
+def record_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is not None:
+        observe("db.pool.hold_ms", (time.perf_counter() - started) * 1000)
+
+@event.listens_for(engine, "connect")
+def record_connect(dbapi_connection, connection_record):
+    increment("db.pool.connects")
+
+@event.listens_for(engine, "invalidate")
+def record_invalidate(dbapi_connection, connection_record, exception):
+    increment("db.pool.invalidated")
+
+def pool_stats() -> dict:
+    """The pool's configuration and current state, with the checkout wait
+    and hold histograms, for sizing it."""
+    pool = engine.pool
+    stats = {
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+        "wait_ms": get_histogram("db.pool.wait_ms"),
+        "hold_ms": get_histogram("db.pool.hold_ms"),
+        "counters": {name: n for name, n in get_counters().items() if name.startswith("db.pool.")},
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=DB_MAX_OVERFLOW,
+            timeout=pool.timeout(),
+            recycle=DB_POOL_RECYCLE,
+            pre_ping=DB_POOL_PRE_PING,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # Connections beyond `size`; negative while the pool is still
+            # below it.
+            overflow=pool.overflow(),
+        )
+    return stats
 
-engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+# Revision matching the tables the old Base.metadata.create_all() call made
+BASELINE_REVISION = "0001"
+
+def upgrade_database():
+    """Runs the pending migrations in migrations/ (alembic upgrade head).
+    Databases created before migrations were introduced have the tables but
+    no alembic_version; they are stamped with the baseline revision first so
+    that only the later revisions run."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if "users" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def upsert(db: Session, model, values: dict, key_columns: list, update_columns):
+    """Inserts `values` into the model's table, or updates the existing row
+    with the same `key_columns`, in a single statement. `update_columns` is
+    a list of columns to set to their new values, or a dict of column to
+    the expression to set them to (e.g. {"n": model.n + 1}). `db` may also
+    be a Connection, for use inside a flush."""
+    dialect = (db.dialect if isinstance(db, Connection) else db.get_bind().dialect).name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(model).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            update_columns if isinstance(update_columns, dict) else {c: stmt.inserted[c] for c in update_columns})
+    elif dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(model).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_=update_columns if isinstance(update_columns, dict) else {c: stmt.excluded[c] for c in update_columns})
+    elif isinstance(update_columns, dict):
+        table = model.__table__
+        key = [table.c[c] == values[c] for c in key_columns]
+        if db.execute(table.update().where(*key).values(**update_columns)).rowcount == 0:
+            db.execute(table.insert().values(**values))
+        return
+    else:
+        db.merge(model(**values))
+        return
+    db.execute(stmt)
+
+class likely(FunctionElement):
+    """A condition that holds for most rows. SQLite keeps no statistics on
+    column values, so `start_time < :end` and `end_time > :start` look
+    equally selective to it and it picks between their indexes arbitrarily;
+    wrapping the unselective one in likely() settles it. Other databases
+    estimate from their statistics and get the bare condition."""
+    type = Boolean()
+    name = "likely"
+    inherit_cache = True
+
+    def self_group(self, against=None):
+        # Already a condition; without this, databases lacking a boolean
+        # type would get `... = 1` appended.
+        return self
+
+@compiles(likely)
+def compile_likely(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+@compiles(likely, "sqlite")
+def compile_likely_sqlite(element, compiler, **kw):
+    return "likely(%s)" % compiler.process(element.clauses, **kw)
@@ -1,10 +1,32 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
-from app.models import user, task, meeting, chat_message, notification
-from app.routes import auth, users, tasks, meetings, agent, notifications
-
-app = FastAPI()
+from app.config import AUTO_MIGRATE, REMINDERS_ENABLED
+from app.database import upgrade_database
+from app.auth.password_pool import password_hasher
+from app.models import user, task, meeting, chat_message, notification, calendar_version, conversation_state, occurrence_exception, tombstone, reminder, calendar_share
+from app.services import calendar_version as calendar_version_hooks  # registers session hooks
+from app.services import recurrence as recurrence_hooks  # registers mapper hooks
+from app.services import events as event_hooks  # registers session hooks
+from app.services import reminders as reminder_hooks  # registers session hooks
+from app.services import principal_cache as principal_cache_hooks  # registers session hooks
+from app.routes import auth, users, tasks, meetings, agent, notifications, sync, events, metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sends meeting and task reminders while the app is up (see
+    # app/services/reminders.py).
+    scheduler = asyncio.create_task(reminder_hooks.reminder_scheduler.run()) if REMINDERS_ENABLED else None
+    # Workers for bcrypt (see app/auth/password_pool.py), started before
+    # the first login needs them.
+    password_hasher.start()
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -13,11 +35,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],  # Make sure OPTIONS is included
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date (see migrations/); with AUTO_MIGRATE off, run
+# `alembic upgrade head` as a deploy step instead.
+if AUTO_MIGRATE:
+    upgrade_database()
 
 
 
@@ -26,8 +51,11 @@ app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(tasks.router, prefix="/tasks", tags=["Tasks"])
 app.include_router(meetings.router, prefix="/meetings", tags=["Meetings"])
+app.include_router(sync.router, prefix="/sync", tags=["Sync"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
 app.include_router(agent.router, prefix="/agent", tags=["AI Agent"])
-app.include_router(notifications.router, prefix="/notifications")
+app.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
 @app.get("/")
 def root():
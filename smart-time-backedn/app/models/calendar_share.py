@@ -0,0 +1,24 @@
+from sqlalchemy import Index, Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+class CalendarShare(Base):
+    """Lets the user with viewer_email see when the owner is busy, in group
+    availability searches (app/services/group_availability.py)."""
+    __tablename__ = "calendar_shares"
+    __table_args__ = (
+        # Searches look up which of the participants shared with the viewer;
+        # also keeps an owner from sharing twice with one address.
+        Index("ix_calendar_shares_viewer", "viewer_email", "owner_id", unique=True),
+        Index("ix_calendar_shares_owner", "owner_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Lowercased. An address rather than a user id, so that sharing with an
+    # address that has no account yet looks the same as sharing with one
+    # that has.
+    viewer_email = Column(String(255), nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
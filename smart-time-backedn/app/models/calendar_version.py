@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from app.database import Base
+
+class CalendarVersion(Base):
+    __tablename__ = "calendar_versions"
+
+    # One row per user, bumped in the same transaction as every meeting or
+    # task write (see app/services/calendar_version.py).
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # Time of the last bump; the list endpoints' Last-Modified.
+    updated_at = Column(DateTime, nullable=True)
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Index, Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    # Context lookups read a user's latest messages of given roles.
+    __table_args__ = (Index("ix_chat_messages_user_role_id", "user_id", "role", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, JSON
+from datetime import datetime
+from app.database import Base
+
+class ConversationState(Base):
+    __tablename__ = "conversation_states"
+
+    # One row per user holding the agent's working memory between turns.
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    context_meeting_title = Column(String(255), nullable=True)
+    context_meeting_date = Column(Date, nullable=True)
+    context_task_title = Column(String(255), nullable=True)
+    context_task_date = Column(Date, nullable=True)
+
+    # Proposals waiting for a "yes" from the user
+    pending_meeting = Column(JSON, nullable=True)
+    pending_task = Column(JSON, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
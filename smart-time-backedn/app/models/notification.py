@@ -0,0 +1,27 @@
+from sqlalchemy import Index, Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+class Notification(Base):
+    """A reminder that was sent, kept for the user's inbox
+    (GET /notifications/) until they read it."""
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # The inbox is read newest first, one page at a time.
+        Index("ix_notifications_user_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # "meeting" or "task", and its id; the row may since have been deleted.
+    source = Column(String(16), nullable=False)
+    item_id = Column(Integer, nullable=False)
+
+    title = Column(String(255), nullable=False)
+    message = Column(String(512), nullable=False)
+    # Start of the meeting occurrence, or the task's deadline.
+    event_at = Column(DateTime, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    read_at = Column(DateTime, nullable=True)
@@ -0,0 +1,29 @@
+from sqlalchemy import Index, Column, Integer, String, DateTime, Boolean, ForeignKey, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class OccurrenceException(Base):
+    """A cancelled or changed occurrence of a recurring meeting or task,
+    identified by the start it would have had under the rule."""
+    __tablename__ = "occurrence_exceptions"
+    __table_args__ = (
+        UniqueConstraint("meeting_id", "original_start"),
+        UniqueConstraint("task_id", "original_start"),
+        Index("ix_occurrence_exceptions_user_start", "user_id", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    original_start = Column(DateTime, nullable=False)
+    is_cancelled = Column(Boolean, default=False, nullable=False)
+
+    # Overrides for a changed occurrence; None keeps the series value.
+    title = Column(String(255), nullable=True)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
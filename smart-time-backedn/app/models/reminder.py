@@ -0,0 +1,26 @@
+from sqlalchemy import Index, Column, Integer, String, DateTime, ForeignKey
+from app.database import Base
+
+class Reminder(Base):
+    """The next reminder due for a meeting or task. Only pending reminders
+    are stored, at most one per item; sending one deletes it (see
+    app/services/reminders.py)."""
+    __tablename__ = "reminders"
+    __table_args__ = (
+        # The scheduler reads the reminders due in its next window.
+        Index("ix_reminders_due", "due_at"),
+        # Writes replace the reminder of the item they change.
+        Index("ix_reminders_item", "source", "item_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # "meeting" or "task", and its id.
+    source = Column(String(16), nullable=False)
+    item_id = Column(Integer, nullable=False)
+
+    # Start of the meeting occurrence, or the task's deadline, and the time
+    # the reminder goes out: event_at less the lead time.
+    event_at = Column(DateTime, nullable=False)
+    due_at = Column(DateTime, nullable=False)
@@ -1,5 +1,5 @@
 # models/task.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Index, Column, Integer, String, Text, DateTime, ForeignKey, Enum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -17,6 +17,17 @@ class TaskPriority(str, enum.Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Overlap queries are bounded below by end_time > window start, so
+        # they read the window and what follows it, not the whole history.
+        Index("ix_tasks_user_end", "user_id", "end_time"),
+        # List pages are read in (start_time, id) order.
+        Index("ix_tasks_user_start", "user_id", "start_time", "id"),
+        # Series lookups skip the (far more numerous) one-off rows.
+        Index("ix_tasks_user_recurrence", "user_id", "recurrence_rule"),
+        # The change feed reads rows written after a given calendar version.
+        Index("ix_tasks_user_sync", "user_id", "sync_version", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -30,7 +41,21 @@ class Task(Base):
     start_time = Column(DateTime, nullable=True)
     end_time = Column(DateTime, nullable=True)
 
+    # Inputs for the auto-scheduler when the task has no time yet.
+    deadline = Column(DateTime, nullable=True)
+    duration_minutes = Column(Integer, nullable=True)
+
+    # iCalendar RRULE (e.g. "FREQ=WEEKLY;BYDAY=MO") anchored at start_time;
+    # recurrence_until is the end of the last occurrence, None if unbounded.
+    recurrence_rule = Column(String(255), nullable=True)
+    recurrence_until = Column(DateTime, nullable=True)
+
+    # Calendar version of the last write to the row (see
+    # app/services/calendar_version.py); the change feed's position.
+    sync_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="tasks")
+    exceptions = relationship("OccurrenceException", cascade="all, delete-orphan")
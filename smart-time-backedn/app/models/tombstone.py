@@ -0,0 +1,22 @@
+from sqlalchemy import Index, Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+class Tombstone(Base):
+    """A deleted meeting or task, kept so that the change feed
+    (app/services/sync.py) can tell clients to drop their copy."""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_user_sync", "user_id", "sync_version", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # "meeting" or "task", and the id the row had.
+    kind = Column(String(16), nullable=False)
+    item_id = Column(Integer, nullable=False)
+
+    # Calendar version of the deleting write.
+    sync_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
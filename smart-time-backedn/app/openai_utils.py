@@ -0,0 +1,200 @@
+# app/openai_utils.py
+
+import asyncio
+import random
+import time
+
+import openai
+from openai import AsyncOpenAI
+
+from app.ai_config import (
+    OPENAI_API_KEY,
+    AGENT_REQUEST_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY_SECONDS,
+    LLM_RETRY_MAX_DELAY_SECONDS,
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_RESET_SECONDS,
+    LLM_CIRCUIT_PROBE_TIMEOUT_SECONDS,
+)
+from app.services.metrics import increment
+
+
+class LLMUnavailableError(Exception):
+    """Raised when a completion cannot be obtained within policy: the circuit
+    is open, the request deadline has passed, or retries were exhausted."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` failed
+    requests the circuit opens and calls fail fast for `reset_seconds`; the
+    first call after that is let through as a probe (half-open) and its
+    outcome closes or re-opens the circuit. A probe that ends without an
+    outcome (cancelled) is released, so the next call probes instead.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, probe_timeout_seconds: float = LLM_CIRCUIT_PROBE_TIMEOUT_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            increment("llm.circuit_closed")
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            increment("llm.circuit_opened")
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def release_probe(self):
+        self.probing = False
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+class LLMClient:
+    """
+    The application's single entry point to the OpenAI API. Wraps
+    AsyncOpenAI with a per-request deadline, jittered exponential retries on
+    429/5xx/connection errors and a circuit breaker shared by all requests
+    in the process.
+    """
+
+    def __init__(self, api_key: str = OPENAI_API_KEY):
+        # Retries are handled here so they can respect the request deadline.
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0)
+        self.breaker = CircuitBreaker(
+            LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+
+    @staticmethod
+    def deadline(seconds: float = AGENT_REQUEST_TIMEOUT_SECONDS) -> float:
+        return time.monotonic() + seconds
+
+    async def create(self, deadline: float, **kwargs):
+        if not self.breaker.allow_request():
+            increment("llm.circuit_rejected")
+            raise LLMUnavailableError("circuit_open")
+        if not self.breaker.probing:
+            return await self._create(deadline, **kwargs)
+        # A probe gets a short deadline of its own, so that a hung upstream
+        # re-opens the circuit quickly rather than holding it half-open.
+        deadline = min(deadline, time.monotonic() + self.breaker.probe_timeout_seconds)
+        try:
+            return await self._create(deadline, **kwargs)
+        finally:
+            # Still set only if the probe was cancelled before its outcome
+            # was recorded.
+            self.breaker.release_probe()
+
+    async def stream(self, deadline: float, **kwargs):
+        """
+        The chunks of a streamed completion. Waiting for each chunk is bound
+        by the same deadline as opening the stream, and a stream that breaks
+        off (upstream error, dropped connection) counts as a failure for
+        the breaker; one read to the end counts as a success.
+        """
+        if not self.breaker.allow_request():
+            increment("llm.circuit_rejected")
+            raise LLMUnavailableError("circuit_open")
+        probing = self.breaker.probing
+        if probing:
+            deadline = min(deadline, time.monotonic() + self.breaker.probe_timeout_seconds)
+        try:
+            response = await self._create(deadline, stream=True, **kwargs)
+            try:
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - time.monotonic(), 0))
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        increment("llm.deadline_exceeded")
+                        self.breaker.record_failure()
+                        raise LLMUnavailableError("deadline")
+                    except Exception as exc:
+                        increment("llm.failures")
+                        self.breaker.record_failure()
+                        raise LLMUnavailableError("upstream") from exc
+                    yield chunk
+            finally:
+                await response.close()
+            self.breaker.record_success()
+        finally:
+            if probing:
+                # Still set only if the reader stopped before the stream
+                # ended.
+                self.breaker.release_probe()
+
+    async def _create(self, deadline: float, **kwargs):
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                increment("llm.deadline_exceeded")
+                self.breaker.record_failure()
+                raise LLMUnavailableError("deadline")
+            increment("llm.requests")
+            try:
+                response = await self.client.chat.completions.create(timeout=remaining, **kwargs)
+            except Exception as exc:
+                if isinstance(exc, openai.APITimeoutError):
+                    increment("llm.timeouts")
+                elif not is_retryable(exc):
+                    # Client errors (bad request, auth) mean the upstream
+                    # answered, so they count as healthy for the breaker.
+                    self.breaker.record_success()
+                    raise
+                increment("llm.failures")
+                delay = random.uniform(0, min(
+                    LLM_RETRY_MAX_DELAY_SECONDS, LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+                if attempt >= LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise LLMUnavailableError("upstream") from exc
+                attempt += 1
+                increment("llm.retries")
+                await asyncio.sleep(delay)
+                continue
+            if not kwargs.get("stream"):
+                # A stream's outcome is known once it has been read (see
+                # stream()).
+                self.breaker.record_success()
+            return response
+
+
+llm = LLMClient()
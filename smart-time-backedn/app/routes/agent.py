@@ -1,26 +1,37 @@
 # routers/agent.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.auth.auth_bearer import get_current_user
 from app.models.user import User
 from app.models.chat_message import ChatMessage
-from app.ai_config import OPENAI_API_KEY, GPT_MODEL
+from app.ai_config import GPT_MODEL, AGENT_MAX_TOOL_ROUNDS
+from app.config import WORKING_HOURS_START, WORKING_HOURS_END, SLOT_SUGGESTION_COUNT, GROUP_AVAILABILITY_MAX_USERS, GROUP_AVAILABILITY_MAX_DAYS, AUTO_SCHEDULE_HORIZON_DAYS, AUTO_SCHEDULE_MAX_DAYS
+from app.openai_utils import llm, LLMUnavailableError
+from app.services.metrics import increment, get_counters
+from app.services.calendar_version import get_calendar_version, has_uncommitted_calendar_writes
+from app.services.events import sse_event
+from app.services.date_parsing import parse_datetime
+from app.services.conversation_state import conversation_state
+from app.services.availability import working_window, find_free_slots, format_slots, free_slots_by_day, next_free_slots
+from app.services.recurrence import normalize_rule, occurrences_in_range
+from app.services.auto_scheduler import auto_schedule_tasks
+from app.services.group_availability import resolve_participants, find_common_slots
+from app.services.completion_cache import completion_cache, normalize_message, schema_fingerprint
 from app.models.task import Task
 from app.models.meeting import Meeting
 from datetime import datetime, timedelta
-from openai import OpenAI
+import asyncio
 import json
 import os
-import dateparser
+import openai
 import re
 
 router = APIRouter()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 tools = [
     {
         "type": "function",
@@ -35,6 +46,7 @@ tools = [
                     "end_time": {"type": "string"},
                     "location": {"type": "string"},
                     "description": {"type": "string"},
+                    "recurrence_rule": {"type": "string", "description": "iCalendar RRULE for a recurring meeting, e.g. FREQ=WEEKLY;BYDAY=MO"},
                 },
                 "required": ["title", "start_time", "end_time"]
             },
@@ -55,6 +67,23 @@ tools = [
             }
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_group_availability",
+            "description": "Find time slots when the user and the given colleagues are all free, for scheduling a meeting together. Only colleagues who shared their calendar with the user can be included.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "participants": {"type": "array", "items": {"type": "string", "format": "email"}, "description": "Email addresses of the other participants"},
+                    "date": {"type": "string", "format": "date", "description": "First day to search"},
+                    "duration_minutes": {"type": "integer"},
+                    "days": {"type": "integer", "description": "Number of days to search, default 1"}
+                },
+                "required": ["participants", "date", "duration_minutes"]
+            }
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -115,12 +144,28 @@ tools += [
                     "start_time": {"type": "string"},
                     "end_time": {"type": "string"},
                     "description": {"type": "string"},
-                    "priority": {"type": "string"}
+                    "priority": {"type": "string"},
+                    "recurrence_rule": {"type": "string", "description": "iCalendar RRULE for a recurring task, e.g. FREQ=DAILY;COUNT=5"}
                 },
                 "required": ["title"]
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "auto_schedule_tasks",
+            "description": "Schedule all of the user's pending tasks that have no time yet into their free working time, by priority and deadline.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string", "format": "date", "description": "First day to schedule into, default today"},
+                    "days": {"type": "integer", "description": "Number of days to schedule into"}
+                },
+                "required": []
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -194,7 +239,11 @@ tools += [
 ]
 
 
-def create_meeting_backend(user_id: int, title: str, start_time: str, end_time: str, location: str = None, description: str = None, db: Session = None):
+def create_meeting_backend(user_id: int, title: str, start_time: str, end_time: str, location: str = None, description: str = None, recurrence_rule: str = None, db: Session = None):
+    try:
+        recurrence_rule = normalize_rule(recurrence_rule)
+    except ValueError as e:
+        return {"error": str(e)}
     meeting = Meeting(
         user_id=user_id,
         title=title,
@@ -202,56 +251,43 @@ def create_meeting_backend(user_id: int, title: str, start_time: str, end_time:
         end_time=datetime.fromisoformat(end_time),
         location=location,
         description=description,
+        recurrence_rule=recurrence_rule,
     )
     db.add(meeting)
-    db.commit()
-    db.refresh(meeting)
+    db.flush()
     return {"status": "Meeting created", "meeting_id": meeting.id}
 
 
 def get_free_time_backend(user_id: int, date: str, duration_minutes: int, db: Session):
-    day_start = datetime.fromisoformat(date + "T09:00:00")
-    day_end = datetime.fromisoformat(date + "T17:00:00")
-
-    meetings = db.query(Meeting).filter(
-        Meeting.user_id == user_id,
-        Meeting.start_time >= day_start,
-        Meeting.end_time <= day_end
-    ).all()
+    day_start, day_end = working_window(date)
+    slots = find_free_slots(db, user_id, day_start, day_end, duration_minutes)
+    return {"free_slots": format_slots(slots)}
 
-    busy_slots = [(m.start_time, m.end_time) for m in meetings]
 
-    free_slots = []
-    current_time = day_start
-    while current_time + timedelta(minutes=duration_minutes) <= day_end:
-        candidate_end = current_time + timedelta(minutes=duration_minutes)
-        overlap = any(s < candidate_end and e >
-                      current_time for s, e in busy_slots)
-        if not overlap:
-            free_slots.append(
-                {"start": current_time.isoformat(), "end": candidate_end.isoformat()})
-        current_time += timedelta(minutes=30)
-
-    return {"free_slots": free_slots}
+def find_group_availability_backend(user_id: int, participants: list, date: str, duration_minutes: int, db: Session, days: int = 1):
+    user_ids, missing = resolve_participants(db, participants, user_id)
+    if missing:
+        return {"error": f"No shared calendar for: {', '.join(missing)}"}
+    if len(user_ids) > GROUP_AVAILABILITY_MAX_USERS:
+        return {"error": f"At most {GROUP_AVAILABILITY_MAX_USERS} participants are supported"}
+    days = min(max(int(days or 1), 1), GROUP_AVAILABILITY_MAX_DAYS)
+    window_start = datetime.fromisoformat(date).replace(hour=0, minute=0, second=0, microsecond=0)
+    slots = find_common_slots(db, user_ids, window_start, window_start + timedelta(days=days), duration_minutes)
+    return {"common_slots": format_slots(slots)}
 
 
 def get_meetings_on_date_backend(user_id: int, date: str, db: Session):
-    try:
-        parsed_date = datetime.fromisoformat(date)
-    except Exception:
-        parsed_date = dateparser.parse(
-            date, settings={"RELATIVE_BASE": datetime.now()})
+    parsed_date = parse_datetime(date)
     if not parsed_date:
         raise ValueError(f"Could not parse date: {date}")
     day_start = parsed_date.replace(hour=0, minute=0, second=0, microsecond=0)
     day_end = parsed_date.replace(
         hour=23, minute=59, second=59, microsecond=999999)
     print("Getting meetings for date:", day_start, day_end)
-    meetings = db.query(Meeting).filter(
-        Meeting.user_id == user_id,
-        Meeting.start_time >= day_start,
-        Meeting.start_time <= day_end
-    ).all()
+    meetings = [
+        m for m in occurrences_in_range(db, Meeting, user_id, day_start, day_end)
+        if m.start_time >= day_start
+    ]
     return [
         {
             "id": m.id,
@@ -259,7 +295,8 @@ def get_meetings_on_date_backend(user_id: int, date: str, db: Session):
             "start_time": m.start_time.isoformat(),
             "end_time": m.end_time.isoformat(),
             "location": m.location,
-            "description": m.description
+            "description": m.description,
+            "recurrence_rule": m.recurrence_rule
         } for m in meetings
     ]
 
@@ -270,7 +307,7 @@ def delete_meeting_backend(user_id: int, meeting_id: int, db: Session):
     if not meeting:
         return {"error": "Meeting not found"}
     db.delete(meeting)
-    db.commit()
+    db.flush()
     return {"status": "Meeting deleted"}
 
 
@@ -278,12 +315,9 @@ def find_meetings(user_id: int, db: Session, title: str = None, date: str = None
     query = db.query(Meeting).filter(Meeting.user_id == user_id)
     print(
         f"find_meetings called with title={title}, date={date}, start_time={start_time}, end_time={end_time}")
-    parsed_date = dateparser.parse(
-        date, settings={"RELATIVE_BASE": datetime.now()}) if date else None
-    parsed_start = dateparser.parse(
-        start_time, settings={"RELATIVE_BASE": datetime.now()}) if start_time else None
-    parsed_end = dateparser.parse(
-        end_time, settings={"RELATIVE_BASE": datetime.now()}) if end_time else None
+    parsed_date = parse_datetime(date) if date else None
+    parsed_start = parse_datetime(start_time) if start_time else None
+    parsed_end = parse_datetime(end_time) if end_time else None
     print(
         f"parsed_date={parsed_date}, parsed_start={parsed_start}, parsed_end={parsed_end}")
     if title:
@@ -347,30 +381,21 @@ def delete_meeting_backend(user_id: int, db: Session, title: str = None, date: s
         return {"error": "No matching meetings found"}
     for m in meetings:
         db.delete(m)
-    db.commit()
+    db.flush()
     return {"status": f"Deleted {len(meetings)} meeting(s)", "deleted_ids": [m.id for m in meetings]}
 
 
 def is_time_slot_available(user_id: int, db: Session, new_start: datetime, new_end: datetime, exclude_meeting_id: int = None):
-    q = db.query(Meeting).filter(Meeting.user_id == user_id)
-    if exclude_meeting_id:
-        q = q.filter(Meeting.id != exclude_meeting_id)
-    q = q.filter(
-        (Meeting.start_time < new_end) & (Meeting.end_time > new_start)
-    )
-    return not q.first()
+    return not occurrences_in_range(db, Meeting, user_id, new_start, new_end, exclude_id=exclude_meeting_id)
+
+
+def suggest_available_slots(user_id: int, db: Session, duration_minutes: int, after: datetime, limit: int = SLOT_SUGGESTION_COUNT):
+    return next_free_slots(db, user_id, after, duration_minutes, limit=limit)
 
 
 def suggest_next_available_slot(user_id: int, db: Session, duration_minutes: int, after: datetime):
-    for day in range(0, 7):
-        day_start = (after + timedelta(days=day)).replace(hour=9,
-                                                          minute=0, second=0, microsecond=0)
-        for i in range(0, 16):
-            slot_start = day_start + timedelta(minutes=30 * i)
-            slot_end = slot_start + timedelta(minutes=duration_minutes)
-            if is_time_slot_available(user_id, db, slot_start, slot_end):
-                return slot_start, slot_end
-    return None, None
+    slots = suggest_available_slots(user_id, db, duration_minutes, after, limit=1)
+    return slots[0] if slots else (None, None)
 
 
 def update_meeting_backend(user_id: int, db: Session, title: str = None, date: str = None, start_time: str = None, end_time: str = None, meeting_id: int = None, new_title: str = None, new_start_time: str = None, new_end_time: str = None):
@@ -392,138 +417,84 @@ def update_meeting_backend(user_id: int, db: Session, title: str = None, date: s
         if new_start_time:
             ns = datetime.fromisoformat(new_start_time)
         elif start_time:
-            ns = dateparser.parse(start_time, settings={
-                                  "RELATIVE_BASE": m.start_time})
+            ns = parse_datetime(start_time, m.start_time)
         else:
             ns = m.start_time
         if new_end_time:
             ne = datetime.fromisoformat(new_end_time)
         elif end_time:
-            ne = dateparser.parse(end_time, settings={
-                                  "RELATIVE_BASE": m.end_time})
+            ne = parse_datetime(end_time, m.end_time)
         else:
             ne = m.end_time
         if not is_time_slot_available(user_id, db, ns, ne, exclude_meeting_id=m.id):
-            slot_start, slot_end = suggest_next_available_slot(
+            suggestions = suggest_available_slots(
                 user_id, db, int((ne-ns).total_seconds()//60), ns)
-            return {"error": "Time slot not available", "suggested_start": slot_start.isoformat() if slot_start else None, "suggested_end": slot_end.isoformat() if slot_end else None}
+            slot_start, slot_end = suggestions[0] if suggestions else (None, None)
+            return {"error": "Time slot not available", "suggested_start": slot_start.isoformat() if slot_start else None, "suggested_end": slot_end.isoformat() if slot_end else None, "alternatives": format_slots(suggestions)}
         if new_title:
             m.title = new_title
         m.start_time = ns
         m.end_time = ne
-        db.commit()
-        db.refresh(m)
+        db.flush()
         updated.append(m.id)
     return {"status": f"Updated {len(updated)} meeting(s)", "updated_ids": updated}
 
 
 def extract_date_from_message(message: str):
-    parsed = dateparser.parse(
-        message, settings={"RELATIVE_BASE": datetime.now()})
+    parsed = parse_datetime(message)
     return parsed.date().isoformat() if parsed else None
 
 
 def set_last_context_meeting(user_id: int, db: Session, title: str = None, date: str = None):
-    db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                 ChatMessage.role == "context_meeting").delete()
-    ctx = {"type": "meeting"}
-    if title:
-        ctx["title"] = title
-    if date:
-        ctx["date"] = date
-    db.add(ChatMessage(user_id=user_id,
-           role="context_meeting", content=json.dumps(ctx)))
-    db.commit()
+    conversation_state.update(
+        user_id, db, context_meeting_title=title, context_meeting_date=date)
 
 
 def get_last_context_meeting(user_id: int, db: Session):
-    last_ctx = db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                            ChatMessage.role == "context_meeting").order_by(desc(ChatMessage.id)).first()
-    if last_ctx:
-        try:
-            ctx = json.loads(last_ctx.content)
-            return ctx.get("title"), ctx.get("date")
-        except Exception:
-            return None, None
-    return None, None
+    state = conversation_state.get(user_id, db)
+    ctx_date = state["context_meeting_date"]
+    return state["context_meeting_title"], ctx_date.isoformat() if ctx_date else None
 
 
 def set_last_context_task(user_id: int, db: Session, title: str = None, date: str = None):
-    db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                 ChatMessage.role == "context_task").delete()
-    ctx = {"type": "task"}
-    if title:
-        ctx["title"] = title
-    if date:
-        ctx["date"] = date
-    db.add(ChatMessage(user_id=user_id, role="context_task", content=json.dumps(ctx)))
-    db.commit()
+    conversation_state.update(
+        user_id, db, context_task_title=title, context_task_date=date)
 
 
 def get_last_context_task(user_id: int, db: Session):
-    last_ctx = db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                            ChatMessage.role == "context_task").order_by(desc(ChatMessage.id)).first()
-    if last_ctx:
-        try:
-            ctx = json.loads(last_ctx.content)
-            return ctx.get("title"), ctx.get("date")
-        except Exception:
-            return None, None
-    return None, None
+    state = conversation_state.get(user_id, db)
+    ctx_date = state["context_task_date"]
+    return state["context_task_title"], ctx_date.isoformat() if ctx_date else None
 
 
 def set_pending_meeting(user_id: int, db: Session, meeting_data: dict):
-    db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                 ChatMessage.role == "pending_meeting").delete()
-    db.add(ChatMessage(user_id=user_id, role="pending_meeting",
-           content=json.dumps(meeting_data)))
-    db.commit()
+    conversation_state.update(user_id, db, pending_meeting=meeting_data)
 
 
 def get_pending_meeting(user_id: int, db: Session):
-    last_ctx = db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                            ChatMessage.role == "pending_meeting").order_by(desc(ChatMessage.id)).first()
-    if last_ctx:
-        try:
-            return json.loads(last_ctx.content)
-        except Exception:
-            return None
-    return None
+    return conversation_state.get(user_id, db)["pending_meeting"]
 
 
 def clear_pending_meeting(user_id: int, db: Session):
-    db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                 ChatMessage.role == "pending_meeting").delete()
-    db.commit()
+    conversation_state.update(user_id, db, pending_meeting=None)
 
 
 def set_pending_task(user_id: int, db: Session, task_data: dict):
-    db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                 ChatMessage.role == "pending_task").delete()
-    db.add(ChatMessage(user_id=user_id, role="pending_task",
-           content=json.dumps(task_data)))
-    db.commit()
+    conversation_state.update(user_id, db, pending_task=task_data)
 
 
 def get_pending_task(user_id: int, db: Session):
-    last_ctx = db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                            ChatMessage.role == "pending_task").order_by(desc(ChatMessage.id)).first()
-    if last_ctx:
-        try:
-            return json.loads(last_ctx.content)
-        except Exception:
-            return None
-    return None
+    return conversation_state.get(user_id, db)["pending_task"]
 
 
 def clear_pending_task(user_id: int, db: Session):
-    db.query(ChatMessage).filter(ChatMessage.user_id == user_id,
-                                 ChatMessage.role == "pending_task").delete()
-    db.commit()
+    conversation_state.update(user_id, db, pending_task=None)
 
 
 def get_recent_chat_history(user_id: int, db: Session, n: int = 10):
-    return db.query(ChatMessage).filter(ChatMessage.user_id == user_id).order_by(desc(ChatMessage.id)).limit(n).all()[::-1]
+    # Only real conversation turns; older deployments also stored agent state
+    # rows in this table.
+    return db.query(ChatMessage).filter(ChatMessage.user_id == user_id, ChatMessage.role.in_(("user", "assistant"))).order_by(desc(ChatMessage.id)).limit(n).all()[::-1]
 
 
 def infer_context_from_history(history):
@@ -543,8 +514,14 @@ def infer_context_from_history(history):
 # --- TASKS BACKEND LOGIC ---
 
 
-def create_task_backend(user_id: int, title: str, start_time: str = None, end_time: str = None, description: str = None, priority: str = None, db: Session = None):
+def create_task_backend(user_id: int, title: str, start_time: str = None, end_time: str = None, description: str = None, priority: str = None, recurrence_rule: str = None, db: Session = None):
     from app.models.task import Task, TaskPriority
+    try:
+        recurrence_rule = normalize_rule(recurrence_rule)
+    except ValueError as e:
+        return {"error": str(e)}
+    if recurrence_rule and not (start_time and end_time):
+        return {"error": "A recurring task needs a start and end time"}
     # Map 'normal' to 'medium' and validate priority
     if priority:
         priority_lower = priority.lower()
@@ -564,32 +541,26 @@ def create_task_backend(user_id: int, title: str, start_time: str = None, end_ti
         start_time=datetime.fromisoformat(start_time) if start_time else None,
         end_time=datetime.fromisoformat(end_time) if end_time else None,
         description=description,
-        priority=priority_enum
+        priority=priority_enum,
+        recurrence_rule=recurrence_rule,
     )
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    db.flush()
     return {"status": "Task created", "task_id": task.id}
 
 
 def get_tasks_on_date_backend(user_id: int, date: str, db: Session):
     from app.models.task import Task
-    try:
-        parsed_date = datetime.fromisoformat(date)
-    except Exception:
-        import dateparser
-        parsed_date = dateparser.parse(
-            date, settings={"RELATIVE_BASE": datetime.now()})
+    parsed_date = parse_datetime(date)
     if not parsed_date:
         raise ValueError(f"Could not parse date: {date}")
     day_start = parsed_date.replace(hour=0, minute=0, second=0, microsecond=0)
     day_end = parsed_date.replace(
         hour=23, minute=59, second=59, microsecond=999999)
-    tasks = db.query(Task).filter(
-        Task.user_id == user_id,
-        Task.start_time >= day_start,
-        Task.start_time <= day_end
-    ).all()
+    tasks = [
+        t for t in occurrences_in_range(db, Task, user_id, day_start, day_end)
+        if t.start_time >= day_start
+    ]
     return [
         {
             "id": t.id,
@@ -597,21 +568,18 @@ def get_tasks_on_date_backend(user_id: int, date: str, db: Session):
             "start_time": t.start_time.isoformat() if t.start_time else None,
             "end_time": t.end_time.isoformat() if t.end_time else None,
             "description": t.description,
-            "priority": t.priority.value
+            "priority": t.priority.value,
+            "recurrence_rule": t.recurrence_rule
         } for t in tasks
     ]
 
 
 def find_tasks(user_id: int, db: Session, title: str = None, date: str = None, start_time: str = None, end_time: str = None):
     from app.models.task import Task
-    import dateparser
     query = db.query(Task).filter(Task.user_id == user_id)
-    parsed_date = dateparser.parse(
-        date, settings={"RELATIVE_BASE": datetime.now()}) if date else None
-    parsed_start = dateparser.parse(
-        start_time, settings={"RELATIVE_BASE": datetime.now()}) if start_time else None
-    parsed_end = dateparser.parse(
-        end_time, settings={"RELATIVE_BASE": datetime.now()}) if end_time else None
+    parsed_date = parse_datetime(date) if date else None
+    parsed_start = parse_datetime(start_time) if start_time else None
+    parsed_end = parse_datetime(end_time) if end_time else None
     if title:
         query = query.filter(Task.title.ilike(f"%{title}%"))
     if parsed_date:
@@ -642,7 +610,7 @@ def delete_task_backend(user_id: int, db: Session, title: str = None, date: str
         return {"error": "No matching tasks found"}
     for t in tasks:
         db.delete(t)
-    db.commit()
+    db.flush()
     return {"status": f"Deleted {len(tasks)} task(s)", "deleted_ids": [t.id for t in tasks]}
 
 
@@ -665,55 +633,41 @@ def update_task_backend(user_id: int, db: Session, title: str = None, date: str
         if new_start_time:
             t.start_time = datetime.fromisoformat(new_start_time)
         elif start_time:
-            import dateparser
-            t.start_time = dateparser.parse(
-                start_time, settings={"RELATIVE_BASE": t.start_time or datetime.now()})
+            t.start_time = parse_datetime(start_time, t.start_time)
         if new_end_time:
             t.end_time = datetime.fromisoformat(new_end_time)
         elif end_time:
-            import dateparser
-            t.end_time = dateparser.parse(
-                end_time, settings={"RELATIVE_BASE": t.end_time or datetime.now()})
+            t.end_time = parse_datetime(end_time, t.end_time)
         if new_description:
             t.description = new_description
         if new_priority:
             t.priority = TaskPriority(new_priority)
-        db.commit()
-        db.refresh(t)
+        db.flush()
         updated.append(t.id)
     return {"status": f"Updated {len(updated)} task(s)", "updated_ids": updated}
 
 
 def is_task_time_slot_available(user_id: int, db: Session, new_start: datetime, new_end: datetime, exclude_task_id: int = None):
-    from app.models.task import Task
-    q = db.query(Task).filter(Task.user_id == user_id)
-    if exclude_task_id:
-        q = q.filter(Task.id != exclude_task_id)
-    q = q.filter((Task.start_time < new_end) & (Task.end_time > new_start))
-    return not q.first()
+    return not occurrences_in_range(db, Task, user_id, new_start, new_end, exclude_id=exclude_task_id, points=False)
+
+
+def auto_schedule_tasks_backend(user_id: int, db: Session, date: str = None, days: int = None):
+    start = datetime.fromisoformat(date) if date else None
+    days = min(max(int(days or AUTO_SCHEDULE_HORIZON_DAYS), 1), AUTO_SCHEDULE_MAX_DAYS)
+    result = auto_schedule_tasks(db, user_id, start, days)
+    return {
+        "scheduled": [
+            {**item, "start_time": item["start_time"].isoformat(), "end_time": item["end_time"].isoformat()}
+            for item in result["scheduled"]
+        ],
+        "unscheduled_task_ids": result["unscheduled"],
+    }
 
 
 def get_free_time_for_task_backend(user_id: int, date: str, duration_minutes: int, db: Session):
-    from app.models.task import Task
-    day_start = datetime.fromisoformat(date + "T09:00:00")
-    day_end = datetime.fromisoformat(date + "T17:00:00")
-    tasks = db.query(Task).filter(
-        Task.user_id == user_id,
-        Task.start_time >= day_start,
-        Task.end_time <= day_end
-    ).all()
-    busy_slots = [(t.start_time, t.end_time) for t in tasks]
-    free_slots = []
-    current_time = day_start
-    while current_time + timedelta(minutes=duration_minutes) <= day_end:
-        candidate_end = current_time + timedelta(minutes=duration_minutes)
-        overlap = any(s < candidate_end and e >
-                      current_time for s, e in busy_slots)
-        if not overlap:
-            free_slots.append(
-                {"start": current_time.isoformat(), "end": candidate_end.isoformat()})
-        current_time += timedelta(minutes=30)
-    return {"free_slots": free_slots}
+    day_start, day_end = working_window(date)
+    slots = find_free_slots(db, user_id, day_start, day_end, duration_minutes, sources=("tasks",))
+    return {"free_slots": format_slots(slots)}
 
 
 def is_relevant_query(message: str) -> bool:
@@ -803,39 +757,50 @@ def is_relevant_query(message: str) -> bool:
     return has_intent or has_phrase or (has_action and has_time) or (has_question and has_time)
 
 
-@router.post("/chat")
-# Check if the message is relevant to time management
-def chat_with_agent(message: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    if not is_relevant_query(message):
-        return {"reply": "I am your time management assistant. I can help you with:\n- Scheduling meetings and appointments\n- Managing tasks and reminders\n- Checking your calendar and availability\n- Setting deadlines and priorities\n\nPlease ask me something related to these topics."}
+IRRELEVANT_REPLY = "I am your time management assistant. I can help you with:\n- Scheduling meetings and appointments\n- Managing tasks and reminders\n- Checking your calendar and availability\n- Setting deadlines and priorities\n\nPlease ask me something related to these topics."
+
+CONFIRMATION_WORDS = ["yes", "ok", "confirm",
+                      "do it", "schedule it", "that time"]
 
-    from openai.types.chat import ChatCompletionMessage
 
+def is_confirmation_message(message: str) -> bool:
+    message_lower = message.lower()
+    return any(word in message_lower for word in CONFIRMATION_WORDS)
+
+
+def extract_title_from_message(msg):
+    msg = re.sub(r'\b(make|create|schedule|add|set up|organize|plan|update|change|move|delete|remove)\b',
+                 '', msg, flags=re.IGNORECASE)
+    match = re.search(r'"([^"]+)"', msg)
+    if match:
+        return match.group(1).strip()
+    match = re.search(
+        r'(?:the |a )?([\w\s]+? Meeting)', msg, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    match = re.search(
+        r'(?:the |a )?([\w\s]+?)(?= (meeting|event|call|appointment))', msg, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r'(?:the |a )?([A-Z][\w]+)', msg)
+    if match:
+        return match.group(1).strip()
+    return None
+
+
+def prepare_agent_turn(message: str, user_id: int, db: Session):
+    """
+    Runs the synchronous part of a chat turn that happens before the first
+    LLM call: context inference from history, context persistence, prompt
+    construction and storing the user message. Returns the turn state used
+    by the rest of the pipeline.
+    """
     today = datetime.now().strftime('%Y-%m-%d')
     now_time = datetime.now().strftime('%H:%M')
 
-    history = get_recent_chat_history(current_user.id, db, n=10)
+    history = get_recent_chat_history(user_id, db, n=10)
     inferred_title, inferred_date = infer_context_from_history(history)
 
-    def extract_title_from_message(msg):
-        msg = re.sub(r'\b(make|create|schedule|add|set up|organize|plan|update|change|move|delete|remove)\b',
-                     '', msg, flags=re.IGNORECASE)
-        match = re.search(r'"([^"]+)"', msg)
-        if match:
-            return match.group(1).strip()
-        match = re.search(
-            r'(?:the |a )?([\w\s]+? Meeting)', msg, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-        match = re.search(
-            r'(?:the |a )?([\w\s]+?)(?= (meeting|event|call|appointment))', msg, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-        match = re.search(r'(?:the |a )?([A-Z][\w]+)', msg)
-        if match:
-            return match.group(1).strip()
-        return None
-
     referenced_title = extract_title_from_message(message) or inferred_title
     referenced_date = extract_date_from_message(message) or inferred_date
 
@@ -846,29 +811,24 @@ def chat_with_agent(message: str, db: Session = Depends(get_db), current_user: U
                      "meeting", "call", "appointment", "event"]) and not is_task
 
     # Only update context if the message is not a confirmation
-    confirmation_words = ["yes", "ok", "confirm",
-                          "do it", "schedule it", "that time"]
-    is_confirmation = any(word in message.lower()
-                          for word in confirmation_words)
-
-    if not is_confirmation and (referenced_title or referenced_date):
+    if not is_confirmation_message(message) and (referenced_title or referenced_date):
         # Only update the relevant context
         if is_task:
-            set_last_context_task(current_user.id, db,
+            set_last_context_task(user_id, db,
                                   referenced_title, referenced_date)
         elif is_meeting:
             set_last_context_meeting(
-                current_user.id, db, referenced_title, referenced_date)
+                user_id, db, referenced_title, referenced_date)
         else:
             # fallback: set both only if truly ambiguous
-            set_last_context_task(current_user.id, db,
+            set_last_context_task(user_id, db,
                                   referenced_title, referenced_date)
             set_last_context_meeting(
-                current_user.id, db, referenced_title, referenced_date)
+                user_id, db, referenced_title, referenced_date)
 
     ctx_title_meeting, ctx_date_meeting = get_last_context_meeting(
-        current_user.id, db)
-    ctx_title_task, ctx_date_task = get_last_context_task(current_user.id, db)
+        user_id, db)
+    ctx_title_task, ctx_date_task = get_last_context_task(user_id, db)
 
     context_line = ""
     if ctx_date_meeting or ctx_title_meeting:
@@ -892,338 +852,858 @@ def chat_with_agent(message: str, db: Session = Depends(get_db), current_user: U
         {"role": "user", "content": message},
     ]
 
-    db.add(ChatMessage(user_id=current_user.id, role="user", content=message))
-    db.commit()
+    db.add(ChatMessage(user_id=user_id, role="user", content=message))
+
+    return {
+        "messages": messages,
+        "calendar_version": get_calendar_version(user_id, db),
+        "ctx_title_meeting": ctx_title_meeting,
+        "ctx_date_meeting": ctx_date_meeting,
+        "ctx_title_task": ctx_title_task,
+        "ctx_date_task": ctx_date_task,
+    }
 
-    def propose_alternative_slots(user_id, db, date, duration_minutes, meeting_data=None):
-        free = get_free_time_backend(user_id, date, duration_minutes, db)[
-            "free_slots"]
-        if free:
-            if meeting_data:
-                meeting_data = meeting_data.copy()
-                meeting_data["proposed_start"] = free[0]["start"]
-                meeting_data["proposed_end"] = free[0]["end"]
-                set_pending_meeting(user_id, db, meeting_data)
+
+def propose_alternative_slots(user_id, db, date, duration_minutes, meeting_data=None):
+    days = free_slots_by_day(db, user_id, datetime.fromisoformat(date).date(), duration_minutes)
+    for day, slots in days:
+        if not slots:
+            continue
+        free = format_slots(slots)
+        if meeting_data:
+            meeting_data = meeting_data.copy()
+            meeting_data["proposed_start"] = free[0]["start"]
+            meeting_data["proposed_end"] = free[0]["end"]
+            set_pending_meeting(user_id, db, meeting_data)
+        if day == days[0][0]:
             return f"Available slots on {date}: " + ", ".join([f'{slot["start"]} to {slot["end"]}' for slot in free])
-        for i in range(1, 7):
-            next_date = (datetime.fromisoformat(date) +
-                         timedelta(days=i)).date().isoformat()
-            free = get_free_time_backend(user_id, next_date, duration_minutes, db)[
-                "free_slots"]
-            if free:
-                if meeting_data:
-                    meeting_data = meeting_data.copy()
-                    meeting_data["proposed_start"] = free[0]["start"]
-                    meeting_data["proposed_end"] = free[0]["end"]
-                    set_pending_meeting(user_id, db, meeting_data)
-                return f"No slots available on {date}. Next available on {next_date}: " + ", ".join([f'{slot["start"]} to {slot["end"]}' for slot in free])
-        return "No available slots in the next week."
-
-    while True:
-        response = client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
-        )
+        return f"No slots available on {date}. Next available on {day}: " + ", ".join([f'{slot["start"]} to {slot["end"]}' for slot in free])
+    return "No available slots in the next week."
+
+
+def resolve_pending_confirmation(user_id: int, turn: dict, db: Session):
+    """
+    Handles a confirmation message ("yes", "ok", ...) against a pending task
+    or meeting proposal. Returns the reply to send, or None when there is
+    nothing pending to confirm.
+    """
+    ctx_title_meeting = turn["ctx_title_meeting"]
+    ctx_title_task = turn["ctx_title_task"]
+    pending_meeting = get_pending_meeting(user_id, db)
+    pending_task = get_pending_task(user_id, db)
+    # --- Fix: Only check for task slot conflicts when confirming a task ---
+    if pending_task and "start_time" in pending_task and "end_time" in pending_task:
+        start_dt = datetime.fromisoformat(
+            pending_task["start_time"])
+        end_dt = datetime.fromisoformat(pending_task["end_time"])
+        if is_task_time_slot_available(user_id, db, start_dt, end_dt):
+            create_task_backend(
+                user_id=user_id,
+                title=pending_task.get(
+                    "title", ctx_title_task or "Untitled Task"),
+                start_time=pending_task["start_time"],
+                end_time=pending_task["end_time"],
+                description=pending_task.get("description"),
+                priority=pending_task.get("priority"),
+                db=db
+            )
+            clear_pending_task(user_id, db)
+            return f"The task '{pending_task.get('title', ctx_title_task or 'Untitled Task')}' has been scheduled for {pending_task['start_time']} to {pending_task['end_time']}!"
+        # Suggest alternative task slots
+        duration = int(
+            (end_dt - start_dt).total_seconds() // 60)
+        alt = get_free_time_for_task_backend(
+            user_id, start_dt.date().isoformat(), duration, db)["free_slots"]
+        alt_str = "\n".join([
+            f"- {slot['start'][11:16]} - {slot['end'][11:16]}" for slot in alt
+        ]) if alt else "No available slots."
+        return f"The time you requested for the task '{pending_task.get('title', ctx_title_task or 'Untitled Task')}' is not available. Here are some available slots for your task:\n{alt_str}"
+    elif pending_meeting and "proposed_start" in pending_meeting and "proposed_end" in pending_meeting:
+        start_dt = datetime.fromisoformat(
+            pending_meeting["proposed_start"])
+        end_dt = datetime.fromisoformat(
+            pending_meeting["proposed_end"])
+        if is_time_slot_available(user_id, db, start_dt, end_dt):
+            create_meeting_backend(
+                user_id=user_id,
+                title=pending_meeting.get(
+                    "title", ctx_title_meeting or "Untitled Meeting"),
+                start_time=pending_meeting["proposed_start"],
+                end_time=pending_meeting["proposed_end"],
+                location=pending_meeting.get("location"),
+                description=pending_meeting.get("description"),
+                db=db
+            )
+            clear_pending_meeting(user_id, db)
+            return f"The meeting '{pending_meeting.get('title', ctx_title_meeting or 'Untitled Meeting')}' has been scheduled for {pending_meeting['proposed_start']} to {pending_meeting['proposed_end']}!"
+        # Suggest alternative meeting slots
+        duration = int(
+            (end_dt - start_dt).total_seconds() // 60)
+        alt = get_free_time_backend(
+            user_id, start_dt.date().isoformat(), duration, db)["free_slots"]
+        alt_str = "\n".join([
+            f"- {slot['start'][11:16]} - {slot['end'][11:16]}" for slot in alt
+        ]) if alt else "No available slots."
+        return f"The time you requested for the meeting '{pending_meeting.get('title', ctx_title_meeting or 'Untitled Meeting')}' is not available. Here are some available slots for your meeting:\n{alt_str}"
+    return None
+
+
+def commit_turn_step(db: Session):
+    """Commits what the chat turn has written (or read) since the last step,
+    before the next LLM call. Backends and state helpers only flush; a
+    transaction left open across the call would hold its pooled connection,
+    and after a calendar write the user's calendar_versions row lock, for
+    as long as the model takes. A failure rolls back the current step."""
+    db.commit()
+
+
+def save_assistant_reply(user_id: int, content: str, db: Session):
+    """Stores the reply and commits the last step of the turn."""
+    db.add(ChatMessage(user_id=user_id, role="assistant", content=content))
+    db.commit()
+
+
+# --- RULE-BASED FAST PATH ---
+# Read-only schedule questions ("what meetings do I have tomorrow", "am I free
+# Friday afternoon") are answered straight from the backends when the intent
+# and date can be extracted deterministically. Anything ambiguous goes to the
+# LLM.
+
+FAST_PATH_MAX_WORDS = 12
+
+FAST_PATH_MEETING_WORDS = {"meeting", "meetings", "appointment", "appointments",
+                           "réunion", "réunions", "reunion", "reunions", "rendez-vous"}
+FAST_PATH_TASK_WORDS = {"task", "tasks", "todo", "todos", "to-do",
+                        "tâche", "tâches", "tache", "taches"}
+FAST_PATH_FREE_WORDS = {"free", "available", "availability", "busy",
+                        "libre", "disponible", "occupé", "occupée"}
+FAST_PATH_WRITE_WORDS = {
+    "create", "schedule", "add", "book", "plan", "set", "cancel", "delete",
+    "remove", "reschedule", "move", "update", "change", "rename", "complete",
+    "finish", "mark", "remind", "organize",
+    "créer", "planifier", "ajouter", "ajoute", "supprimer", "supprime", "annuler",
+    "annule", "déplacer", "déplace", "modifier", "modifie", "changer", "terminer",
+    "fixer", "organiser", "rappelle",
+}
+# Questions about other people's calendars need find_group_availability.
+FAST_PATH_GROUP_WORDS = {"with", "avec", "everyone", "team", "équipe"}
+FAST_PATH_QUESTION_CUES = ("what", "which", "any", "do i have", "show", "list", "tell me",
+                           "quel", "quelle", "quels", "quelles", "ai-je", "est-ce que j'ai",
+                           "montre", "liste", "affiche")
+FAST_PATH_FREE_CUES = ("am i free", "am i available", "am i busy", "free time", "availability",
+                       "suis-je libre", "suis-je disponible", "est-ce que je suis libre")
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "lundi": 0, "mardi": 1, "mercredi": 2, "jeudi": 3, "vendredi": 4, "samedi": 5, "dimanche": 6,
+}
+
+# Part-of-day windows, clipped to the working hours by day_part_window.
+DAY_PARTS = {
+    "morning": (0, 12), "matin": (0, 12), "matinée": (0, 12),
+    "afternoon": (12, 18), "après-midi": (12, 18), "apres-midi": (12, 18),
+}
+
+
+def day_part_window(day_part):
+    """(start hour, end hour) the fast path answers for: the working hours
+    the free-time backend covers, narrowed to the part of the day if any.
+    Empty (start >= end) when the part of the day is outside them."""
+    start_hour, end_hour = WORKING_HOURS_START, WORKING_HOURS_END
+    if day_part:
+        part_start, part_end = DAY_PARTS[day_part]
+        start_hour, end_hour = max(start_hour, part_start), min(end_hour, part_end)
+    return start_hour, end_hour
+
+
+def extract_schedule_date(message: str):
+    """
+    Deterministic date slot for the fast path: ISO dates, today/tomorrow and
+    weekday names in English and French, falling back to
+    extract_date_from_message. Returns an ISO date string or None.
+    """
+    text = message.lower()
+    today = datetime.now().date()
+    match = re.search(r"\b(\d{4}-\d{2}-\d{2})\b", text)
+    if match:
+        try:
+            return datetime.fromisoformat(match.group(1)).date().isoformat()
+        except ValueError:
+            return None
+    if "day after tomorrow" in text or "après-demain" in text or "apres-demain" in text:
+        return (today + timedelta(days=2)).isoformat()
+    if re.search(r"\b(tomorrow|demain)\b", text):
+        return (today + timedelta(days=1)).isoformat()
+    if re.search(r"\b(today|tonight|aujourd'hui|ce soir)\b", text):
+        return today.isoformat()
+    words = re.findall(r"[\w'-]+", text)
+    for i, word in enumerate(words):
+        if word in WEEKDAYS:
+            days_ahead = (WEEKDAYS[word] - today.weekday()) % 7
+            is_next = (i > 0 and words[i - 1] in ("next", "prochain")) or (
+                i + 1 < len(words) and words[i + 1] in ("prochain", "prochaine"))
+            if is_next and days_ahead == 0:
+                days_ahead = 7
+            return (today + timedelta(days=days_ahead)).isoformat()
+    return extract_date_from_message(message)
+
+
+def detect_fast_path_intent(message: str):
+    """
+    Returns {"intent", "date", "day_part"} for a read-only schedule question
+    that can be answered without the LLM, or None when the message is a
+    write, a confirmation, mixes several topics or has no resolvable date.
+    """
+    text = message.lower().strip()
+    words = set(re.findall(r"[\w'-]+", text))
+    if len(text.split()) > FAST_PATH_MAX_WORDS or is_confirmation_message(message):
+        return None
+    if words & FAST_PATH_WRITE_WORDS:
+        return None
+    if "@" in text or words & FAST_PATH_GROUP_WORDS:
+        return None
+
+    mentions_meetings = bool(words & FAST_PATH_MEETING_WORDS)
+    mentions_tasks = bool(words & FAST_PATH_TASK_WORDS)
+    mentions_free = bool(words & FAST_PATH_FREE_WORDS) or any(cue in text for cue in FAST_PATH_FREE_CUES)
+    if mentions_meetings + mentions_tasks + mentions_free != 1:
+        return None
+
+    if mentions_free:
+        if not any(cue in text for cue in FAST_PATH_FREE_CUES):
+            return None
+        intent = "check_free"
+    else:
+        if not any(cue in text for cue in FAST_PATH_QUESTION_CUES):
+            return None
+        intent = "list_meetings" if mentions_meetings else "list_tasks"
+
+    day_part = next((part for part in DAY_PARTS if part in text), None)
+    if day_part is None and re.search(r"\b(evening|night|soir|soirée)\b", text) and intent == "check_free":
+        return None
+
+    date = extract_schedule_date(message)
+    if not date:
+        return None
+    return {"intent": intent, "date": date, "day_part": day_part}
+
+
+def describe_date(date: str) -> str:
+    day = datetime.fromisoformat(date).date()
+    today = datetime.now().date()
+    if day == today:
+        return f"today ({date})"
+    if day == today + timedelta(days=1):
+        return f"tomorrow ({date})"
+    return f"on {day.strftime('%A')}, {date}"
+
+
+def merge_free_slots(slots):
+    merged = []
+    for slot in slots:
+        if merged and slot["start"] <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], slot["end"])
+        else:
+            merged.append([slot["start"], slot["end"]])
+    return merged
+
+
+def answer_fast_path(intent: dict, user_id: int, db: Session) -> str:
+    date = intent["date"]
+    when = describe_date(date)
+
+    if intent["intent"] == "list_meetings":
+        meetings = get_meetings_on_date_backend(user_id, date, db)
+        if not meetings:
+            return f"You have no meetings {when}."
+        lines = [f"You have {len(meetings)} meeting(s) {when}:"]
+        for m in sorted(meetings, key=lambda m: m["start_time"]):
+            line = f"- {m['start_time'][11:16]} - {m['end_time'][11:16]}: {m['title']}"
+            if m["location"]:
+                line += f" ({m['location']})"
+            lines.append(line)
+        return "\n".join(lines)
+
+    if intent["intent"] == "list_tasks":
+        tasks = get_tasks_on_date_backend(user_id, date, db)
+        if not tasks:
+            return f"You have no tasks {when}."
+        lines = [f"You have {len(tasks)} task(s) {when}:"]
+        for t in sorted(tasks, key=lambda t: t["start_time"]):
+            end = f" - {t['end_time'][11:16]}" if t["end_time"] else ""
+            lines.append(f"- {t['start_time'][11:16]}{end}: {t['title']} ({t['priority']} priority)")
+        return "\n".join(lines)
+
+    start_hour, end_hour = day_part_window(intent["day_part"])
+    if intent["day_part"]:
+        when = f"{when} {intent['day_part']}"
+    if start_hour >= end_hour:
+        return f"{when[0].upper()}{when[1:]} is outside your working hours ({WORKING_HOURS_START:02d}:00 - {WORKING_HOURS_END:02d}:00)."
+    window_start = f"{date}T{start_hour:02d}:00:00"
+    window_end = f"{date}T{end_hour:02d}:00:00"
+    slots = [
+        slot for slot in get_free_time_backend(user_id, date, 30, db)["free_slots"]
+        if slot["start"] >= window_start and slot["end"] <= window_end
+    ]
+    free = merge_free_slots(slots)
+    if free == [[window_start, window_end]]:
+        return f"Yes, you are free {when} ({start_hour:02d}:00 - {end_hour:02d}:00)."
+    if not free:
+        return f"No, you are fully booked {when} ({start_hour:02d}:00 - {end_hour:02d}:00)."
+    lines = [f"You have some free time {when}:"]
+    lines += [f"- {start[11:16]} - {end[11:16]}" for start, end in free]
+    return "\n".join(lines)
+
+
+def try_fast_path(message: str, user_id: int, db: Session):
+    """
+    Answers the message without the LLM when the fast path is confident.
+    Stores the turn like the LLM path does and returns the reply, or None
+    to fall back to the LLM.
+    """
+    intent = detect_fast_path_intent(message)
+    if not intent:
+        increment("agent.fast_path_misses")
+        return None
+    try:
+        reply = answer_fast_path(intent, user_id, db)
+    except ValueError:
+        increment("agent.fast_path_misses")
+        return None
+    increment("agent.fast_path_hits")
+    increment(f"agent.fast_path_hits.{intent['intent']}")
+    save_assistant_reply(user_id, reply, db)
+    return reply
+
+
+TOOL_BACKENDS = {
+    "create_meeting": create_meeting_backend,
+    "get_free_time": get_free_time_backend,
+    "find_group_availability": find_group_availability_backend,
+    "get_meetings_on_date": get_meetings_on_date_backend,
+    "delete_meeting": delete_meeting_backend,
+    "update_meeting": update_meeting_backend,
+    "create_task": create_task_backend,
+    "get_tasks_on_date": get_tasks_on_date_backend,
+    "delete_task": delete_task_backend,
+    "update_task": update_task_backend,
+    "get_free_time_for_task": get_free_time_for_task_backend,
+    "auto_schedule_tasks": auto_schedule_tasks_backend,
+}
+
+
+def run_tool_call(name: str, args: dict, user_id: int, turn: dict, db: Session):
+    """
+    Normalizes the arguments of a single tool call, applies the past-time and
+    conflict checks for writes, and dispatches to the matching backend.
+    Returns the JSON-serializable result sent back to the model.
+    """
+    ctx_title_meeting = turn["ctx_title_meeting"]
+    ctx_date_meeting = turn["ctx_date_meeting"]
+    ctx_title_task = turn["ctx_title_task"]
+    ctx_date_task = turn["ctx_date_task"]
+
+    # Use correct context for meetings and tasks
+    if name in ["update_meeting", "delete_meeting"]:
+        if ("date" not in args or not args["date"]) and ctx_date_meeting:
+            args["date"] = ctx_date_meeting
+        if ("title" not in args or not args["title"]) and ctx_title_meeting:
+            args["title"] = ctx_title_meeting
+    if name in ["update_task", "delete_task"]:
+        if ("date" not in args or not args["date"]) and ctx_date_task:
+            args["date"] = ctx_date_task
+        if ("title" not in args or not args["title"]) and ctx_title_task:
+            args["title"] = ctx_title_task
+
+    if name in ["create_meeting", "update_meeting", "create_task", "update_task"]:
+        start = args.get("start_time") or args.get("new_start_time")
+        end = args.get("end_time") or args.get("new_end_time")
+        # Minute resolution, matching the relative base parse_datetime uses,
+        # so "now" is not mistaken for a time in the past.
+        now_dt = datetime.now().replace(second=0, microsecond=0)
+        start_dt = parse_datetime(start, now_dt) if start else None
+        end_dt = None
+        if start_dt and start_dt < now_dt:
+            # Instead of auto-rescheduling, prompt the user for confirmation
+            tomorrow_same_time = (now_dt + timedelta(days=1)).replace(
+                hour=start_dt.hour, minute=start_dt.minute, second=0, microsecond=0)
+            # Store pending intent for confirmation
+            if name in ["create_task", "update_task"]:
+                task_data = {
+                    "title": args.get("title", ctx_title_task),
+                    "description": args.get("description"),
+                    "start_time": tomorrow_same_time.isoformat(),
+                    "end_time": (tomorrow_same_time + timedelta(minutes=20)).isoformat(),
+                    "priority": args.get("priority")
+                }
+                set_pending_task(user_id, db, task_data)
+                return {
+                    "error": "The requested start time is in the past.",
+                    "suggestion": f"Would you like to schedule the task '{args.get('title', ctx_title_task)}' for tomorrow at {tomorrow_same_time.strftime('%H:%M')} instead?"
+                }
+            meeting_data = {
+                "title": args.get("title", ctx_title_meeting),
+                "description": args.get("description"),
+                "location": args.get("location"),
+                "start_time": tomorrow_same_time.isoformat(),
+                "end_time": (tomorrow_same_time + timedelta(minutes=20)).isoformat()
+            }
+            set_pending_meeting(user_id, db, meeting_data)
+            return {
+                "error": "The requested start time is in the past.",
+                "suggestion": f"Would you like to schedule the meeting '{args.get('title', ctx_title_meeting)}' for tomorrow at {tomorrow_same_time.strftime('%H:%M')} instead?"
+            }
+
+        if start_dt:
+            if not end:
+                end_dt = start_dt + timedelta(minutes=20)
+                if "end_time" in args:
+                    args["end_time"] = end_dt.isoformat()
+                if "new_end_time" in args:
+                    args["new_end_time"] = end_dt.isoformat()
+            else:
+                end_dt = parse_datetime(end, now_dt)
+                if not end_dt or end_dt <= start_dt:
+                    end_dt = start_dt + timedelta(minutes=20)
+                    if "end_time" in args:
+                        args["end_time"] = end_dt.isoformat()
+                    if "new_end_time" in args:
+                        args["new_end_time"] = end_dt.isoformat()
+        if start_dt and end_dt:
+            if name in ["create_meeting", "update_meeting"]:
+                if not is_time_slot_available(user_id, db, start_dt, end_dt, exclude_meeting_id=args.get("meeting_id")):
+                    duration = int(
+                        (end_dt - start_dt).total_seconds() // 60)
+                    meeting_data = {
+                        "title": args.get("title", ctx_title_meeting),
+                        "description": args.get("description"),
+                        "location": args.get("location"),
+                        "start_time": start_dt.isoformat(),
+                        "end_time": end_dt.isoformat()
+                    }
+                    alt = propose_alternative_slots(
+                        user_id, db, start_dt.date().isoformat(), duration, meeting_data)
+                    # Store as pending meeting
+                    set_pending_meeting(
+                        user_id, db, meeting_data)
+                    return {"error": "Time slot not available", "alternatives": alt}
+            elif name in ["create_task", "update_task"]:
+                if not is_task_time_slot_available(user_id, db, start_dt, end_dt, exclude_task_id=args.get("task_id")):
+                    duration = int(
+                        (end_dt - start_dt).total_seconds() // 60)
+                    task_data = {
+                        "title": args.get("title", ctx_title_task),
+                        "description": args.get("description"),
+                        "start_time": start_dt.isoformat(),
+                        "end_time": end_dt.isoformat(),
+                        "priority": args.get("priority")
+                    }
+                    alt = propose_alternative_slots(
+                        user_id, db, start_dt.date().isoformat(), duration, task_data)
+                    # Store as pending task
+                    set_pending_task(user_id, db, task_data)
+                    return {"error": "Time slot not available", "alternatives": alt}
+
+    if "start_time" in args:
+        start_raw = args["start_time"].lower()
+        parsed_start = parse_datetime(args["start_time"])
+        now = datetime.now()
+        if "tomorrow" in start_raw:
+            tomorrow = now + timedelta(days=1)
+            if parsed_start:
+                parsed_start = parsed_start.replace(
+                    year=tomorrow.year, month=tomorrow.month, day=tomorrow.day)
+        elif re.match(r"^\d{1,2}:\d{2}", start_raw) or re.match(r"^\d{1,2}(:\d{2})?\s*(am|pm)?$", start_raw):
+            if parsed_start:
+                if parsed_start < now:
+                    parsed_start = now + timedelta(days=1)
+                parsed_start = parsed_start.replace(
+                    year=now.year, month=now.month, day=now.day)
+        elif parsed_start and parsed_start < now:
+            parsed_start = now + timedelta(days=1)
+        args["start_time"] = parsed_start.isoformat(
+        ) if parsed_start else args["start_time"]
+
+    if "end_time" in args:
+        end_raw = args["end_time"].lower()
+        parsed_end = parse_datetime(args["end_time"])
+        now = datetime.now()
+        if "tomorrow" in end_raw:
+            tomorrow = now + timedelta(days=1)
+            if parsed_end:
+                parsed_end = parsed_end.replace(
+                    year=tomorrow.year, month=tomorrow.month, day=tomorrow.day)
+        elif re.match(r"^\d{1,2}:\d{2}", end_raw) or re.match(r"^\d{1,2}(:\d{2})?\s*(am|pm)?$", end_raw):
+            if parsed_end:
+                if parsed_end < now:
+                    parsed_end = now + timedelta(days=1)
+                parsed_end = parsed_end.replace(
+                    year=now.year, month=now.month, day=now.day)
+        elif parsed_end and parsed_end < now:
+            parsed_end = now + timedelta(days=1)
+        args["end_time"] = parsed_end.isoformat(
+        ) if parsed_end else args["end_time"]
+
+    if "date" in args:
+        parsed_date = parse_datetime(args["date"])
+        args["date"] = parsed_date.date().isoformat(
+        ) if parsed_date else args["date"]
+
+    backend = TOOL_BACKENDS.get(name)
+    if not backend:
+        return {"error": f"Unknown function: {name}"}
+    return backend(user_id=user_id, db=db, **args)
+
+
+# Tools that never write; a batch of these can run concurrently, each on its
+# own session. Everything else runs in model order on the request session.
+READ_ONLY_TOOLS = {
+    "get_free_time",
+    "find_group_availability",
+    "get_meetings_on_date",
+    "get_tasks_on_date",
+    "get_free_time_for_task",
+}
+
+
+def run_isolated_tool_call(name: str, args: dict, user_id: int, turn: dict):
+    db = SessionLocal()
+    try:
+        return run_tool_call(name, args, user_id, turn, db)
+    finally:
+        db.close()
+
+
+async def execute_tool_call(tool_call, user_id: int, turn: dict, db: Session, isolated: bool = False):
+    name = tool_call.function.name
+    args = json.loads(tool_call.function.arguments)
+    # Backends use the blocking SQLAlchemy session and date parsing, keep
+    # them off the event loop.
+    if isolated:
+        result = await run_in_threadpool(run_isolated_tool_call, name, args, user_id, turn)
+    else:
+        result = await run_in_threadpool(run_tool_call, name, args, user_id, turn, db)
+    return {
+        "role": "tool",
+        "tool_call_id": tool_call.id,
+        "name": name,
+        "content": json.dumps(result)
+    }
+
+
+def plan_tool_batches(tool_calls):
+    """
+    Splits the tool calls of one assistant turn into ordered batches: runs of
+    consecutive read-only calls are grouped together, and every write call
+    is a batch of its own so writes keep their order and later reads see them.
+    """
+    batches = []
+    for tool_call in tool_calls:
+        if tool_call.function.name in READ_ONLY_TOOLS and batches and batches[-1][0].function.name in READ_ONLY_TOOLS:
+            batches[-1].append(tool_call)
+        else:
+            batches.append([tool_call])
+    return batches
+
+
+async def execute_tool_batch(batch, user_id: int, turn: dict, db: Session):
+    # Isolated sessions cannot see this turn's uncommitted writes, so once the
+    # turn has changed the calendar its reads stay on the request session.
+    if len(batch) == 1 or has_uncommitted_calendar_writes(db):
+        return [await execute_tool_call(tool_call, user_id, turn, db) for tool_call in batch]
+    # gather keeps the input order, so every output stays next to its
+    # tool_call_id in the conversation.
+    return await asyncio.gather(*(
+        execute_tool_call(tool_call, user_id, turn, db, isolated=True) for tool_call in batch
+    ))
+
+
+async def run_tool_calls(tool_calls, user_id: int, turn: dict, db: Session):
+    tool_outputs = []
+    for batch in plan_tool_batches(tool_calls):
+        tool_outputs.extend(await execute_tool_batch(batch, user_id, turn, db))
+    return tool_outputs
+
+
+DEGRADED_REPLY = "Sorry, the assistant is temporarily unavailable. Please try again in a moment."
+
+
+def degraded_reply(error: Exception) -> str:
+    increment("agent.degraded_replies")
+    if isinstance(error, LLMUnavailableError) and error.reason == "deadline":
+        increment("agent.deadline_exceeded")
+    return DEGRADED_REPLY
+
+
+TOOLS_FINGERPRINT = schema_fingerprint(tools)
+
+
+def completion_cache_key(message: str, user_id: int, turn: dict):
+    """
+    Cache key for the reply to `message`, or None when the turn must not be
+    cached. The calendar version changes with every meeting/task write, so
+    a cached answer never outlives the data it was computed from.
+    """
+    if is_confirmation_message(message):
+        return None
+    return completion_cache.make_key(
+        user_id,
+        normalize_message(message),
+        GPT_MODEL,
+        TOOLS_FINGERPRINT,
+        datetime.now().date().isoformat(),
+        turn["calendar_version"],
+        turn["ctx_title_meeting"],
+        turn["ctx_date_meeting"],
+        turn["ctx_title_task"],
+        turn["ctx_date_task"],
+    )
+
+
+def is_read_only_round(tool_calls) -> bool:
+    return all(tool_call.function.name in READ_ONLY_TOOLS for tool_call in tool_calls)
+
+
+def tool_choice_for_round(round_number: int) -> str:
+    # The last allowed round forbids further tool calls so a looping model
+    # still ends with a text answer built from the results gathered so far.
+    if round_number < AGENT_MAX_TOOL_ROUNDS:
+        return "auto"
+    increment("agent.tool_rounds_capped")
+    return "none"
+
+
+def capped_reply(reply) -> str:
+    """Reply for a turn whose model still called tools in the last round,
+    despite tool_choice="none": whatever text came with the calls."""
+    increment("agent.tool_rounds_exhausted")
+    return reply.content or DEGRADED_REPLY
+
+
+async def run_agent_turn(message: str, user_id: int, db: Session) -> str:
+    """
+    One chat turn. Its writes are committed in steps, before each LLM call
+    (see commit_turn_step): the user message and context, then each round
+    of tool calls, then the assistant reply with save_assistant_reply.
+    """
+    from openai.types.chat import ChatCompletionMessage
+
+    turn = await run_in_threadpool(prepare_agent_turn, message, user_id, db)
+    fast_reply = await run_in_threadpool(try_fast_path, message, user_id, db)
+    if fast_reply:
+        return fast_reply
+    messages = turn["messages"]
+
+    cache_key = completion_cache_key(message, user_id, turn)
+    cached = completion_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        await run_in_threadpool(save_assistant_reply, user_id, cached, db)
+        return cached
+    cacheable = cache_key is not None
+
+    await run_in_threadpool(commit_turn_step, db)
+    deadline = llm.deadline()
+    for round_number in range(AGENT_MAX_TOOL_ROUNDS + 1):
+        try:
+            response = await llm.create(
+                deadline,
+                model=GPT_MODEL,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice_for_round(round_number)
+            )
+        except LLMUnavailableError as e:
+            content = degraded_reply(e)
+            cacheable = False
+            break
 
         reply: ChatCompletionMessage = response.choices[0].message
         messages.append(reply)
 
         if not reply.tool_calls:
-            user_message = message.lower()
-            if any(kw in user_message for kw in confirmation_words):
-                pending_meeting = get_pending_meeting(current_user.id, db)
-                pending_task = get_pending_task(current_user.id, db)
-                # --- Fix: Only check for task slot conflicts when confirming a task ---
-                if pending_task and "start_time" in pending_task and "end_time" in pending_task:
-                    start_dt = datetime.fromisoformat(
-                        pending_task["start_time"])
-                    end_dt = datetime.fromisoformat(pending_task["end_time"])
-                    if is_task_time_slot_available(current_user.id, db, start_dt, end_dt):
-                        result = create_task_backend(
-                            user_id=current_user.id,
-                            title=pending_task.get(
-                                "title", ctx_title_task or "Untitled Task"),
-                            start_time=pending_task["start_time"],
-                            end_time=pending_task["end_time"],
-                            description=pending_task.get("description"),
-                            priority=pending_task.get("priority"),
-                            db=db
-                        )
-                        clear_pending_task(current_user.id, db)
-                        db.add(ChatMessage(user_id=current_user.id, role="assistant",
-                               content=f"The task '{pending_task.get('title', ctx_title_task or 'Untitled Task')}' has been scheduled for {pending_task['start_time']} to {pending_task['end_time']}!"))
-                        db.commit()
-                        return {"reply": f"The task '{pending_task.get('title', ctx_title_task or 'Untitled Task')}' has been scheduled for {pending_task['start_time']} to {pending_task['end_time']}!"}
-                    else:
-                        # Suggest alternative task slots
-                        duration = int(
-                            (end_dt - start_dt).total_seconds() // 60)
-                        alt = get_free_time_for_task_backend(
-                            current_user.id, start_dt.date().isoformat(), duration, db)["free_slots"]
-                        alt_str = "\n".join([
-                            f"- {slot['start'][11:16]} - {slot['end'][11:16]}" for slot in alt
-                        ]) if alt else "No available slots."
-                        db.add(ChatMessage(user_id=current_user.id, role="assistant",
-                               content=f"The time you requested for the task '{pending_task.get('title', ctx_title_task or 'Untitled Task')}' is not available. Here are some available slots for your task:\n{alt_str}"))
-                        db.commit()
-                        return {"reply": f"The time you requested for the task '{pending_task.get('title', ctx_title_task or 'Untitled Task')}' is not available. Here are some available slots for your task:\n{alt_str}"}
-                elif pending_meeting and "proposed_start" in pending_meeting and "proposed_end" in pending_meeting:
-                    start_dt = datetime.fromisoformat(
-                        pending_meeting["proposed_start"])
-                    end_dt = datetime.fromisoformat(
-                        pending_meeting["proposed_end"])
-                    if is_time_slot_available(current_user.id, db, start_dt, end_dt):
-                        result = create_meeting_backend(
-                            user_id=current_user.id,
-                            title=pending_meeting.get(
-                                "title", ctx_title_meeting or "Untitled Meeting"),
-                            start_time=pending_meeting["proposed_start"],
-                            end_time=pending_meeting["proposed_end"],
-                            location=pending_meeting.get("location"),
-                            description=pending_meeting.get("description"),
-                            db=db
-                        )
-                        clear_pending_meeting(current_user.id, db)
-                        db.add(ChatMessage(user_id=current_user.id, role="assistant",
-                               content=f"The meeting '{pending_meeting.get('title', ctx_title_meeting or 'Untitled Meeting')}' has been scheduled for {pending_meeting['proposed_start']} to {pending_meeting['proposed_end']}!"))
-                        db.commit()
-                        return {"reply": f"The meeting '{pending_meeting.get('title', ctx_title_meeting or 'Untitled Meeting')}' has been scheduled for {pending_meeting['proposed_start']} to {pending_meeting['proposed_end']}!"}
-                    else:
-                        # Suggest alternative meeting slots
-                        duration = int(
-                            (end_dt - start_dt).total_seconds() // 60)
-                        alt = get_free_time_backend(
-                            current_user.id, start_dt.date().isoformat(), duration, db)["free_slots"]
-                        alt_str = "\n".join([
-                            f"- {slot['start'][11:16]} - {slot['end'][11:16]}" for slot in alt
-                        ]) if alt else "No available slots."
-                        db.add(ChatMessage(user_id=current_user.id, role="assistant",
-                               content=f"The time you requested for the meeting '{pending_meeting.get('title', ctx_title_meeting or 'Untitled Meeting')}' is not available. Here are some available slots for your meeting:\n{alt_str}"))
-                        db.commit()
-                        return {"reply": f"The time you requested for the meeting '{pending_meeting.get('title', ctx_title_meeting or 'Untitled Meeting')}' is not available. Here are some available slots for your meeting:\n{alt_str}"}
-            db.add(ChatMessage(user_id=current_user.id,
-                   role="assistant", content=reply.content))
-            db.commit()
-            return {"reply": reply.content}
-
-        tool_outputs = []
-        for tool_call in reply.tool_calls:
-            name = tool_call.function.name
-            args = json.loads(tool_call.function.arguments)
-
-            # Use correct context for meetings and tasks
-            if name in ["update_meeting", "delete_meeting"]:
-                if ("date" not in args or not args["date"]) and ctx_date_meeting:
-                    args["date"] = ctx_date_meeting
-                if ("title" not in args or not args["title"]) and ctx_title_meeting:
-                    args["title"] = ctx_title_meeting
-            if name in ["update_task", "delete_task"]:
-                if ("date" not in args or not args["date"]) and ctx_date_task:
-                    args["date"] = ctx_date_task
-                if ("title" not in args or not args["title"]) and ctx_title_task:
-                    args["title"] = ctx_title_task
-
-            if name in ["create_meeting", "update_meeting", "create_task", "update_task"]:
-                start = args.get("start_time") or args.get("new_start_time")
-                end = args.get("end_time") or args.get("new_end_time")
-                now_dt = datetime.now()
-                start_dt = dateparser.parse(
-                    start, settings={"RELATIVE_BASE": now_dt}) if start else None
-                if start_dt and start_dt < now_dt:
-                    # Instead of auto-rescheduling, prompt the user for confirmation
-                    tomorrow_same_time = (now_dt + timedelta(days=1)).replace(
-                        hour=start_dt.hour, minute=start_dt.minute, second=0, microsecond=0)
-                    # Store pending intent for confirmation
-                    if name in ["create_task", "update_task"]:
-                        task_data = {
-                            "title": args.get("title", ctx_title_task),
-                            "description": args.get("description"),
-                            "start_time": tomorrow_same_time.isoformat(),
-                            "end_time": (tomorrow_same_time + timedelta(minutes=20)).isoformat(),
-                            "priority": args.get("priority")
-                        }
-                        set_pending_task(current_user.id, db, task_data)
-                        tool_outputs.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": name,
-                            "content": json.dumps({
-                                "error": "The requested start time is in the past.",
-                                "suggestion": f"Would you like to schedule the task '{args.get('title', ctx_title_task)}' for tomorrow at {tomorrow_same_time.strftime('%H:%M')} instead?"
-                            })
-                        })
-                        continue
-                    elif name in ["create_meeting", "update_meeting"]:
-                        meeting_data = {
-                            "title": args.get("title", ctx_title_meeting),
-                            "description": args.get("description"),
-                            "location": args.get("location"),
-                            "start_time": tomorrow_same_time.isoformat(),
-                            "end_time": (tomorrow_same_time + timedelta(minutes=20)).isoformat()
-                        }
-                        set_pending_meeting(current_user.id, db, meeting_data)
-                        tool_outputs.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": name,
-                            "content": json.dumps({
-                                "error": "The requested start time is in the past.",
-                                "suggestion": f"Would you like to schedule the meeting '{args.get('title', ctx_title_meeting)}' for tomorrow at {tomorrow_same_time.strftime('%H:%M')} instead?"
-                            })
-                        })
-                        continue
+            content = reply.content
+            if is_confirmation_message(message):
+                confirmed = await run_in_threadpool(resolve_pending_confirmation, user_id, turn, db)
+                if confirmed:
+                    content = confirmed
+            break
 
-                if start_dt:
-                    if not end:
-                        end_dt = start_dt + timedelta(minutes=20)
-                        if "end_time" in args:
-                            args["end_time"] = end_dt.isoformat()
-                        if "new_end_time" in args:
-                            args["new_end_time"] = end_dt.isoformat()
-                    else:
-                        end_dt = dateparser.parse(
-                            end, settings={"RELATIVE_BASE": now_dt})
-                        if not end_dt or end_dt <= start_dt:
-                            end_dt = start_dt + timedelta(minutes=20)
-                            if "end_time" in args:
-                                args["end_time"] = end_dt.isoformat()
-                            if "new_end_time" in args:
-                                args["new_end_time"] = end_dt.isoformat()
-                if start_dt and end_dt:
-                    if name in ["create_meeting", "update_meeting"]:
-                        if not is_time_slot_available(current_user.id, db, start_dt, end_dt, exclude_meeting_id=args.get("meeting_id")):
-                            duration = int(
-                                (end_dt - start_dt).total_seconds() // 60)
-                            meeting_data = {
-                                "title": args.get("title", ctx_title_meeting),
-                                "description": args.get("description"),
-                                "location": args.get("location"),
-                                "start_time": start_dt.isoformat(),
-                                "end_time": end_dt.isoformat()
-                            }
-                            alt = propose_alternative_slots(
-                                current_user.id, db, start_dt.date().isoformat(), duration, meeting_data)
-                            tool_outputs.append({
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "name": name,
-                                "content": json.dumps({"error": "Time slot not available", "alternatives": alt})
-                            })
-                            # Store as pending meeting
-                            set_pending_meeting(
-                                current_user.id, db, meeting_data)
-                            continue
-                    elif name in ["create_task", "update_task"]:
-                        if not is_task_time_slot_available(current_user.id, db, start_dt, end_dt, exclude_task_id=args.get("task_id")):
-                            duration = int(
-                                (end_dt - start_dt).total_seconds() // 60)
-                            task_data = {
-                                "title": args.get("title", ctx_title_task),
-                                "description": args.get("description"),
-                                "start_time": start_dt.isoformat(),
-                                "end_time": end_dt.isoformat(),
-                                "priority": args.get("priority")
-                            }
-                            alt = propose_alternative_slots(
-                                current_user.id, db, start_dt.date().isoformat(), duration, task_data)
-                            tool_outputs.append({
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "name": name,
-                                "content": json.dumps({"error": "Time slot not available", "alternatives": alt})
-                            })
-                            # Store as pending task
-                            set_pending_task(current_user.id, db, task_data)
-                            continue
-
-            if "start_time" in args:
-                start_raw = args["start_time"].lower()
-                parsed_start = dateparser.parse(args["start_time"], settings={
-                                                "RELATIVE_BASE": datetime.now()})
-                now = datetime.now()
-                if "tomorrow" in start_raw:
-                    tomorrow = now + timedelta(days=1)
-                    if parsed_start:
-                        parsed_start = parsed_start.replace(
-                            year=tomorrow.year, month=tomorrow.month, day=tomorrow.day)
-                elif re.match(r"^\d{1,2}:\d{2}", start_raw) or re.match(r"^\d{1,2}(:\d{2})?\s*(am|pm)?$", start_raw):
-                    if parsed_start:
-                        if parsed_start < now:
-                            parsed_start = now + timedelta(days=1)
-                        parsed_start = parsed_start.replace(
-                            year=now.year, month=now.month, day=now.day)
-                elif parsed_start and parsed_start < now:
-                    parsed_start = now + timedelta(days=1)
-                args["start_time"] = parsed_start.isoformat(
-                ) if parsed_start else args["start_time"]
-
-            if "end_time" in args:
-                end_raw = args["end_time"].lower()
-                parsed_end = dateparser.parse(args["end_time"], settings={
-                                              "RELATIVE_BASE": datetime.now()})
-                now = datetime.now()
-                if "tomorrow" in end_raw:
-                    tomorrow = now + timedelta(days=1)
-                    if parsed_end:
-                        parsed_end = parsed_end.replace(
-                            year=tomorrow.year, month=tomorrow.month, day=tomorrow.day)
-                elif re.match(r"^\d{1,2}:\d{2}", end_raw) or re.match(r"^\d{1,2}(:\d{2})?\s*(am|pm)?$", end_raw):
-                    if parsed_end:
-                        if parsed_end < now:
-                            parsed_end = now + timedelta(days=1)
-                        parsed_end = parsed_end.replace(
-                            year=now.year, month=now.month, day=now.day)
-                elif parsed_end and parsed_end < now:
-                    parsed_end = now + timedelta(days=1)
-                args["end_time"] = parsed_end.isoformat(
-                ) if parsed_end else args["end_time"]
-
-            if "date" in args:
-                parsed_date = dateparser.parse(args["date"], settings={
-                                               "RELATIVE_BASE": datetime.now()})
-                args["date"] = parsed_date.date().isoformat(
-                ) if parsed_date else args["date"]
-
-            if name == "create_meeting":
-                result = create_meeting_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "get_free_time":
-                result = get_free_time_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "get_meetings_on_date":
-                result = get_meetings_on_date_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "delete_meeting":
-                result = delete_meeting_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "update_meeting":
-                result = update_meeting_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "create_task":
-                result = create_task_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "get_tasks_on_date":
-                result = get_tasks_on_date_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "delete_task":
-                result = delete_task_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "update_task":
-                result = update_task_backend(
-                    user_id=current_user.id, db=db, **args)
-            elif name == "get_free_time_for_task":
-                result = get_free_time_for_task_backend(
-                    user_id=current_user.id, db=db, **args)
-            else:
-                result = {"error": f"Unknown function: {name}"}
+        cacheable = cacheable and is_read_only_round(reply.tool_calls)
+        messages.extend(await run_tool_calls(reply.tool_calls, user_id, turn, db))
+        await run_in_threadpool(commit_turn_step, db)
+    else:
+        content = capped_reply(reply)
+        cacheable = False
+
+    if cacheable and content:
+        completion_cache.set(cache_key, content)
+    await run_in_threadpool(save_assistant_reply, user_id, content, db)
+    return content
 
-            tool_outputs.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "name": name,
-                "content": json.dumps(result)
-            })
 
-        messages.extend(tool_outputs)
+@router.post("/chat")
+async def chat_with_agent(message: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Check if the message is relevant to time management
+    if not is_relevant_query(message):
+        return {"reply": IRRELEVANT_REPLY}
+
+    try:
+        content = await run_agent_turn(message, current_user.id, db)
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        raise
+    return {"reply": content}
+
+
+@router.get("/metrics")
+def get_agent_metrics(current_user: User = Depends(get_current_user)):
+    counters = get_counters()
+    fast_path_total = counters.get("agent.fast_path_hits", 0) + counters.get("agent.fast_path_misses", 0)
+    return {
+        "counters": counters,
+        "llm_circuit": llm.breaker.state,
+        "completion_cache_entries": len(completion_cache),
+        "fast_path_hit_rate": counters.get("agent.fast_path_hits", 0) / fast_path_total if fast_path_total else None,
+    }
+
+
+def accumulate_tool_call_deltas(pending: dict, deltas):
+    """
+    Merges streamed tool call fragments into `pending`, keyed by the index
+    the API assigns to each call within the assistant turn.
+    """
+    for delta in deltas:
+        call = pending.setdefault(
+            delta.index, {"id": None, "name": "", "arguments": ""})
+        if delta.id:
+            call["id"] = delta.id
+        if delta.function:
+            if delta.function.name:
+                call["name"] += delta.function.name
+            if delta.function.arguments:
+                call["arguments"] += delta.function.arguments
+
+
+def build_streamed_message(content: str, pending: dict):
+    from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
+
+    tool_calls = [
+        ChatCompletionMessageToolCall(
+            id=call["id"],
+            type="function",
+            function={"name": call["name"], "arguments": call["arguments"]},
+        )
+        for _, call in sorted(pending.items())
+    ]
+    return ChatCompletionMessage(role="assistant", content=content or None, tool_calls=tool_calls or None)
+
+
+async def stream_agent_events(message: str, user_id: int):
+    """
+    Async generator behind /agent/chat/stream. Emits `tool_call_started`
+    and `tool_call_finished` around every tool execution, `token` events
+    for the final assistant message and a closing `done` event once the
+    reply has been persisted.
+    """
+    if not is_relevant_query(message):
+        yield sse_event("token", {"content": IRRELEVANT_REPLY})
+        yield sse_event("done", {"reply": IRRELEVANT_REPLY})
+        return
+
+    # Dependencies with yield are torn down before a streaming body is sent,
+    # so the stream owns its session.
+    db = SessionLocal()
+    try:
+        turn = await run_in_threadpool(prepare_agent_turn, message, user_id, db)
+        fast_reply = await run_in_threadpool(try_fast_path, message, user_id, db)
+        if fast_reply:
+            yield sse_event("token", {"content": fast_reply})
+            yield sse_event("done", {"reply": fast_reply})
+            return
+        messages = turn["messages"]
+
+        cache_key = completion_cache_key(message, user_id, turn)
+        cached = completion_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            await run_in_threadpool(save_assistant_reply, user_id, cached, db)
+            yield sse_event("token", {"content": cached})
+            yield sse_event("done", {"reply": cached})
+            return
+        cacheable = cache_key is not None
+        # A confirmation may replace the model's text with the outcome of the
+        # pending proposal, so those replies are only sent once resolved.
+        stream_tokens = not is_confirmation_message(message)
+
+        await run_in_threadpool(commit_turn_step, db)
+        deadline = llm.deadline()
+        for round_number in range(AGENT_MAX_TOOL_ROUNDS + 1):
+            content_parts = []
+            pending_calls = {}
+            try:
+                async for chunk in llm.stream(
+                    deadline,
+                    model=GPT_MODEL,
+                    messages=messages,
+                    tools=tools,
+                    tool_choice=tool_choice_for_round(round_number),
+                ):
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.tool_calls:
+                        accumulate_tool_call_deltas(pending_calls, delta.tool_calls)
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        if stream_tokens:
+                            yield sse_event("token", {"content": delta.content})
+            except (LLMUnavailableError, openai.APIError) as e:
+                content = degraded_reply(e)
+                cacheable = False
+                yield sse_event("token", {"content": content})
+                break
+
+            reply = build_streamed_message("".join(content_parts), pending_calls)
+            messages.append(reply)
+
+            if not reply.tool_calls:
+                content = reply.content
+                if not stream_tokens:
+                    confirmed = await run_in_threadpool(resolve_pending_confirmation, user_id, turn, db)
+                    if confirmed:
+                        content = confirmed
+                    yield sse_event("token", {"content": content})
+                break
+
+            cacheable = cacheable and is_read_only_round(reply.tool_calls)
+            for batch in plan_tool_batches(reply.tool_calls):
+                for tool_call in batch:
+                    yield sse_event("tool_call_started", {"id": tool_call.id, "name": tool_call.function.name})
+                outputs = await execute_tool_batch(batch, user_id, turn, db)
+                messages.extend(outputs)
+                for output in outputs:
+                    yield sse_event("tool_call_finished", {"id": output["tool_call_id"], "name": output["name"], "result": json.loads(output["content"])})
+            await run_in_threadpool(commit_turn_step, db)
+        else:
+            content = capped_reply(reply)
+            cacheable = False
+            if not (stream_tokens and reply.content):
+                yield sse_event("token", {"content": content})
+
+        if cacheable and content:
+            completion_cache.set(cache_key, content)
+        await run_in_threadpool(save_assistant_reply, user_id, content, db)
+        yield sse_event("done", {"reply": content})
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        raise
+    finally:
+        db.close()
+
+
+@router.post("/chat/stream")
+async def chat_with_agent_stream(message: str, current_user: User = Depends(get_current_user)):
+    return StreamingResponse(
+        stream_agent_events(message, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -6,17 +6,28 @@ from app.schemas.user import UserCreate, UserLogin
 from app.models.user import User
 from app.database import get_db
 from sqlalchemy import or_
-from app.auth.auth_handler import get_password_hash, verify_password, create_access_token
+from fastapi.concurrency import run_in_threadpool
+from app.auth.auth_handler import create_access_token
+from app.auth.password_pool import PasswordHasherBusy, password_hasher
 
 router = APIRouter()
 
+def too_busy():
+    # The password pool's queue is full; see app/auth/password_pool.py.
+    return HTTPException(status_code=503, detail="Too many logins at once, try again shortly", headers={"Retry-After": "1"})
+
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    # Async so that the hash, done in the password pool, holds no thread;
+    # the queries still run on the threadpool.
+    existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == user.email).first())
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered.")
     
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise too_busy()
     unique_username = f"user_{uuid.uuid4().hex[:8]}"
     new_user = User(
         email=user.email,
@@ -25,8 +36,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(db.commit)
     return {"message": "User created successfully"}
 
 # @router.post("/login")
@@ -39,16 +49,27 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 #     return {"access_token": token, "token_type": "bearer"}
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Assuming email is used as "username" for login
     # db_user = db.query(User).filter(User.email == form_data.username).first()
     # db_user = db.query(User).filter((User.email == form_data.username) | (User.username == form_data.username)).first()
-    db_user = db.query(User).filter(
+    db_user = await run_in_threadpool(lambda: db.query(User).filter(
         or_(User.email == form_data.username, User.username == form_data.username)
-    ).first()
-    
-    if not db_user or not verify_password(form_data.password, db_user.hashed_password):
+    ).first())
+
+    verified, new_hash = False, None
+    if db_user:
+        try:
+            verified, new_hash = await password_hasher.verify_and_update(form_data.password, db_user.hashed_password)
+        except PasswordHasherBusy:
+            raise too_busy()
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    user_id = db_user.id
+    if new_hash:
+        # Made with other bcrypt parameters than the current ones.
+        db_user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
 
-    token = create_access_token({"sub": str(db_user.id)})
+    token = create_access_token({"sub": str(user_id)})
     return {"access_token": token, "token_type": "bearer"}
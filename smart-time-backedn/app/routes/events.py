@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from app.auth.auth_bearer import user_from_token
+from app.services.events import stream_events
+
+router = APIRouter()
+
+# EventSource cannot send headers, so the token may also come as ?token=.
+optional_bearer = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+@router.get("/stream")
+async def calendar_event_stream(request: Request, token: Optional[str] = None, bearer: Optional[str] = Depends(optional_bearer)):
+    # Server-sent events for every create, update and delete of the user's
+    # meetings and tasks, whichever client or agent turn made it.
+    if not (bearer or token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user = await run_in_threadpool(user_from_token, bearer or token)
+    return StreamingResponse(
+        stream_events(user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,29 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from app.schemas import meeting as schemas
 from app.models import meeting as models
 from app.database import get_db
 from app.auth.auth_bearer import get_current_user
 from app.models.user import User
+from app.services.availability import fetch_busy_intervals, merge_sorted_intervals
+from app.services.recurrence import normalize_rule, set_occurrence_exception, Occurrence
+from app.services.pagination import decode_cursor, paginate
+from app.services.bulk import BulkValidationError, bulk_write
+from app.services.conditional import collection_validators, is_not_modified, not_modified, set_validators
+from app.services.group_availability import resolve_participants, find_common_slots
+from app.config import FREEBUSY_MAX_DAYS, GROUP_AVAILABILITY_MAX_USERS, GROUP_AVAILABILITY_MAX_DAYS, LIST_PAGE_SIZE_DEFAULT, LIST_PAGE_SIZE_MAX, BULK_MAX_ITEMS
 
 router = APIRouter()
 
+def validate_rule(rule):
+    try:
+        return normalize_rule(rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=schemas.MeetingOut)
 def create_meeting(meeting: schemas.MeetingCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_meeting = models.Meeting(**meeting.dict(), user_id=current_user.id)
+    data = meeting.dict()
+    data["recurrence_rule"] = validate_rule(data["recurrence_rule"])
+    db_meeting = models.Meeting(**data, user_id=current_user.id)
     db.add(db_meeting)
     db.commit()
     db.refresh(db_meeting)
     return db_meeting
 
+@router.post("/bulk", response_model=schemas.BulkOut)
+def bulk_meetings(request: schemas.MeetingBulkRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Creates, updates and deletes many meetings in one transaction. Nothing is
+    # written if any item is invalid; the 400 lists every rejected item.
+    if len(request.create) + len(request.update) + len(request.delete) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    try:
+        result = bulk_write(
+            db, models.Meeting, current_user.id,
+            [item.dict() for item in request.create],
+            [item.dict(exclude_unset=True) for item in request.update],
+            request.delete,
+        )
+    except BulkValidationError as e:
+        raise HTTPException(status_code=400, detail=e.errors)
+    db.commit()
+    return result
+
 # @router.get("/", response_model=list[schemas.MeetingOut])
 # def get_meetings(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
 #     return db.query(models.Meeting).filter(models.Meeting.user_id == current_user.id).all()
 @router.get("/", response_model=list[schemas.MeetingOut])
-def get_meetings(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(models.Meeting).filter(
-        models.Meeting.user_id == current_user.id
-    ).order_by(models.Meeting.start_time.desc()).all()
+def get_meetings(request: Request, response: Response, start: Optional[datetime] = Query(None, alias="from"), end: Optional[datetime] = Query(None, alias="to"), cursor: Optional[str] = None, limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, le=LIST_PAGE_SIZE_MAX), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Newest first, one page at a time; the next page's cursor is returned in
+    # the X-Next-Cursor header. With a window, recurring meetings are
+    # expanded into their occurrences in it; without one, each series is
+    # listed once.
+    window = None
+    if start or end:
+        if not (start and end) or end <= start:
+            raise HTTPException(status_code=400, detail="'from' and 'to' must both be given, with 'to' after 'from'")
+        window = (start, end)
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Answer polls from the calendar version alone while nothing changed.
+    etag, last_modified = collection_validators(db, current_user.id, request)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    query = db.query(models.Meeting).filter(models.Meeting.user_id == current_user.id)
+    meetings, next_cursor = paginate(db, models.Meeting, query, current_user.id, position, limit, window)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return meetings
+
+@router.get("/freebusy", response_model=schemas.FreeBusyOut)
+def get_freebusy(start: datetime = Query(..., alias="from"), end: datetime = Query(..., alias="to"), include_tasks: bool = True, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > timedelta(days=FREEBUSY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {FREEBUSY_MAX_DAYS} days")
+    sources = ("meetings", "tasks") if include_tasks else ("meetings",)
+    intervals = fetch_busy_intervals(db, current_user.id, start, end, sources)
+    busy = [{"start": s, "end": e} for s, e in merge_sorted_intervals(intervals, start, end)]
+    return {"start": start, "end": end, "busy": busy}
+
+@router.post("/group-availability", response_model=schemas.GroupAvailabilityOut)
+def get_group_availability(request: schemas.GroupAvailabilityRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if request.end <= request.start:
+        raise HTTPException(status_code=400, detail="'end' must be after 'start'")
+    if request.end - request.start > timedelta(days=GROUP_AVAILABILITY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {GROUP_AVAILABILITY_MAX_DAYS} days")
+    if request.duration_minutes <= 0:
+        raise HTTPException(status_code=400, detail="duration_minutes must be positive")
+    # Only users who shared their calendar with the caller can be searched;
+    # the same 404 covers addresses without an account.
+    user_ids, missing = resolve_participants(db, request.participants, current_user.id)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No shared calendar for: {', '.join(missing)}")
+    if len(user_ids) > GROUP_AVAILABILITY_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {GROUP_AVAILABILITY_MAX_USERS} participants are supported")
+    sources = ("meetings", "tasks") if request.include_tasks else ("meetings",)
+    slots = find_common_slots(db, user_ids, request.start, request.end, request.duration_minutes, limit=request.limit, working_hours_only=request.working_hours_only, sources=sources)
+    return {"participant_ids": user_ids, "slots": [{"start": s, "end": e} for s, e in slots]}
 
 @router.get("/{meeting_id}", response_model=schemas.MeetingOut)
 def get_meeting(meeting_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -37,12 +122,43 @@ def update_meeting(meeting_id: int, update: schemas.MeetingUpdate, db: Session =
     meeting = db.query(models.Meeting).filter(models.Meeting.id == meeting_id, models.Meeting.user_id == current_user.id).first()
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    for key, value in update.dict(exclude_unset=True).items():
+    data = update.dict(exclude_unset=True)
+    if "recurrence_rule" in data:
+        data["recurrence_rule"] = validate_rule(data["recurrence_rule"])
+    for key, value in data.items():
         setattr(meeting, key, value)
     db.commit()
     db.refresh(meeting)
     return meeting
 
+@router.put("/{meeting_id}/occurrences/{occurrence_start}", response_model=schemas.MeetingOut)
+def update_occurrence(meeting_id: int, occurrence_start: datetime, update: schemas.OccurrenceUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    meeting = db.query(models.Meeting).filter(models.Meeting.id == meeting_id, models.Meeting.user_id == current_user.id).first()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    try:
+        exc = set_occurrence_exception(db, models.Meeting, meeting, occurrence_start, **update.dict())
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    duration = meeting.end_time - meeting.start_time
+    start = exc.start_time or exc.original_start
+    return Occurrence(meeting, exc.original_start, start, exc.end_time or start + duration, exc.title)
+
+@router.delete("/{meeting_id}/occurrences/{occurrence_start}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_occurrence(meeting_id: int, occurrence_start: datetime, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    meeting = db.query(models.Meeting).filter(models.Meeting.id == meeting_id, models.Meeting.user_id == current_user.id).first()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    try:
+        set_occurrence_exception(db, models.Meeting, meeting, occurrence_start, cancelled=True)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    db.commit()
+    return
+
 @router.delete("/{meeting_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_meeting(meeting_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     meeting = db.query(models.Meeting).filter(models.Meeting.id == meeting_id, models.Meeting.user_id == current_user.id).first()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from app.auth.auth_bearer import get_current_user
+from app.database import pool_stats
+from app.models.user import User
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def get_pool_stats(current_user: User = Depends(get_current_user)):
+    # Connections checked out and in use beyond the pool size, and how long
+    # requests waited for one and then held it (histograms in ms, since the
+    # process started). A wait p95 near DB_POOL_TIMEOUT, or db.pool.timeouts
+    # going up, means the pool is too small for what holds connections.
+    return pool_stats()
@@ -1,3 +1,36 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+from app.schemas import notification as schemas
+from app.models.notification import Notification
+from app.database import get_db
+from app.auth.auth_bearer import get_current_user
+from app.models.user import User
+from app.services.reminders import list_notifications, mark_read
+from app.config import LIST_PAGE_SIZE_DEFAULT, LIST_PAGE_SIZE_MAX
 
-router = APIRouter()
\ No newline at end of file
+router = APIRouter()
+
+@router.get("/", response_model=list[schemas.NotificationOut])
+def get_notifications(response: Response, unread: bool = False, cursor: Optional[int] = None, limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, le=LIST_PAGE_SIZE_MAX), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Reminders sent to the user, newest first; the next page's cursor is
+    # returned in the X-Next-Cursor header. Open event streams also receive
+    # each one as a "notification.created" event when it is sent.
+    notifications = list_notifications(db, current_user.id, unread, cursor, limit + 1)
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        response.headers["X-Next-Cursor"] = str(notifications[-1].id)
+    return notifications
+
+@router.post("/read-all", status_code=status.HTTP_204_NO_CONTENT)
+def read_all_notifications(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    mark_read(db, current_user.id)
+    db.commit()
+
+@router.post("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT)
+def read_notification(notification_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if not mark_read(db, current_user.id, notification_id):
+        exists = db.query(Notification.id).filter(Notification.id == notification_id, Notification.user_id == current_user.id).first()
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Notification not found")
+    db.commit()
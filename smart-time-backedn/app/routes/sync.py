@@ -0,0 +1,21 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.schemas import sync as schemas
+from app.database import get_db
+from app.auth.auth_bearer import get_current_user
+from app.models.user import User
+from app.services.sync import changes_since
+from app.config import LIST_PAGE_SIZE_DEFAULT, LIST_PAGE_SIZE_MAX
+
+router = APIRouter()
+
+@router.get("/", response_model=schemas.SyncOut)
+def get_changes(cursor: Optional[str] = None, limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, le=LIST_PAGE_SIZE_MAX), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Without a cursor, the whole calendar; with one, what changed since.
+    # Keep calling with the returned cursor while has_more is true.
+    try:
+        changes, next_cursor, has_more = changes_since(db, current_user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**changes, "cursor": next_cursor, "has_more": has_more}
@@ -1,30 +1,101 @@
 # routers/tasks.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from app.schemas import task as schemas
 from app.models import task as models
 from app.database import get_db
 from app.auth.auth_bearer import get_current_user
 from app.models.user import User
+from app.services.auto_scheduler import auto_schedule_tasks
+from app.config import AUTO_SCHEDULE_HORIZON_DAYS, AUTO_SCHEDULE_MAX_DAYS, LIST_PAGE_SIZE_DEFAULT, LIST_PAGE_SIZE_MAX, BULK_MAX_ITEMS
+from app.services.recurrence import normalize_rule, set_occurrence_exception, Occurrence
+from app.services.pagination import decode_cursor, paginate
+from app.services.bulk import BulkValidationError, bulk_write
+from app.services.conditional import collection_validators, is_not_modified, not_modified, set_validators
 
 router = APIRouter()
 
+def validate_rule(rule, start_time, end_time):
+    try:
+        rule = normalize_rule(rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if rule and not (start_time and end_time):
+        raise HTTPException(status_code=400, detail="A recurring task needs a start and end time")
+    return rule
+
 @router.post("/", response_model=schemas.TaskOut)
 def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_task = models.Task(**task.dict(), user_id=current_user.id)
+    data = task.dict()
+    data["recurrence_rule"] = validate_rule(data["recurrence_rule"], data["start_time"], data["end_time"])
+    db_task = models.Task(**data, user_id=current_user.id)
     db.add(db_task)
     db.commit()
     db.refresh(db_task)
     return db_task
 
+@router.post("/bulk", response_model=schemas.BulkOut)
+def bulk_tasks(request: schemas.TaskBulkRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Creates, updates and deletes many tasks in one transaction. Nothing is
+    # written if any item is invalid; the 400 lists every rejected item.
+    if len(request.create) + len(request.update) + len(request.delete) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    try:
+        result = bulk_write(
+            db, models.Task, current_user.id,
+            [item.dict() for item in request.create],
+            [item.dict(exclude_unset=True) for item in request.update],
+            request.delete,
+        )
+    except BulkValidationError as e:
+        raise HTTPException(status_code=400, detail=e.errors)
+    db.commit()
+    return result
+
+@router.post("/auto-schedule", response_model=schemas.AutoScheduleOut)
+def auto_schedule(request: schemas.AutoScheduleRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    days = request.days or AUTO_SCHEDULE_HORIZON_DAYS
+    if not 1 <= days <= AUTO_SCHEDULE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {AUTO_SCHEDULE_MAX_DAYS}")
+    result = auto_schedule_tasks(db, current_user.id, request.start, days, improve=request.improve, dry_run=request.dry_run)
+    if not request.dry_run:
+        db.commit()
+    return result
+
 # @router.get("/", response_model=list[schemas.TaskOut])
 # def get_tasks(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
 #     return db.query(models.Task).filter(models.Task.user_id == current_user.id).all()
 @router.get("/", response_model=list[schemas.TaskOut])
-def get_tasks(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(models.Task).filter(
-        models.Task.user_id == current_user.id
-    ).order_by(models.Task.start_time.desc()).all()
+def get_tasks(request: Request, response: Response, start: Optional[datetime] = Query(None, alias="from"), end: Optional[datetime] = Query(None, alias="to"), task_status: Optional[schemas.TaskStatus] = Query(None, alias="status"), priority: Optional[schemas.TaskPriority] = None, cursor: Optional[str] = None, limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, le=LIST_PAGE_SIZE_MAX), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Newest first, unscheduled tasks last, one page at a time; the next
+    # page's cursor is returned in the X-Next-Cursor header. With a window,
+    # recurring tasks are expanded into their occurrences in it; without
+    # one, each series is listed once.
+    window = None
+    if start or end:
+        if not (start and end) or end <= start:
+            raise HTTPException(status_code=400, detail="'from' and 'to' must both be given, with 'to' after 'from'")
+        window = (start, end)
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Answer polls from the calendar version alone while nothing changed.
+    etag, last_modified = collection_validators(db, current_user.id, request)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    query = db.query(models.Task).filter(models.Task.user_id == current_user.id)
+    if task_status:
+        query = query.filter(models.Task.status == models.TaskStatus(task_status.value))
+    if priority:
+        query = query.filter(models.Task.priority == models.TaskPriority(priority.value))
+    tasks, next_cursor = paginate(db, models.Task, query, current_user.id, position, limit, window)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return tasks
 
 @router.get("/{task_id}", response_model=schemas.TaskOut)
 def get_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -38,12 +109,43 @@ def update_task(task_id: int, task_update: schemas.TaskUpdate, db: Session = Dep
     task = db.query(models.Task).filter(models.Task.id == task_id, models.Task.user_id == current_user.id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    for key, value in task_update.dict(exclude_unset=True).items():
+    data = task_update.dict(exclude_unset=True)
+    if "recurrence_rule" in data:
+        data["recurrence_rule"] = validate_rule(data["recurrence_rule"], data.get("start_time", task.start_time), data.get("end_time", task.end_time))
+    for key, value in data.items():
         setattr(task, key, value)
     db.commit()
     db.refresh(task)
     return task
 
+@router.put("/{task_id}/occurrences/{occurrence_start}", response_model=schemas.TaskOut)
+def update_occurrence(task_id: int, occurrence_start: datetime, update: schemas.OccurrenceUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    task = db.query(models.Task).filter(models.Task.id == task_id, models.Task.user_id == current_user.id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        exc = set_occurrence_exception(db, models.Task, task, occurrence_start, **update.dict())
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    duration = task.end_time - task.start_time
+    start = exc.start_time or exc.original_start
+    return Occurrence(task, exc.original_start, start, exc.end_time or start + duration, exc.title)
+
+@router.delete("/{task_id}/occurrences/{occurrence_start}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_occurrence(task_id: int, occurrence_start: datetime, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    task = db.query(models.Task).filter(models.Task.id == task_id, models.Task.user_id == current_user.id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        set_occurrence_exception(db, models.Task, task, occurrence_start, cancelled=True)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    db.commit()
+    return
+
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     task = db.query(models.Task).filter(models.Task.id == task_id, models.Task.user_id == current_user.id).first()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.auth.auth_bearer import get_current_user
 from app.auth.auth_handler import decode_access_token
+from app.models.calendar_share import CalendarShare
 from app.models.user import User, UserUpdate
-from app.schemas.user import UserOut
+from app.schemas.user import UserOut, CalendarShareCreate, CalendarShareOut
 from app.database import get_db
 
 router = APIRouter()
@@ -34,9 +35,36 @@ def update_user_info(
         user.email = update_data.email
     if update_data.username:
         user.username = update_data.username
+    # The commit also drops the user from the principal cache
+    # (app/services/principal_cache.py).
     db.commit()
     db.refresh(user)
     return {"message": "User updated successfully"}
+
+
+@router.get("/me/shares", response_model=list[CalendarShareOut])
+def get_calendar_shares(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Addresses that may include the user in group availability searches.
+    return db.query(CalendarShare).filter(CalendarShare.owner_id == current_user.id).order_by(CalendarShare.id).all()
+
+
+@router.post("/me/shares", status_code=status.HTTP_204_NO_CONTENT)
+def share_calendar(share: CalendarShareCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Stored whether or not the address has an account, so the reply does
+    # not tell; sharing twice with one address is a no-op.
+    email = share.email.lower()
+    exists = db.query(CalendarShare.id).filter(CalendarShare.owner_id == current_user.id, CalendarShare.viewer_email == email).first()
+    if exists is None:
+        db.add(CalendarShare(owner_id=current_user.id, viewer_email=email))
+        db.commit()
+
+
+@router.delete("/me/shares/{email}", status_code=status.HTTP_204_NO_CONTENT)
+def unshare_calendar(email: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    deleted = db.query(CalendarShare).filter(CalendarShare.owner_id == current_user.id, CalendarShare.viewer_email == email.strip().lower()).delete()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Share not found")
+    db.commit()
 # @router.get("/me", response_model=UserOut, dependencies=[Depends(JWTBearer())])
 # def get_me(token: str = Depends(JWTBearer()), db: Session = Depends(get_db)):
 #     payload = decode_access_token(token)
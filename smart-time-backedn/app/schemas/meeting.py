@@ -8,6 +8,7 @@ class MeetingCreate(BaseModel):
     location: Optional[str] = None
     start_time: datetime
     end_time: datetime
+    recurrence_rule: Optional[str] = None
 
 class MeetingUpdate(BaseModel):
     title: Optional[str]
@@ -15,6 +16,31 @@ class MeetingUpdate(BaseModel):
     location: Optional[str]
     start_time: Optional[datetime]
     end_time: Optional[datetime]
+    recurrence_rule: Optional[str] = None
+
+class MeetingBulkUpdate(MeetingUpdate):
+    # Every field may be left out; only those sent are written.
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+class MeetingBulkRequest(BaseModel):
+    create: list[MeetingCreate] = []
+    update: list[MeetingBulkUpdate] = []
+    delete: list[int] = []
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: int
+    status: str
+
+class BulkOut(BaseModel):
+    created: list[BulkItemResult]
+    updated: list[BulkItemResult]
+    deleted: list[BulkItemResult]
 
 class MeetingOut(BaseModel):
     id: int
@@ -23,8 +49,39 @@ class MeetingOut(BaseModel):
     location: Optional[str]
     start_time: datetime
     end_time: datetime
+    recurrence_rule: Optional[str] = None
+    # Set on expanded occurrences of a recurring meeting: the start the
+    # occurrence has under the rule, used to address it.
+    occurrence_start: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         orm_mode = True
+
+class OccurrenceUpdate(BaseModel):
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+class BusyInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+class FreeBusyOut(BaseModel):
+    start: datetime
+    end: datetime
+    busy: list[BusyInterval]
+
+class GroupAvailabilityRequest(BaseModel):
+    participants: list[str]
+    start: datetime
+    end: datetime
+    duration_minutes: int
+    limit: int = 10
+    working_hours_only: bool = True
+    include_tasks: bool = True
+
+class GroupAvailabilityOut(BaseModel):
+    participant_ids: list[int]
+    slots: list[BusyInterval]
@@ -0,0 +1,17 @@
+# schemas/notification.py
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class NotificationOut(BaseModel):
+    id: int
+    source: str
+    item_id: int
+    title: str
+    message: str
+    event_at: datetime
+    created_at: datetime
+    read_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
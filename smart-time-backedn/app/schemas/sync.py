@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.schemas.meeting import MeetingOut
+from app.schemas.task import TaskOut
+
+class OccurrenceExceptionOut(BaseModel):
+    original_start: datetime
+    is_cancelled: bool
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+# Series are sent unexpanded, with their cancelled and changed occurrences.
+class SyncMeeting(MeetingOut):
+    exceptions: list[OccurrenceExceptionOut] = []
+
+class SyncTask(TaskOut):
+    exceptions: list[OccurrenceExceptionOut] = []
+
+class Deletion(BaseModel):
+    kind: str
+    id: int
+
+class SyncOut(BaseModel):
+    meetings: list[SyncMeeting]
+    tasks: list[SyncTask]
+    deleted: list[Deletion]
+    # Pass back as ?cursor= for the next page or, once has_more is false,
+    # the next sync.
+    cursor: str
+    has_more: bool
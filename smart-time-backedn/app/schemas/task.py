@@ -20,6 +20,9 @@ class TaskCreate(BaseModel):
     priority: Optional[TaskPriority] = TaskPriority.medium
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    deadline: Optional[datetime] = None
+    duration_minutes: Optional[int] = None
+    recurrence_rule: Optional[str] = None
 
 class TaskUpdate(BaseModel):
     title: Optional[str]
@@ -28,6 +31,34 @@ class TaskUpdate(BaseModel):
     status: Optional[TaskStatus]
     start_time: Optional[datetime]
     end_time: Optional[datetime]
+    deadline: Optional[datetime] = None
+    duration_minutes: Optional[int] = None
+    recurrence_rule: Optional[str] = None
+
+class TaskBulkUpdate(TaskUpdate):
+    # Every field may be left out; only those sent are written.
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    priority: Optional[TaskPriority] = None
+    status: Optional[TaskStatus] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+class TaskBulkRequest(BaseModel):
+    create: list[TaskCreate] = []
+    update: list[TaskBulkUpdate] = []
+    delete: list[int] = []
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: int
+    status: str
+
+class BulkOut(BaseModel):
+    created: list[BulkItemResult]
+    updated: list[BulkItemResult]
+    deleted: list[BulkItemResult]
 
 class TaskOut(BaseModel):
     id: int
@@ -37,8 +68,34 @@ class TaskOut(BaseModel):
     status: TaskStatus
     start_time: Optional[datetime]
     end_time: Optional[datetime]
+    deadline: Optional[datetime] = None
+    duration_minutes: Optional[int] = None
+    recurrence_rule: Optional[str] = None
+    occurrence_start: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         orm_mode = True
+
+class OccurrenceUpdate(BaseModel):
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+class AutoScheduleRequest(BaseModel):
+    start: Optional[datetime] = None
+    days: Optional[int] = None
+    improve: bool = True
+    dry_run: bool = False
+
+class ScheduledTask(BaseModel):
+    task_id: int
+    title: str
+    start_time: datetime
+    end_time: datetime
+    late: bool
+
+class AutoScheduleOut(BaseModel):
+    scheduled: list[ScheduledTask]
+    unscheduled: list[int]
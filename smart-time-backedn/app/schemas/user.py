@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
 class UserCreate(BaseModel):
@@ -17,3 +18,13 @@ class UserOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class CalendarShareCreate(BaseModel):
+    email: EmailStr
+
+class CalendarShareOut(BaseModel):
+    viewer_email: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -1,13 +1,13 @@
 # app/services/ai_agent.py
 
-from openai import OpenAI
-from app.ai_config import OPENAI_API_KEY, GPT_MODEL
+from app.ai_config import GPT_MODEL
+from app.openai_utils import llm, LLMUnavailableError
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-def ask_agent(message: str, system_prompt: str = "You are a helpful assistant."):
+async def ask_agent(message: str, system_prompt: str = "You are a helpful assistant."):
     try:
-        response = client.chat.completions.create(
+        response = await llm.create(
+            llm.deadline(),
             model=GPT_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -17,5 +17,7 @@ def ask_agent(message: str, system_prompt: str = "You are a helpful assistant.")
             max_tokens=500
         )
         return response.choices[0].message.content
+    except LLMUnavailableError as e:
+        return f"Error: {e.reason}"
     except Exception as e:
         return f"Error: {str(e)}"
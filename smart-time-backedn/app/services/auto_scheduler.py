@@ -0,0 +1,180 @@
+# app/services/auto_scheduler.py
+
+import math
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.config import AUTO_SCHEDULE_HORIZON_DAYS, AUTO_SCHEDULE_DEFAULT_TASK_MINUTES, AUTO_SCHEDULE_LOCAL_SEARCH_PASSES
+from app.models.task import Task, TaskStatus
+from app.services.availability import busy_intervals, free_gaps, working_window
+
+PRIORITY_WEIGHTS = {"high": 3, "medium": 2, "low": 1}
+
+# Cost per minute of lateness, relative to the cost per minute of waiting.
+LATENESS_WEIGHT = 100
+
+
+class GapTree:
+    """Max segment tree over free-gap lengths: finds the earliest gap that
+    can hold a task in O(log gaps)."""
+
+    def __init__(self, lengths):
+        self.size = 1
+        while self.size < max(len(lengths), 1):
+            self.size *= 2
+        self.tree = [0] * (2 * self.size)
+        self.tree[self.size:self.size + len(lengths)] = lengths
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def update(self, index: int, length: int):
+        node = index + self.size
+        self.tree[node] = length
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    def first_at_least(self, length: int) -> int:
+        if self.tree[1] < length:
+            return -1
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node] >= length else 2 * node + 1
+        return node - self.size
+
+
+def placement_cost(weight: int, end: int, deadline) -> float:
+    late = end - deadline if deadline is not None and end > deadline else 0
+    return weight * (end + LATENESS_WEIGHT * late)
+
+
+def plan_schedule(tasks, gaps, improve: bool = True, passes: int = AUTO_SCHEDULE_LOCAL_SEARCH_PASSES):
+    """
+    Places tasks into free gaps. `tasks` are (key, weight, duration, deadline)
+    tuples and `gaps` sorted, disjoint (start, end) pairs, all in minutes
+    (deadline may be None). Returns ({key: (start, end)}, [unplaced keys]).
+
+    Greedy pass: highest weight first, then earliest deadline, each task
+    into the earliest gap it fits. Improvement pass: tasks packed back to
+    back in a gap are swapped with their neighbour while that lowers the
+    weighted completion time plus lateness; a block keeps its total length,
+    so swaps never create overlaps.
+    """
+    starts = [start for start, _ in gaps]
+    ends = [end for _, end in gaps]
+    tree = GapTree([end - start for start, end in gaps])
+    order = sorted(tasks, key=lambda t: (-t[1], math.inf if t[3] is None else t[3], t[0]))
+    blocks = {}
+    unplaced = []
+    for task in order:
+        index = tree.first_at_least(task[2])
+        if index < 0:
+            unplaced.append(task[0])
+            continue
+        blocks.setdefault(index, []).append(task)
+        starts[index] += task[2]
+        tree.update(index, ends[index] - starts[index])
+
+    placements = {}
+    for index, block in blocks.items():
+        start = gaps[index][0]
+        if improve:
+            for _ in range(passes):
+                swapped = False
+                cursor = start
+                for i in range(len(block) - 1):
+                    a, b = block[i], block[i + 1]
+                    current = placement_cost(a[1], cursor + a[2], a[3]) + placement_cost(b[1], cursor + a[2] + b[2], b[3])
+                    flipped = placement_cost(b[1], cursor + b[2], b[3]) + placement_cost(a[1], cursor + b[2] + a[2], a[3])
+                    if flipped < current:
+                        block[i], block[i + 1] = b, a
+                        swapped = True
+                    cursor += block[i][2]
+                if not swapped:
+                    break
+        cursor = start
+        for task in block:
+            placements[task[0]] = (cursor, cursor + task[2])
+            cursor += task[2]
+    return placements, unplaced
+
+
+def schedulable_gaps(db: Session, user_id: int, start: datetime, days: int):
+    """Free working-hour gaps from `start` over `days` days, after meetings
+    and already scheduled tasks."""
+    windows = []
+    for i in range(days):
+        window_start, window_end = working_window((start.date() + timedelta(days=i)).isoformat())
+        window_start = max(window_start, start)
+        if window_start < window_end:
+            windows.append((window_start, window_end))
+    if not windows:
+        return []
+    busy = busy_intervals(db, user_id, windows[0][0], windows[-1][1], sources=("meetings", "tasks"))
+    ends = [end for _, end in busy]
+    gaps = []
+    for window_start, window_end in windows:
+        gaps.extend(free_gaps(busy, window_start, window_end, lo=bisect_right(ends, window_start)))
+    return gaps
+
+
+def to_minutes(value: datetime, origin: datetime, round_up: bool = False) -> int:
+    seconds = (value - origin).total_seconds()
+    return math.ceil(seconds / 60) if round_up else math.floor(seconds / 60)
+
+
+def auto_schedule_tasks(db: Session, user_id: int, start: datetime = None, days: int = AUTO_SCHEDULE_HORIZON_DAYS, improve: bool = True, dry_run: bool = False):
+    """
+    Places every pending, unscheduled task of the user into free working
+    time, without committing. Returns {"scheduled": [...], "unscheduled": [...]}.
+    """
+    now = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+    start = max(start or now, now)
+    if start.second or start.microsecond:
+        start = start.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    pending = db.query(Task).filter(
+        Task.user_id == user_id,
+        Task.status == TaskStatus.pending,
+        Task.start_time.is_(None),
+        Task.recurrence_rule.is_(None),
+    ).all()
+    if not pending:
+        return {"scheduled": [], "unscheduled": []}
+    # Gap edges round inwards so that placed tasks never touch busy time.
+    gaps = [
+        (to_minutes(gap_start, start, round_up=True), to_minutes(gap_end, start))
+        for gap_start, gap_end in schedulable_gaps(db, user_id, start, days)
+    ]
+    gaps = [(gap_start, gap_end) for gap_start, gap_end in gaps if gap_end > gap_start]
+    by_id = {task.id: task for task in pending}
+    specs = [
+        (
+            task.id,
+            PRIORITY_WEIGHTS.get(task.priority.value if task.priority else "medium", 2),
+            max(task.duration_minutes or AUTO_SCHEDULE_DEFAULT_TASK_MINUTES, 1),
+            to_minutes(task.deadline, start) if task.deadline else None,
+        )
+        for task in pending
+    ]
+    placements, unplaced = plan_schedule(specs, gaps, improve)
+    scheduled = []
+    for task_id, (begin, end) in sorted(placements.items(), key=lambda item: item[1]):
+        task = by_id[task_id]
+        start_time = start + timedelta(minutes=begin)
+        end_time = start + timedelta(minutes=end)
+        if not dry_run:
+            task.start_time = start_time
+            task.end_time = end_time
+        scheduled.append({
+            "task_id": task_id,
+            "title": task.title,
+            "start_time": start_time,
+            "end_time": end_time,
+            "late": bool(task.deadline and end_time > task.deadline),
+        })
+    if not dry_run:
+        db.flush()
+    return {"scheduled": scheduled, "unscheduled": sorted(unplaced)}
@@ -0,0 +1,155 @@
+# app/services/availability.py
+
+import heapq
+from bisect import bisect_right
+from datetime import date as date_type, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.config import WORKING_HOURS_START, WORKING_HOURS_END, SLOT_GRANULARITY_MINUTES, SLOT_SEARCH_HORIZON_DAYS
+from app.models.meeting import Meeting
+from app.models.task import Task
+from app.services.recurrence import single_overlap, series_intervals
+
+# Busy sources: meetings always have times, tasks only once scheduled.
+SOURCES = {"meetings": Meeting, "tasks": Task}
+
+
+def working_window(date: str, start_hour: int = WORKING_HOURS_START, end_hour: int = WORKING_HOURS_END):
+    day = datetime.fromisoformat(date).replace(hour=0, minute=0, second=0, microsecond=0)
+    return day + timedelta(hours=start_hour), day + timedelta(hours=end_hour)
+
+
+def fetch_busy_intervals(db: Session, user_id: int, window_start: datetime, window_end: datetime, sources=("meetings",)):
+    """Start/end pairs of every event that overlaps the window, including
+    events that begin before it or run past its end, ordered by start.
+    One range query per source for one-off events plus one for recurring
+    series, which are expanded for the window only; the sorted results are
+    interleaved lazily."""
+    streams = []
+    for source in sources:
+        model = SOURCES[source]
+        streams.append(db.query(model.start_time, model.end_time).filter(
+            model.user_id == user_id,
+            single_overlap(model, window_start, window_end),
+        ).order_by(model.start_time, model.end_time).all())
+        streams.append(sorted((start, end) for _, start, end in series_intervals(db, model, [user_id], window_start, window_end)))
+    return heapq.merge(*[((start, end) for start, end in rows) for rows in streams])
+
+
+def merge_intervals(intervals):
+    """Sort-and-sweep merge of overlapping or touching intervals. Empty or
+    inverted intervals are dropped."""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def merge_sorted_intervals(intervals, window_start: datetime = None, window_end: datetime = None):
+    """Streaming merge of intervals already ordered by start, optionally
+    clipped to a window. Yields disjoint intervals in order."""
+    current_start = current_end = None
+    for start, end in intervals:
+        if window_start is not None and start < window_start:
+            start = window_start
+        if window_end is not None and end > window_end:
+            end = window_end
+        if end <= start:
+            continue
+        if current_end is not None and start <= current_end:
+            if end > current_end:
+                current_end = end
+            continue
+        if current_end is not None:
+            yield current_start, current_end
+        current_start, current_end = start, end
+    if current_end is not None:
+        yield current_start, current_end
+
+
+def busy_intervals(db: Session, user_id: int, window_start: datetime, window_end: datetime, sources=("meetings",)):
+    """Merged busy time inside the window."""
+    return list(merge_sorted_intervals(fetch_busy_intervals(db, user_id, window_start, window_end, sources), window_start, window_end))
+
+
+def free_gaps(busy, window_start: datetime, window_end: datetime, lo: int = 0):
+    """Free gaps inside the window, in one pass over merged, sorted busy
+    intervals, starting from index `lo`."""
+    gaps = []
+    cursor = window_start
+    for i in range(lo, len(busy)):
+        start, end = busy[i]
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = end
+        if cursor >= window_end:
+            break
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def slots_in_gaps(gaps, window_start: datetime, duration: timedelta, granularity: timedelta):
+    """Candidate slots of `duration` starting on the `granularity` grid
+    anchored at `window_start`, that fit entirely inside a gap."""
+    slots = []
+    for gap_start, gap_end in gaps:
+        steps = -((window_start - gap_start) // granularity)
+        slot_start = window_start + steps * granularity
+        while slot_start + duration <= gap_end:
+            slots.append((slot_start, slot_start + duration))
+            slot_start += granularity
+    return slots
+
+
+def find_free_slots(db: Session, user_id: int, window_start: datetime, window_end: datetime, duration_minutes: int, granularity_minutes: int = SLOT_GRANULARITY_MINUTES, sources=("meetings",)):
+    busy = busy_intervals(db, user_id, window_start, window_end, sources)
+    gaps = free_gaps(busy, window_start, window_end)
+    return slots_in_gaps(gaps, window_start, timedelta(minutes=duration_minutes), timedelta(minutes=granularity_minutes))
+
+
+def format_slots(slots):
+    return [{"start": start.isoformat(), "end": end.isoformat()} for start, end in slots]
+
+
+def free_slots_by_day(db: Session, user_id: int, first_day: date_type, duration_minutes: int, horizon_days: int = SLOT_SEARCH_HORIZON_DAYS, granularity_minutes: int = SLOT_GRANULARITY_MINUTES, sources=("meetings",)):
+    """
+    Free slots for each working day of the horizon, as (ISO date, slots)
+    pairs. Busy time for the whole horizon comes from one range query per
+    source; each day is then searched in memory.
+    """
+    windows = [working_window((first_day + timedelta(days=i)).isoformat()) for i in range(horizon_days)]
+    if not windows:
+        return []
+    busy = busy_intervals(db, user_id, windows[0][0], windows[-1][1], sources)
+    # Merged intervals are disjoint and sorted, so their ends are sorted too.
+    ends = [end for _, end in busy]
+    duration = timedelta(minutes=duration_minutes)
+    granularity = timedelta(minutes=granularity_minutes)
+    days = []
+    for window_start, window_end in windows:
+        gaps = free_gaps(busy, window_start, window_end, lo=bisect_right(ends, window_start))
+        days.append((window_start.date().isoformat(), slots_in_gaps(gaps, window_start, duration, granularity)))
+    return days
+
+
+def next_free_slots(db: Session, user_id: int, after: datetime, duration_minutes: int, limit: int = 1, horizon_days: int = SLOT_SEARCH_HORIZON_DAYS, granularity_minutes: int = SLOT_GRANULARITY_MINUTES, sources=("meetings",)):
+    """The `limit` earliest free slots in the working hours of the horizon
+    that starts on the day of `after`."""
+    slots = []
+    for _, day_slots in free_slots_by_day(db, user_id, after.date(), duration_minutes, horizon_days, granularity_minutes, sources):
+        slots.extend(day_slots)
+        if len(slots) >= limit:
+            break
+    return slots[:limit]
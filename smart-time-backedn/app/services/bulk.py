@@ -0,0 +1,171 @@
+# app/services/bulk.py
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.occurrence_exception import OccurrenceException
+from app.models.tombstone import Tombstone
+from app.services.calendar_version import TOMBSTONE_KINDS, bump_calendar_versions
+from app.services.events import calendar_event, record_calendar_events
+from app.services.recurrence import SERIES_COLUMNS, normalize_rule, recurrence_fields
+from app.services.reminders import refresh_reminders
+
+RECURRENCE_INPUTS = ("recurrence_rule", "start_time", "end_time")
+
+
+class BulkValidationError(ValueError):
+    """Raised before anything is written; `errors` has one
+    {"op", "index", "detail"} entry per rejected item."""
+
+    def __init__(self, errors):
+        super().__init__("Invalid items")
+        self.errors = errors
+
+
+def check_rule(model, rule, start_time, end_time):
+    rule = normalize_rule(rule)
+    if rule and not (start_time and end_time):
+        raise ValueError(f"A recurring {model.__tablename__[:-1]} needs a start and end time")
+    return rule
+
+
+def check_not_null(model, data):
+    for key, value in data.items():
+        if value is None and not model.__table__.c[key].nullable:
+            raise ValueError(f"{key} cannot be null")
+
+
+def check_ids(op, ids, errors, seen=None):
+    seen = set() if seen is None else seen
+    for index, item_id in enumerate(ids):
+        if item_id in seen:
+            errors.append({"op": op, "index": index, "detail": f"id {item_id} appears more than once"})
+        seen.add(item_id)
+
+
+def prepare_creates(model, user_id: int, items, errors):
+    rows = []
+    for index, data in enumerate(items):
+        try:
+            check_not_null(model, data)
+            check_rule(model, data.get("recurrence_rule"), data.get("start_time"), data.get("end_time"))
+        except ValueError as e:
+            errors.append({"op": "create", "index": index, "detail": str(e)})
+            continue
+        row = dict(data, user_id=user_id)
+        row["recurrence_rule"], row["recurrence_until"] = recurrence_fields(data.get("recurrence_rule"), data.get("start_time"), data.get("end_time"))
+        rows.append(row)
+    return rows
+
+
+def prepare_updates(model, items, current, errors):
+    """Parameter sets for a bulk UPDATE by primary key, for the items whose
+    row exists in `current`. Fields left out of an item are left alone."""
+    rows = []
+    for index, data in enumerate(items):
+        row = current.get(data["id"])
+        if row is None:
+            continue
+        values = dict(data)
+        try:
+            check_not_null(model, values)
+            merged = {key: values.get(key, getattr(row, key)) for key in RECURRENCE_INPUTS}
+            if "recurrence_rule" in values:
+                check_rule(model, merged["recurrence_rule"], merged["start_time"], merged["end_time"])
+            if any(key in values for key in RECURRENCE_INPUTS):
+                values["recurrence_rule"], values["recurrence_until"] = recurrence_fields(*(merged[key] for key in RECURRENCE_INPUTS))
+        except ValueError as e:
+            errors.append({"op": "update", "index": index, "detail": str(e)})
+            continue
+        rows.append(values)
+    return rows
+
+
+def bulk_write(db: Session, model, user_id: int, create=(), update_items=(), delete_ids=()):
+    """
+    Creates, updates and deletes meetings or tasks of one user in the
+    session's transaction, without committing. `create` and `update_items`
+    are field dicts (updates carry the row's "id"); `delete_ids` are ids.
+
+    Every item is validated before anything is written; a BulkValidationError
+    lists the rejected items. The writes are then one multi-row INSERT, one
+    executemany UPDATE by primary key, and two DELETEs plus one INSERT of
+    tombstones, whatever the number of items. Updates and deletes of rows the user does not own are reported
+    as "not_found" rather than failing the batch.
+
+    Returns {"created": [...], "updated": [...], "deleted": [...]} with an
+    {"index", "id", "status"} entry per item, in request order.
+    """
+    errors = []
+    seen = set()
+    check_ids("update", [item["id"] for item in update_items], errors, seen)
+    check_ids("delete", delete_ids, errors, seen)
+    ids = [item["id"] for item in update_items] + list(delete_ids)
+    current = {}
+    if ids:
+        current = {row.id: row for row in db.execute(
+            select(model.id, *(getattr(model, key) for key in RECURRENCE_INPUTS))
+            .where(model.user_id == user_id, model.id.in_(ids))
+        )}
+    inserts = prepare_creates(model, user_id, create, errors)
+    updates = prepare_updates(model, update_items, current, errors)
+    if errors:
+        raise BulkValidationError(sorted(errors, key=lambda e: (e["op"], e["index"])))
+
+    removed = [item_id for item_id in delete_ids if item_id in current]
+    if not (inserts or updates or removed):
+        return bulk_results(update_items, delete_ids, current, [])
+    # Bulk statements skip the session hooks, so the version bump, the
+    # rows' sync_version, the tombstones, the reminders and the events are
+    # done here.
+    version = bump_calendar_versions(db, {user_id})[user_id]
+    if removed:
+        # Exceptions go first: the ORM cascade does not run for bulk deletes,
+        # and SQLite does not enforce the foreign key's ON DELETE.
+        db.execute(delete(OccurrenceException).where(SERIES_COLUMNS[model].in_(removed)))
+        db.execute(delete(model).where(model.user_id == user_id, model.id.in_(removed)), execution_options={"synchronize_session": False})
+        db.execute(insert(Tombstone), [
+            {"user_id": user_id, "kind": TOMBSTONE_KINDS[model], "item_id": item_id, "sync_version": version}
+            for item_id in removed
+        ])
+    if updates:
+        db.execute(update(model), [dict(row, sync_version=version) for row in updates])
+    created_ids = []
+    if inserts:
+        inserts = [dict(row, sync_version=version) for row in inserts]
+        if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            created_ids = db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), inserts).scalars().all()
+        else:
+            # No RETURNING for executemany (MySQL): one INSERT per row, each
+            # reporting its id. Core statements, like the rest, so that the
+            # flush hooks do not bump, refresh and publish a second time.
+            created_ids = [
+                db.execute(insert(model.__table__).values(**row)).inserted_primary_key[0]
+                for row in inserts
+            ]
+    kind = TOMBSTONE_KINDS[model]
+    # The reminders too; written rows are read back whole, since an update
+    # may leave out the fields they depend on.
+    written_ids = [row["id"] for row in updates] + list(created_ids)
+    written = db.query(model).filter(model.id.in_(written_ids)).populate_existing().all() if written_ids else []
+    refresh_reminders(db, [*((kind, item_id, None) for item_id in removed), *((kind, row.id, row) for row in written)])
+    record_calendar_events(db, user_id, [
+        *(calendar_event(kind, "deleted", item_id, version) for item_id in removed),
+        *(calendar_event(kind, "updated", row["id"], version) for row in updates),
+        *(calendar_event(kind, "created", item_id, version) for item_id in created_ids),
+    ])
+    return bulk_results(update_items, delete_ids, current, created_ids)
+
+
+def bulk_results(update_items, delete_ids, current, created_ids):
+    return {
+        "created": [{"index": i, "id": item_id, "status": "created"} for i, item_id in enumerate(created_ids)],
+        "updated": [
+            {"index": i, "id": item["id"], "status": "updated" if item["id"] in current else "not_found"}
+            for i, item in enumerate(update_items)
+        ],
+        "deleted": [
+            {"index": i, "id": item_id, "status": "deleted" if item_id in current else "not_found"}
+            for i, item_id in enumerate(delete_ids)
+        ],
+    }
@@ -0,0 +1,120 @@
+# app/services/calendar_version.py
+
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, upsert
+from app.models.calendar_version import CalendarVersion
+from app.models.meeting import Meeting
+from app.models.task import Task
+from app.models.occurrence_exception import OccurrenceException
+from app.models.tombstone import Tombstone
+
+CALENDAR_MODELS = (Meeting, Task, OccurrenceException)
+
+TOMBSTONE_KINDS = {Meeting: "meeting", Task: "task"}
+
+
+def get_calendar_version(user_id: int, db: Session) -> int:
+    return get_calendar_state(user_id, db)[0]
+
+
+def get_calendar_state(user_id: int, db: Session):
+    """(version, time of the last bump); (0, None) for a user who never
+    wrote to their calendar."""
+    row = db.get(CalendarVersion, user_id)
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def changed_calendar_objects(session: Session):
+    return [
+        obj
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, CALENDAR_MODELS) and obj.user_id is not None
+        and (obj not in session.dirty or session.is_modified(obj))
+    ]
+
+
+def bump_calendar_versions(session: Session, user_ids) -> dict:
+    """Increments the version of every user in `user_ids` on the session's
+    current connection, so the bump commits or rolls back with the write.
+    Returns {user_id: new version}.
+
+    The bumped row stays locked until the transaction ends, so a user's
+    writes take versions in commit order: once a reader sees version V, every
+    write up to V is visible to it."""
+    connection = session.connection()
+    now = datetime.utcnow()
+    versions = {}
+    for user_id in sorted(user_ids):
+        # One statement, so two first writes of a user cannot both insert.
+        upsert(
+            connection, CalendarVersion, {"user_id": user_id, "version": 1, "updated_at": now}, ["user_id"],
+            {"version": CalendarVersion.version + 1, "updated_at": now},
+        )
+        versions[user_id] = connection.execute(
+            select(CalendarVersion.version).where(CalendarVersion.user_id == user_id)
+        ).scalar_one()
+    return versions
+
+
+def calendar_changes(session: Session, objects):
+    """(meeting or task, "created" | "updated" | "deleted") for every row
+    the objects write. A changed occurrence updates its series, whose
+    expansion it changes."""
+    for obj in objects:
+        if isinstance(obj, OccurrenceException):
+            if obj in session.deleted:
+                continue
+            model, series_id = (Meeting, obj.meeting_id) if obj.meeting_id else (Task, obj.task_id)
+            obj = session.get(model, series_id) if series_id else None
+            if obj is None or obj in session.deleted:
+                continue
+            yield obj, "updated"
+        elif obj in session.deleted:
+            yield obj, "deleted"
+        elif obj in session.new:
+            yield obj, "created"
+        else:
+            yield obj, "updated"
+
+
+def stamp_calendar_writes(session: Session, changes, versions: dict):
+    """Stamps written meetings and tasks with the user's new version and
+    records a tombstone for each deleted one."""
+    for obj, op in changes:
+        version = versions[obj.user_id]
+        if op == "deleted":
+            session.add(Tombstone(user_id=obj.user_id, kind=TOMBSTONE_KINDS[type(obj)], item_id=obj.id, sync_version=version))
+        else:
+            obj.sync_version = version
+
+
+def has_uncommitted_calendar_writes(session: Session) -> bool:
+    return session.info.get("calendar_dirty", False)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def bump_versions_before_flush(session, flush_context, instances):
+    # Before the flush rather than after it, so that the new version goes
+    # out with the rows in the same statements.
+    objects = changed_calendar_objects(session)
+    # What this flush writes, read once the rows have ids by the after_flush
+    # hooks of app/services/events.py and app/services/reminders.py.
+    session.info["calendar_changes"] = []
+    if objects:
+        versions = bump_calendar_versions(session, {obj.user_id for obj in objects})
+        changes = list(calendar_changes(session, objects))
+        stamp_calendar_writes(session, changes, versions)
+        session.info["calendar_changes"] = [(obj, op, versions[obj.user_id]) for obj, op in changes]
+        session.info["calendar_dirty"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+@event.listens_for(SessionLocal, "after_rollback")
+def reset_calendar_dirty(session):
+    session.info.pop("calendar_dirty", None)
+    session.info.pop("calendar_changes", None)
@@ -0,0 +1,71 @@
+# app/services/completion_cache.py
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from app.ai_config import COMPLETION_CACHE_MAX_ENTRIES, COMPLETION_CACHE_TTL_SECONDS
+from app.services.metrics import increment
+
+
+def normalize_message(message: str) -> str:
+    text = re.sub(r"\s+", " ", message.lower()).strip()
+    return text.rstrip(" ?!.")
+
+
+def schema_fingerprint(tools: list) -> str:
+    return hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+
+
+class CompletionCache:
+    """
+    In-process LRU cache with a TTL for agent replies. Keys are opaque
+    strings built by make_key; entries expire after `ttl_seconds` and the
+    least recently used entry is evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries: int = COMPLETION_CACHE_MAX_ENTRIES, ttl_seconds: float = COMPLETION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                increment("llm.cache_misses")
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                increment("llm.cache_expired")
+                increment("llm.cache_misses")
+                return None
+            self._entries.move_to_end(key)
+        increment("llm.cache_hits")
+        return value
+
+    def set(self, key: str, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                increment("llm.cache_evictions")
+        increment("llm.cache_stores")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+completion_cache = CompletionCache()
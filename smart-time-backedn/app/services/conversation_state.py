@@ -0,0 +1,150 @@
+# app/services/conversation_state.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import CONVERSATION_STATE_CACHE_TTL_SECONDS, CONVERSATION_STATE_CACHE_MAX_USERS
+from app.database import SessionLocal, upsert
+from app.models.conversation_state import ConversationState
+from app.services.metrics import increment
+
+STATE_FIELDS = (
+    "context_meeting_title",
+    "context_meeting_date",
+    "context_task_title",
+    "context_task_date",
+    "pending_meeting",
+    "pending_task",
+)
+
+# Session.info key holding the fields written in the current transaction,
+# per user. They are applied to the cache only once the transaction commits.
+UNCOMMITTED_WRITES = "conversation_state_writes"
+
+
+def empty_state() -> dict:
+    return {field: None for field in STATE_FIELDS}
+
+
+def row_to_state(row: ConversationState) -> dict:
+    if row is None:
+        return empty_state()
+    return {field: getattr(row, field) for field in STATE_FIELDS}
+
+
+def to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class ConversationStateStore:
+    """
+    Per-user agent state (last meeting/task context and pending proposals)
+    persisted in `conversation_states` and fronted by a write-through cache,
+    so reads on the chat hot path normally need no query. Entries expire
+    after `ttl_seconds`, which bounds how stale a cache can get when another
+    worker updates the same user.
+
+    Writes do not commit. They are written through to the cache when their
+    transaction commits, and are overlaid on reads from the same session
+    until then.
+    """
+
+    def __init__(self, ttl_seconds: float = CONVERSATION_STATE_CACHE_TTL_SECONDS, max_users: int = CONVERSATION_STATE_CACHE_MAX_USERS):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every committed write and invalidation. A row read before
+        # one may predate the write, so it is not cached.
+        self.generation = 0
+
+    def _cached(self, user_id: int):
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at <= time.monotonic():
+                del self._cache[user_id]
+                return None
+            self._cache.move_to_end(user_id)
+            return state
+
+    def _remember(self, user_id: int, state: dict, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._cache[user_id] = (time.monotonic() + self.ttl_seconds, state)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_users:
+                self._cache.popitem(last=False)
+
+    def get(self, user_id: int, db: Session) -> dict:
+        uncommitted = db.info.get(UNCOMMITTED_WRITES, {}).get(user_id)
+        state = self._cached(user_id)
+        if state is not None:
+            increment("conversation_state.cache_hits")
+        else:
+            increment("conversation_state.cache_misses")
+            generation = self.generation
+            state = row_to_state(db.get(ConversationState, user_id))
+            if not uncommitted:
+                self._remember(user_id, state, generation)
+        state = copy.deepcopy(state)
+        if uncommitted:
+            state.update(copy.deepcopy(uncommitted))
+        return state
+
+    def update(self, user_id: int, db: Session, **fields):
+        """Upserts the given fields with one statement in the session's
+        transaction. The cache sees them once that transaction commits."""
+        for name in ("context_meeting_date", "context_task_date"):
+            if name in fields:
+                fields[name] = to_date(fields[name])
+        for name in ("context_meeting_title", "context_task_title"):
+            if fields.get(name):
+                fields[name] = fields[name][:255]
+        values = {"user_id": user_id, "updated_at": datetime.utcnow(), **fields}
+        upsert(db, ConversationState, values, ["user_id"], [c for c in values if c != "user_id"])
+        db.info.setdefault(UNCOMMITTED_WRITES, {}).setdefault(
+            user_id, {}).update(copy.deepcopy(fields))
+
+    def apply_committed_writes(self, session: Session):
+        writes = session.info.pop(UNCOMMITTED_WRITES, None)
+        if not writes:
+            return
+        with self._lock:
+            self.generation += 1
+            for user_id, fields in writes.items():
+                entry = self._cache.get(user_id)
+                if entry is not None:
+                    entry[1].update(fields)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self.generation += 1
+            self._cache.pop(user_id, None)
+
+
+conversation_state = ConversationStateStore()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def write_through_after_commit(session):
+    conversation_state.apply_committed_writes(session)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_after_rollback(session):
+    session.info.pop(UNCOMMITTED_WRITES, None)
@@ -0,0 +1,62 @@
+# app/services/date_parsing.py
+
+import re
+from datetime import datetime
+from functools import lru_cache
+
+import dateparser
+
+# Languages the assistant supports. Restricting dateparser to these avoids
+# language detection across every installed locale, which dominates the cost
+# of a parse.
+SUPPORTED_LANGUAGES = ["en", "fr"]
+
+PARSE_CACHE_SIZE = 4096
+
+ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+CLOCK_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+def relative_base_bucket(relative_base: datetime = None) -> datetime:
+    """Relative bases are truncated to the minute so that repeated parses
+    within the same minute share a cache entry."""
+    return (relative_base or datetime.now()).replace(second=0, microsecond=0)
+
+
+def parse_fast(text: str, relative_base: datetime):
+    """Handles ISO dates/datetimes and bare HH:MM without dateparser. Returns
+    None when the text needs the fuzzy parser."""
+    if ISO_DATE_RE.match(text):
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    match = CLOCK_TIME_RE.match(text)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour < 24 and minute < 60:
+            return relative_base.replace(hour=hour, minute=minute)
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_cached(text: str, relative_base: datetime):
+    parsed = parse_fast(text, relative_base)
+    if parsed is not None:
+        return parsed
+    return dateparser.parse(text, languages=SUPPORTED_LANGUAGES, settings={"RELATIVE_BASE": relative_base})
+
+
+def parse_datetime(text: str, relative_base: datetime = None):
+    """
+    Shared replacement for dateparser.parse(text, settings={"RELATIVE_BASE": ...}).
+    Tries the ISO fast paths first, then dateparser limited to
+    SUPPORTED_LANGUAGES, memoized on (text, relative base bucket).
+    """
+    if not text:
+        return None
+    return parse_cached(text.strip(), relative_base_bucket(relative_base))
+
+
+def parse_cache_info():
+    return parse_cached.cache_info()
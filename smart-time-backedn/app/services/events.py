@@ -0,0 +1,171 @@
+# app/services/events.py
+
+import asyncio
+import json
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import EVENT_STREAM_QUEUE_SIZE, EVENT_STREAM_HEARTBEAT_SECONDS, EVENT_STREAM_MAX_SECONDS
+from app.database import SessionLocal
+from app.services.calendar_version import TOMBSTONE_KINDS
+
+# Calendar events are {"type": "meeting.created" | "task.deleted" | ...,
+# "id": ..., "version": ...}. They say what changed, not what it is now:
+# clients fetch the rows through GET /sync/ with the cursor they hold. They
+# should also sync on "ready", which starts every (re)connected stream, and
+# on "resync", sent after events were dropped.
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """One open stream: a bounded queue on the event loop that owns it. An
+    idle subscription is this object and a coroutine waiting on its queue."""
+
+    def __init__(self, user_id: int, loop, max_queued: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queued)
+        self.dropped = False
+
+    def deliver(self, event: dict):
+        # Runs on self.loop. A reader this far behind gets "resync" instead
+        # of an unbounded backlog.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+    async def next_event(self, timeout: float):
+        """The next event, {"type": "resync"} after dropped events, or None
+        if nothing arrived within `timeout` seconds."""
+        if self.dropped:
+            self.dropped = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return {"type": "resync"}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessEventBus:
+    """
+    Per-user fan-out to the streams open in this process. publish may be
+    called from any thread (sync routes run in the threadpool) and only
+    schedules delivery on each subscriber's loop, so a commit never waits on
+    a slow reader. A broker-backed bus (Redis pub/sub, NATS, ...) can replace
+    it through set_event_bus by providing the same three methods; this one
+    only reaches streams served by the same worker.
+    """
+
+    def __init__(self, max_queued: int = EVENT_STREAM_QUEUE_SIZE):
+        self.max_queued = max_queued
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Called from the event loop that will read the subscription."""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.max_queued)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+_event_bus = InProcessEventBus()
+
+
+def get_event_bus():
+    return _event_bus
+
+
+def set_event_bus(bus):
+    global _event_bus
+    _event_bus = bus
+
+
+def calendar_event(kind: str, op: str, item_id: int, version: int) -> dict:
+    return {"type": f"{kind}.{op}", "id": item_id, "version": version}
+
+
+def record_calendar_events(session: Session, user_id: int, events):
+    """Queues events to publish when the session commits; for writes that
+    bypass the session hooks, such as bulk statements."""
+    session.info.setdefault("calendar_events", []).extend((user_id, e) for e in events)
+
+
+async def stream_events(user_id: int, heartbeat: float = EVENT_STREAM_HEARTBEAT_SECONDS, max_seconds: float = EVENT_STREAM_MAX_SECONDS):
+    """Server-sent events for the user's calendar, with a comment line every
+    `heartbeat` seconds of silence to keep proxies from closing the stream.
+    Ends after `max_seconds`; EventSource reconnects by itself."""
+    bus = get_event_bus()
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + max_seconds
+    # Subscribed here rather than by the caller, so that the finally below
+    # covers every subscription.
+    subscription = bus.subscribe(user_id)
+    try:
+        yield "retry: 1000\n" + sse_event("ready", {})
+        while loop.time() < closes_at:
+            item = await subscription.next_event(min(heartbeat, closes_at - loop.time()))
+            if item is None:
+                yield ": keepalive\n\n"
+            else:
+                yield sse_event(item["type"], item)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def collect_calendar_events(session, flush_context):
+    # After the flush new rows have their ids; after the commit they would
+    # be expired, and deleted ones detached.
+    changes = session.info.get("calendar_changes")
+    if changes:
+        seen = set()
+        events = []
+        for obj, op, version in changes:
+            kind = TOMBSTONE_KINDS[type(obj)]
+            if (kind, obj.id) not in seen:
+                seen.add((kind, obj.id))
+                events.append((obj.user_id, calendar_event(kind, op, obj.id, version)))
+        session.info.setdefault("calendar_events", []).extend(events)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def publish_calendar_events(session):
+    bus = get_event_bus()
+    for user_id, item in session.info.pop("calendar_events", ()):
+        bus.publish(user_id, item)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_calendar_events(session):
+    session.info.pop("calendar_events", None)
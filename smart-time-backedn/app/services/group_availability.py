@@ -0,0 +1,125 @@
+# app/services/group_availability.py
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.config import WORKING_HOURS_START, WORKING_HOURS_END, SLOT_GRANULARITY_MINUTES, GROUP_AVAILABILITY_RESOLUTION_MINUTES
+from app.models.calendar_share import CalendarShare
+from app.models.user import User
+from app.services.availability import SOURCES
+from app.services.recurrence import single_overlap, series_intervals
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def align_window(window_start: datetime, window_end: datetime, resolution_minutes: int):
+    """Round the window outwards to whole cells, anchored at midnight so that
+    cells line up with working-hour boundaries."""
+    resolution = timedelta(minutes=resolution_minutes)
+    day = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = day + ((window_start - day) // resolution) * resolution
+    cells = -((start - window_end) // resolution)
+    return start, max(int(cells), 0)
+
+
+def load_group_intervals(db: Session, user_ids, window_start: datetime, window_end: datetime, sources=("meetings", "tasks")):
+    """(user_id, start, end) rows of every event of the group that overlaps
+    the window; one range query per source for the whole group, plus one for
+    its recurring series."""
+    rows = []
+    for source in sources:
+        model = SOURCES[source]
+        rows.extend(db.query(model.user_id, model.start_time, model.end_time).filter(
+            model.user_id.in_(user_ids),
+            single_overlap(model, window_start, window_end),
+        ).all())
+        rows.extend(series_intervals(db, model, user_ids, window_start, window_end))
+    return rows
+
+
+def occupancy_bitmaps(rows, user_ids, window_start: datetime, cells: int, resolution_minutes: int):
+    """
+    Boolean (users x cells) matrix, True where the user is busy. A cell is
+    busy if any event touches it, so partially booked cells never look free.
+    Built from a difference array: +1 at each event's first cell, -1 after
+    its last, then a cumulative sum along the time axis.
+    """
+    if not rows:
+        return np.zeros((len(user_ids), cells), dtype=bool)
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+    resolution = timedelta(minutes=resolution_minutes)
+    count = len(rows)
+    users = np.fromiter((index[row[0]] for row in rows), dtype=np.int64, count=count)
+    first = np.fromiter(((row[1] - window_start) // resolution for row in rows), dtype=np.int64, count=count)
+    last = np.fromiter((-((window_start - row[2]) // resolution) for row in rows), dtype=np.int64, count=count)
+    np.clip(first, 0, cells, out=first)
+    np.clip(last, 0, cells, out=last)
+    keep = last > first
+    width = cells + 1
+    size = len(user_ids) * width
+    diff = np.bincount(users[keep] * width + first[keep], minlength=size) - np.bincount(users[keep] * width + last[keep], minlength=size)
+    return np.cumsum(diff.reshape(len(user_ids), width)[:, :cells], axis=1) > 0
+
+
+def working_hours_mask(window_start: datetime, cells: int, resolution_minutes: int, start_hour: int = WORKING_HOURS_START, end_hour: int = WORKING_HOURS_END):
+    """True for cells that lie entirely inside working hours."""
+    offset = window_start.hour * 60 + window_start.minute
+    minute_of_day = (offset + np.arange(cells) * resolution_minutes) % MINUTES_PER_DAY
+    return (minute_of_day >= start_hour * 60) & (minute_of_day + resolution_minutes <= end_hour * 60)
+
+
+def common_free_starts(free, run_cells: int, step_cells: int = 1, phase: int = 0):
+    """Indices of cells that start a run of at least `run_cells` free cells,
+    restricted to every `step_cells`-th cell counted from `phase`."""
+    if run_cells <= 0 or run_cells > len(free):
+        return np.empty(0, dtype=np.intp)
+    counts = np.concatenate(([0], np.cumsum(free, dtype=np.int64)))
+    fits = (counts[run_cells:] - counts[:-run_cells]) == run_cells
+    starts = np.flatnonzero(fits)
+    return starts[(starts + phase) % step_cells == 0]
+
+
+def find_common_slots(db: Session, user_ids, window_start: datetime, window_end: datetime, duration_minutes: int, limit: int = 10, granularity_minutes: int = SLOT_GRANULARITY_MINUTES, resolution_minutes: int = GROUP_AVAILABILITY_RESOLUTION_MINUTES, working_hours_only: bool = True, sources=("meetings", "tasks")):
+    """
+    The `limit` earliest slots of `duration_minutes` in which every user is
+    free. Candidate starts lie on the `granularity_minutes` grid (rounded up
+    to whole cells).
+    """
+    start, cells = align_window(window_start, window_end, resolution_minutes)
+    rows = load_group_intervals(db, user_ids, start, start + timedelta(minutes=cells * resolution_minutes), sources)
+    busy = occupancy_bitmaps(rows, user_ids, start, cells, resolution_minutes)
+    free = ~busy.any(axis=0)
+    # Cells only partly inside the requested window are not offered.
+    resolution = timedelta(minutes=resolution_minutes)
+    free[:-((start - window_start) // resolution)] = False
+    free[(window_end - start) // resolution:] = False
+    if working_hours_only:
+        free &= working_hours_mask(start, cells, resolution_minutes)
+    run_cells = -(-duration_minutes // resolution_minutes)
+    step_cells = max(-(-granularity_minutes // resolution_minutes), 1)
+    phase = (start.hour * 60 + start.minute) // resolution_minutes
+    indices = common_free_starts(free, run_cells, step_cells, phase)[:limit]
+    duration = timedelta(minutes=duration_minutes)
+    return [(start + int(i) * resolution, start + int(i) * resolution + duration) for i in indices]
+
+
+def resolve_participants(db: Session, emails, requester_id: int):
+    """User ids for the requester plus the given participant emails, and the
+    emails that match no user who shared their calendar with the requester.
+    Unknown addresses and users who did not share are reported alike, so
+    that the search does not tell which addresses have an account."""
+    wanted = {email.strip().lower() for email in emails if email and email.strip()}
+    requester = aliased(User)
+    shared_with_requester = select(CalendarShare.owner_id).join(
+        requester, CalendarShare.viewer_email == func.lower(requester.email)
+    ).where(requester.id == requester_id)
+    found = db.query(User.id, User.email).filter(
+        func.lower(User.email).in_(wanted),
+        or_(User.id == requester_id, User.id.in_(shared_with_requester)),
+    ).all() if wanted else []
+    user_ids = [requester_id] + sorted({user_id for user_id, _ in found} - {requester_id})
+    missing = sorted(wanted - {email.lower() for _, email in found})
+    return user_ids, missing
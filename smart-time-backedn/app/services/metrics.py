@@ -0,0 +1,74 @@
+# app/services/metrics.py
+
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+# Process-local counters. Incremented from both the event loop and threadpool
+# workers, hence the lock.
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def increment(name: str, amount: int = 1):
+    with _lock:
+        _counters[name] += amount
+
+
+def get_counters() -> dict:
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+
+# Upper bounds, in milliseconds, of the buckets of every histogram.
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+
+_histograms = {}
+
+
+def observe(name: str, value_ms: float):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"count": 0, "sum_ms": 0.0, "max_ms": 0.0, "buckets": [0] * len(HISTOGRAM_BUCKETS_MS)}
+        histogram["count"] += 1
+        histogram["sum_ms"] += value_ms
+        histogram["max_ms"] = max(histogram["max_ms"], value_ms)
+        histogram["buckets"][bisect_left(HISTOGRAM_BUCKETS_MS, value_ms)] += 1
+
+
+def bucket_quantile(buckets, count: int, worst: float, q: float):
+    """Upper bound of the bucket holding the q-quantile, the maximum for the
+    last, unbounded bucket; None when empty."""
+    if not count:
+        return None
+    seen = 0
+    for bound, n in zip(HISTOGRAM_BUCKETS_MS[:-1], buckets):
+        seen += n
+        if seen >= q * count:
+            return bound
+    return round(worst, 3)
+
+
+def get_histogram(name: str) -> dict:
+    """Count, sum, max, cumulative bucket counts ({"le_<ms>": n}) and
+    bucket-resolution p50/p95/p99 of a histogram."""
+    with _lock:
+        histogram = _histograms.get(name)
+        count, total, worst, buckets = (
+            (histogram["count"], histogram["sum_ms"], histogram["max_ms"], list(histogram["buckets"]))
+            if histogram else (0, 0.0, 0.0, [0] * len(HISTOGRAM_BUCKETS_MS))
+        )
+    cumulative, running = {}, 0
+    for bound, n in zip(HISTOGRAM_BUCKETS_MS, buckets):
+        running += n
+        cumulative["le_inf" if bound == float("inf") else f"le_{bound}"] = running
+    return {
+        "count": count,
+        "sum_ms": round(total, 3),
+        "max_ms": round(worst, 3),
+        "p50_ms": bucket_quantile(buckets, count, worst, 0.5),
+        "p95_ms": bucket_quantile(buckets, count, worst, 0.95),
+        "p99_ms": bucket_quantile(buckets, count, worst, 0.99),
+        "buckets": cumulative,
+    }
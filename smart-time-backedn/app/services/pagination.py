@@ -0,0 +1,96 @@
+# app/services/pagination.py
+
+import base64
+import heapq
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.services.recurrence import single_overlap, single_points, has_points, series_in_range, load_exceptions, expand_occurrences
+
+# Lists run newest first on (start_time, id); rows without a start_time
+# (unscheduled tasks) come after every scheduled row, newest id first.
+
+
+def encode_cursor(item) -> str:
+    payload = {"s": item.start_time.isoformat() if item.start_time else None, "i": item.id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    """(start_time, id) from a cursor token. Raises ValueError if the token
+    was not produced by encode_cursor."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        start = datetime.fromisoformat(payload["s"]) if payload["s"] else None
+        return start, int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def list_key(start_time, item_id):
+    """List order as one ascending key: scheduled rows first, then start_time
+    and id descending."""
+    if start_time is None:
+        return (1, 0, 0, -item_id)
+    micros = ((start_time.hour * 60 + start_time.minute) * 60 + start_time.second) * 1_000_000 + start_time.microsecond
+    return (0, -start_time.toordinal(), -micros, -item_id)
+
+
+def sort_key(item):
+    return list_key(item.start_time, item.id)
+
+
+def keyset_rows(query, model, cursor, limit: int):
+    """Up to `limit` rows of `query` after `cursor`, in list order. Each part
+    is one index-ordered range scan."""
+    rows = []
+    start, last_id = cursor if cursor else (None, None)
+    if cursor is None or start is not None:
+        scheduled = query.filter(model.start_time.isnot(None))
+        if cursor:
+            scheduled = scheduled.filter(or_(
+                model.start_time < start,
+                and_(model.start_time == start, model.id < last_id),
+            ))
+        rows = scheduled.order_by(model.start_time.desc(), model.id.desc()).limit(limit).all()
+    if len(rows) < limit:
+        unscheduled = query.filter(model.start_time.is_(None))
+        if cursor and start is None:
+            unscheduled = unscheduled.filter(model.id < last_id)
+        rows += unscheduled.order_by(model.id.desc()).limit(limit - len(rows)).all()
+    return rows
+
+
+def paginate(db: Session, model, query, user_id: int, cursor=None, limit: int = 100, window=None):
+    """
+    One page of `query` in list order, and the cursor of the next page (None
+    on the last page). With a (start, end) window, rows are limited to those
+    overlapping it and recurring series are expanded into their occurrences
+    there; one-off rows are still read one page at a time.
+    """
+    if window is None:
+        rows = keyset_rows(query, model, cursor, limit + 1)
+    else:
+        window_start, window_end = window
+        singles = keyset_rows(query.filter(single_overlap(model, window_start, window_end)), model, cursor, limit + 1)
+        if has_points(model):
+            points = keyset_rows(query.filter(single_points(model, window_start, window_end)), model, cursor, limit + 1)
+            singles = list(heapq.merge(singles, points, key=sort_key))
+        series = series_in_range(db, model, query, [user_id], window_start, window_end)
+        exceptions = load_exceptions(db, model, [s.id for s in series])
+        occurrences = [
+            occurrence
+            for s in series
+            for occurrence in expand_occurrences(s, window_start, window_end, exceptions.get(s.id, ()))
+        ]
+        if cursor:
+            after = list_key(*cursor)
+            occurrences = [o for o in occurrences if sort_key(o) > after]
+        occurrences = heapq.nsmallest(limit + 1, occurrences, key=sort_key)
+        rows = list(heapq.merge(singles, occurrences, key=sort_key))[:limit + 1]
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,106 @@
+# app/services/principal_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+
+from sqlalchemy import event
+
+from app.config import PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_USERS
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.metrics import increment
+
+# Session.info key holding the ids of users written in the current
+# transaction; their entries are dropped once it commits.
+UNCOMMITTED_USERS = "principal_cache_users"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as routes see it: the columns of their row,
+    without a session, so that one copy can serve concurrent requests."""
+    id: int
+    email: str
+    full_name: str
+    username: str = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, full_name=user.full_name, username=user.username)
+
+
+class PrincipalCache:
+    """
+    In-process LRU cache with a TTL of the users behind access tokens, keyed
+    by user id (the token's "sub"), so that authenticating a request
+    normally needs no query. Writes to a user drop their entry when they
+    commit; `ttl_seconds` bounds how long another worker's write, or a
+    deleted account, goes unnoticed.
+    """
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS, max_users: int = PRINCIPAL_CACHE_MAX_USERS):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation. A row read before one may predate the
+        # write behind it, so it is not cached.
+        self.generation = 0
+
+    def get(self, user_id: int):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, principal = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    increment("auth.principal_cache_hits")
+                    return principal
+                del self._entries[user_id]
+        increment("auth.principal_cache_misses")
+        return None
+
+    def remember(self, principal: Principal, generation: int):
+        """Caches a principal read from the database; `generation` is the
+        value of self.generation from before the read."""
+        if self.max_users <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(user_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def collect_written_users(session, flush_context, instances):
+    written = [obj.id for obj in chain(session.dirty, session.deleted) if isinstance(obj, User)]
+    if written:
+        session.info.setdefault(UNCOMMITTED_USERS, set()).update(written)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def invalidate_written_users(session):
+    for user_id in session.info.pop(UNCOMMITTED_USERS, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_written_users(session):
+    session.info.pop(UNCOMMITTED_USERS, None)
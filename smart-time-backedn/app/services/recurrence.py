@@ -0,0 +1,230 @@
+# app/services/recurrence.py
+
+from datetime import datetime
+from functools import lru_cache
+
+from dateutil.rrule import rrulestr
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from app.database import likely
+from app.models.meeting import Meeting
+from app.models.task import Task
+from app.models.occurrence_exception import OccurrenceException
+
+# Sub-daily rules would turn a window query into an unbounded expansion.
+ALLOWED_FREQUENCIES = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+
+SERIES_COLUMNS = {Meeting: OccurrenceException.meeting_id, Task: OccurrenceException.task_id}
+
+
+def normalize_rule(rule: str):
+    """Canonical form of an RRULE string, or None for an empty one. Raises
+    ValueError for rules that cannot be parsed or are not supported."""
+    if not rule or not rule.strip():
+        return None
+    text = rule.strip().upper()
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    parts = dict(part.split("=", 1) for part in text.split(";") if "=" in part)
+    if "DTSTART" in parts or "\n" in text:
+        raise ValueError("The rule is anchored at the event's start time; DTSTART is not allowed")
+    if parts.get("FREQ") not in ALLOWED_FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(sorted(ALLOWED_FREQUENCIES))}")
+    try:
+        build_rule(text, datetime(2000, 1, 1))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid recurrence rule: {e}")
+    return text
+
+
+@lru_cache(maxsize=1024)
+def build_rule(rule: str, dtstart: datetime):
+    return rrulestr(rule, dtstart=dtstart)
+
+
+def series_until(rule: str, start: datetime, end: datetime):
+    """End of the last occurrence of a bounded series, None if unbounded."""
+    if "COUNT=" not in rule and "UNTIL=" not in rule:
+        return None
+    last = None
+    for last in build_rule(rule, start):
+        pass
+    return (last or start) + (end - start)
+
+
+@event.listens_for(Meeting, "before_insert")
+@event.listens_for(Meeting, "before_update")
+@event.listens_for(Task, "before_insert")
+@event.listens_for(Task, "before_update")
+def set_recurrence_until(mapper, connection, target):
+    target.recurrence_rule, target.recurrence_until = recurrence_fields(target.recurrence_rule, target.start_time, target.end_time)
+
+
+def recurrence_fields(rule, start_time, end_time):
+    """(recurrence_rule, recurrence_until) as stored for a row with these
+    values. Bulk statements bypass the hook above and store these directly."""
+    if rule and start_time and end_time:
+        rule = normalize_rule(rule)
+        return rule, series_until(rule, start_time, end_time)
+    return None, None
+
+
+def single_overlap(model, window_start: datetime, window_end: datetime):
+    # Nearly all of a user's history starts before the window ends; saying so
+    # keeps planners on the (user_id, end_time) index.
+    return and_(model.recurrence_rule.is_(None), likely(model.start_time < window_end), model.end_time > window_start)
+
+
+def has_points(model) -> bool:
+    return model.__table__.c.end_time.nullable
+
+
+def single_points(model, window_start: datetime, window_end: datetime):
+    """One-off tasks with a start and no end in the window; such a task is a
+    point at its start. Queried apart from single_overlap: in one OR with
+    it, SQLite reads the user's whole history through the start_time
+    index."""
+    return and_(
+        model.recurrence_rule.is_(None), model.end_time.is_(None),
+        model.start_time >= window_start, model.start_time < window_end,
+    )
+
+
+def series_overlap(model, window_start: datetime, window_end: datetime):
+    """Series that may have an occurrence in the window. Moved occurrences
+    are not covered by this bound; they are found through their exception.
+    There is no start_time < window_end term: with it, planners may prefer
+    the (user_id, start_time) index over the series index, and series that
+    start after the window simply expand to nothing."""
+    return and_(
+        model.recurrence_rule.isnot(None),
+        or_(model.recurrence_until.is_(None), model.recurrence_until > window_start),
+    )
+
+
+class Occurrence:
+    """One occurrence of a series. Reads through to the series row, so it
+    can be serialized wherever the row itself would be."""
+
+    def __init__(self, series, original_start: datetime, start_time: datetime, end_time: datetime, title: str = None):
+        self.series = series
+        self.occurrence_start = original_start
+        self.start_time = start_time
+        self.end_time = end_time
+        self.title = title or series.title
+
+    def __getattr__(self, name):
+        return getattr(self.series, name)
+
+
+def load_exceptions(db: Session, model, series_ids):
+    column = SERIES_COLUMNS[model]
+    exceptions = {}
+    if series_ids:
+        for exc in db.query(OccurrenceException).filter(column.in_(series_ids)).all():
+            exceptions.setdefault(getattr(exc, column.key), []).append(exc)
+    return exceptions
+
+
+def expand_occurrences(series, window_start: datetime, window_end: datetime, exceptions=()):
+    """Occurrences of one series that overlap the window, with cancelled and
+    moved occurrences applied. Only the window is expanded."""
+    duration = series.end_time - series.start_time
+    changed = {exc.original_start: exc for exc in exceptions}
+    occurrences = []
+    rule = build_rule(series.recurrence_rule, series.start_time)
+    for start in rule.between(window_start - duration, window_end, inc=True):
+        if start in changed or start >= window_end or start + duration <= window_start:
+            continue
+        occurrences.append(Occurrence(series, start, start, start + duration))
+    for exc in exceptions:
+        if exc.is_cancelled:
+            continue
+        start = exc.start_time or exc.original_start
+        end = exc.end_time or start + duration
+        if start < window_end and end > window_start:
+            occurrences.append(Occurrence(series, exc.original_start, start, end, exc.title))
+    return occurrences
+
+
+def series_in_range(db: Session, model, query, user_ids, window_start: datetime, window_end: datetime):
+    """Series rows from `query` with an occurrence that may overlap the
+    window, including series with an occurrence moved into it."""
+    series = query.filter(series_overlap(model, window_start, window_end)).all()
+    column = SERIES_COLUMNS[model]
+    moved = {series_id for series_id, in db.query(column).filter(
+        OccurrenceException.user_id.in_(user_ids),
+        column.isnot(None),
+        OccurrenceException.is_cancelled.is_(False),
+        OccurrenceException.start_time < window_end,
+        OccurrenceException.end_time > window_start,
+    ).all()} - {s.id for s in series}
+    if moved:
+        series.extend(query.filter(model.id.in_(moved)).all())
+    return series
+
+
+def occurrences_in_range(db: Session, model, user_id: int, window_start: datetime, window_end: datetime, exclude_id: int = None, points: bool = True):
+    """
+    Meetings or tasks of the user that overlap the window, one-off rows and
+    series occurrences together, ordered by start. Costs one range query for
+    one-off rows (two for tasks) plus one for series, whatever the number of
+    occurrences. Tasks without an end are included as points unless `points` is False,
+    as when looking for busy time, which they do not take up.
+    """
+    query = db.query(model).filter(model.user_id == user_id)
+    if exclude_id:
+        query = query.filter(model.id != exclude_id)
+    events = query.filter(single_overlap(model, window_start, window_end)).all()
+    if points and has_points(model):
+        events.extend(query.filter(single_points(model, window_start, window_end)))
+    series = series_in_range(db, model, query, [user_id], window_start, window_end)
+    exceptions = load_exceptions(db, model, [s.id for s in series])
+    for s in series:
+        events.extend(expand_occurrences(s, window_start, window_end, exceptions.get(s.id, ())))
+    events.sort(key=lambda event: event.start_time)
+    return events
+
+
+def series_intervals(db: Session, model, user_ids, window_start: datetime, window_end: datetime):
+    """(user_id, start, end) for every series occurrence of the users that
+    overlaps the window."""
+    query = db.query(model).filter(model.user_id.in_(user_ids))
+    series = series_in_range(db, model, query, user_ids, window_start, window_end)
+    if not series:
+        return []
+    exceptions = load_exceptions(db, model, [s.id for s in series])
+    return [
+        (s.user_id, occurrence.start_time, occurrence.end_time)
+        for s in series
+        for occurrence in expand_occurrences(s, window_start, window_end, exceptions.get(s.id, ()))
+    ]
+
+
+def is_occurrence(series, original_start: datetime) -> bool:
+    return bool(series.recurrence_rule) and original_start in build_rule(series.recurrence_rule, series.start_time)
+
+
+def set_occurrence_exception(db: Session, model, series, original_start: datetime, cancelled: bool = False, **overrides):
+    """Cancels or changes one occurrence of a series. Raises LookupError if
+    `original_start` is not an occurrence of it."""
+    if not is_occurrence(series, original_start):
+        raise LookupError("Occurrence not found")
+    column = SERIES_COLUMNS[model]
+    exc = db.query(OccurrenceException).filter(column == series.id, OccurrenceException.original_start == original_start).first()
+    if not exc:
+        exc = OccurrenceException(user_id=series.user_id, original_start=original_start)
+        setattr(exc, column.key, series.id)
+        db.add(exc)
+    exc.is_cancelled = cancelled
+    if overrides.get("title") is not None:
+        exc.title = overrides["title"]
+    start, end = overrides.get("start_time"), overrides.get("end_time")
+    if start or end:
+        # A moved occurrence always stores both ends so range queries can find it.
+        exc.start_time = start or exc.start_time or original_start
+        exc.end_time = end or exc.start_time + (series.end_time - series.start_time)
+        if exc.end_time <= exc.start_time:
+            raise ValueError("end_time must be after start_time")
+    return exc
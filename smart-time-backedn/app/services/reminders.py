@@ -0,0 +1,345 @@
+# app/services/reminders.py
+
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import MEETING_REMINDER_MINUTES, TASK_REMINDER_MINUTES, REMINDER_WINDOW_MINUTES, REMINDER_RESCAN_SECONDS
+from app.database import SessionLocal
+from app.models.meeting import Meeting
+from app.models.notification import Notification
+from app.models.occurrence_exception import OccurrenceException
+from app.models.reminder import Reminder
+from app.models.task import Task, TaskStatus
+from app.services.calendar_version import TOMBSTONE_KINDS
+from app.services.events import get_event_bus
+from app.services.recurrence import build_rule
+
+logger = logging.getLogger(__name__)
+
+# Meetings are reminded of before each occurrence starts, tasks before their
+# deadline. Times are naive local times, like the rows they come from.
+LEAD_TIMES = {"meeting": timedelta(minutes=MEETING_REMINDER_MINUTES), "task": timedelta(minutes=TASK_REMINDER_MINUTES)}
+SOURCE_MODELS = {"meeting": Meeting, "task": Task}
+
+# Seconds to wait before retrying after the scheduler failed to read or send.
+RETRY_SECONDS = 5
+
+
+def next_meeting_start(meeting, after: datetime, exceptions=()):
+    """Start of the meeting's first occurrence after `after`, with cancelled
+    and moved occurrences applied; None if there is none."""
+    if not meeting.recurrence_rule:
+        return meeting.start_time if meeting.start_time > after else None
+    changed = {exc.original_start for exc in exceptions}
+    rule = build_rule(meeting.recurrence_rule, meeting.start_time)
+    start = rule.after(after)
+    while start is not None and start in changed:
+        start = rule.after(start)
+    moved = [
+        exc.start_time or exc.original_start for exc in exceptions
+        if not exc.is_cancelled and (exc.start_time or exc.original_start) > after
+    ]
+    return min(filter(None, [start, *moved]), default=None)
+
+
+def next_reminder(source: str, item, now: datetime, exceptions=()):
+    """(event_at, due_at) of the item's next reminder, or None. Only
+    reminders still to come are scheduled, so rewriting an item does not
+    repeat the reminder it has already had."""
+    lead = LEAD_TIMES[source]
+    if source == "meeting":
+        event_at = next_meeting_start(item, now + lead, exceptions)
+    elif item.deadline and item.status != TaskStatus.completed and item.deadline > now + lead:
+        event_at = item.deadline
+    else:
+        event_at = None
+    return (event_at, event_at - lead) if event_at else None
+
+
+def refresh_reminders(session: Session, items, now: datetime = None):
+    """
+    Replaces the pending reminders of meetings and tasks written in the
+    session's transaction. `items` are (source, item id, row) with the row
+    None for a deleted item. One DELETE per source and one INSERT, plus one
+    query for the exceptions of recurring meetings.
+
+    The earliest new due time is kept in the session, for the scheduler to
+    pick up once the transaction commits.
+    """
+    now = now or datetime.now()
+    connection = session.connection()
+    items = {(source, item_id): row for source, item_id, row in items}
+    for source in SOURCE_MODELS:
+        ids = [item_id for (item_source, item_id) in items if item_source == source]
+        if ids:
+            connection.execute(delete(Reminder).where(Reminder.source == source, Reminder.item_id.in_(ids)))
+    series_ids = [item_id for (source, item_id), row in items.items() if source == "meeting" and row is not None and row.recurrence_rule]
+    exceptions = {}
+    if series_ids:
+        # Read on the connection: this runs inside a flush.
+        for exc in connection.execute(select(OccurrenceException.__table__).where(OccurrenceException.meeting_id.in_(series_ids))):
+            exceptions.setdefault(exc.meeting_id, []).append(exc)
+    rows = []
+    for (source, item_id), row in items.items():
+        reminder = next_reminder(source, row, now, exceptions.get(item_id, ())) if row is not None else None
+        if reminder:
+            rows.append({"user_id": row.user_id, "source": source, "item_id": item_id, "event_at": reminder[0], "due_at": reminder[1]})
+    if rows:
+        connection.execute(insert(Reminder), rows)
+        earliest = min(row["due_at"] for row in rows)
+        pending = session.info.get("reminders_due")
+        session.info["reminders_due"] = earliest if pending is None else min(pending, earliest)
+
+
+def format_event_time(event_at: datetime, now: datetime) -> str:
+    return event_at.strftime("%H:%M" if event_at.date() == now.date() else "%a %d %b, %H:%M")
+
+
+def build_notification(reminder, item, now: datetime, exceptions=()) -> Notification:
+    title = item.title
+    for exc in exceptions:
+        if (exc.start_time or exc.original_start) == reminder.event_at and exc.title:
+            title = exc.title
+    when = format_event_time(reminder.event_at, now)
+    message = f"{title} starts at {when}" if reminder.source == "meeting" else f"{title} is due at {when}"
+    return Notification(
+        user_id=reminder.user_id, source=reminder.source, item_id=reminder.item_id,
+        title=title, message=message, event_at=reminder.event_at,
+    )
+
+
+def notification_event(notification: Notification) -> dict:
+    return {
+        "type": "notification.created",
+        "id": notification.id,
+        "source": notification.source,
+        "item_id": notification.item_id,
+        "title": notification.title,
+        "message": notification.message,
+        "event_at": notification.event_at.isoformat(),
+    }
+
+
+def deliver_reminders(reminder_ids, now: datetime = None):
+    """
+    Sends the reminders with these ids that are still pending. Each one is
+    claimed by deleting its row, so one that was moved or deleted since it
+    was read is skipped, and of several workers only one sends it. A sent
+    reminder becomes a notification, is pushed to the user's open event
+    streams, and is followed by the item's next one (a recurring meeting's
+    next occurrence). Reminders whose event has already begun, as after
+    downtime, are dropped rather than sent. Returns the events published.
+    """
+    now = now or datetime.now()
+    db = SessionLocal()
+    try:
+        reminders = db.execute(select(Reminder.__table__).where(Reminder.id.in_(reminder_ids))).all()
+        claimed = [
+            reminder for reminder in reminders
+            if db.execute(delete(Reminder).where(Reminder.id == reminder.id)).rowcount == 1
+        ]
+        items = {}
+        for source, model in SOURCE_MODELS.items():
+            ids = {reminder.item_id for reminder in claimed if reminder.source == source}
+            if ids:
+                items.update(((source, row.id), row) for row in db.query(model).filter(model.id.in_(ids)))
+        notifications = []
+        written = []
+        for reminder in claimed:
+            item = items.get((reminder.source, reminder.item_id))
+            if item is None:
+                continue
+            if reminder.event_at > now:
+                exceptions = item.exceptions if reminder.source == "meeting" and item.recurrence_rule else ()
+                notifications.append(build_notification(reminder, item, now, exceptions))
+            written.append((reminder.source, item.id, item))
+        db.add_all(notifications)
+        db.flush()
+        events = [(notification.user_id, notification_event(notification)) for notification in notifications]
+        refresh_reminders(db, written, now)
+        db.commit()
+    finally:
+        db.close()
+    bus = get_event_bus()
+    for user_id, item in events:
+        bus.publish(user_id, item)
+    return events
+
+
+def reminders_due(db: Session, start, end: datetime):
+    """(id, due_at) of the pending reminders due in [start, end), in due
+    order; one range scan on ix_reminders_due. A None start reads
+    everything due before `end`, including reminders that fell due while no
+    scheduler was running."""
+    query = select(Reminder.id, Reminder.due_at).where(Reminder.due_at < end)
+    if start is not None:
+        query = query.where(Reminder.due_at >= start)
+    return db.execute(query.order_by(Reminder.due_at)).all()
+
+
+def read_reminders(start, end: datetime):
+    db = SessionLocal()
+    try:
+        return reminders_due(db, start, end)
+    finally:
+        db.close()
+
+
+def list_notifications(db: Session, user_id: int, unread: bool = False, before: int = None, limit: int = 100):
+    """The user's notifications, newest first, from the one before id
+    `before` on; one range scan on (user_id, id)."""
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread:
+        query = query.filter(Notification.read_at.is_(None))
+    if before is not None:
+        query = query.filter(Notification.id < before)
+    return query.order_by(Notification.id.desc()).limit(limit).all()
+
+
+def mark_read(db: Session, user_id: int, notification_id: int = None) -> int:
+    """Marks one notification, or all of them, as read, without committing.
+    Returns the number of notifications that were unread."""
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.read_at.is_(None))
+    if notification_id is not None:
+        statement = statement.where(Notification.id == notification_id)
+    return db.execute(statement.values(read_at=datetime.utcnow()), execution_options={"synchronize_session": False}).rowcount
+
+
+class ReminderScheduler:
+    """
+    The reminders due within the next `window`, in a heap by due time. The
+    window is filled with one range query on the due_at index and read
+    again as it runs down; a commit in this process that writes a reminder
+    due inside the loaded window has that stretch read again at once. Other
+    processes' commits are not seen that way, so every `rescan` the window
+    is read again from the previous rescan on. Nothing polls meetings or
+    tasks: an idle scheduler sleeps until its next reminder is due, its
+    window needs extending or a rescan is due, and holds only the
+    reminders of that window.
+
+    The heap belongs to the event loop running `run`; other threads only go
+    through `reschedule`.
+    """
+
+    def __init__(self, window: timedelta = timedelta(minutes=REMINDER_WINDOW_MINUTES), rescan: timedelta = timedelta(seconds=REMINDER_RESCAN_SECONDS)):
+        self.window = window
+        self.rescan = rescan
+        self.heap = []
+        self.queued = set()
+        # Every pending reminder due before this is in the heap.
+        self.loaded_until = None
+        self.reload_from = None
+        # Reminders committed elsewhere since this are due from it on, since
+        # a reminder is only ever written due in the future.
+        self.rescanned_at = None
+        self.loop = None
+        self.wake = None
+
+    def push(self, reminder_id: int, due_at: datetime):
+        if reminder_id not in self.queued:
+            self.queued.add(reminder_id)
+            heapq.heappush(self.heap, (due_at, reminder_id))
+
+    def pop_due(self, now: datetime):
+        """Ids of the reminders due by `now`, earliest first."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, reminder_id = heapq.heappop(self.heap)
+            self.queued.discard(reminder_id)
+            due.append(reminder_id)
+        return due
+
+    def reschedule(self, due_at: datetime):
+        """Called from any thread once reminders due from `due_at` on were
+        committed."""
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._reschedule, due_at)
+            except RuntimeError:
+                pass
+
+    def _reschedule(self, due_at: datetime):
+        if self.loaded_until is not None and due_at < self.loaded_until:
+            self.reload_from = due_at if self.reload_from is None else min(self.reload_from, due_at)
+            self.wake.set()
+
+    async def tick(self, now: datetime):
+        """Extends the window if it is half spent, rereads what commits
+        changed inside it, and sends what is due."""
+        # The bounds move before the reads, so that a commit landing while a
+        # read runs is read again rather than missed.
+        if self.rescanned_at is None:
+            self.rescanned_at = now
+        elif now - self.rescanned_at >= self.rescan:
+            start, self.rescanned_at = self.rescanned_at, now
+            self.reload_from = start if self.reload_from is None else min(self.reload_from, start)
+        if self.loaded_until is None or self.loaded_until <= now + self.window / 2:
+            start, self.loaded_until = self.loaded_until, now + self.window
+            for reminder_id, due_at in await run_in_threadpool(read_reminders, start, self.loaded_until):
+                self.push(reminder_id, due_at)
+        if self.reload_from is not None:
+            start, self.reload_from = self.reload_from, None
+            for reminder_id, due_at in await run_in_threadpool(read_reminders, start, self.loaded_until):
+                self.push(reminder_id, due_at)
+        due = self.pop_due(now)
+        if due:
+            await run_in_threadpool(deliver_reminders, due, now)
+
+    def seconds_to_sleep(self, now: datetime) -> float:
+        wake_at = min(self.loaded_until - self.window / 2, self.rescanned_at + self.rescan)
+        if self.heap:
+            wake_at = min(wake_at, self.heap[0][0])
+        return max((wake_at - now).total_seconds(), 0)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.wake = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await self.tick(datetime.now())
+                    timeout = self.seconds_to_sleep(datetime.now())
+                except Exception:
+                    logger.exception("Reminder scheduler failed; reloading")
+                    # Reminders taken off the heap but not sent are still in
+                    # the table; reading everything due again finds them.
+                    self.heap, self.queued, self.loaded_until, self.reload_from, self.rescanned_at = [], set(), None, None, None
+                    timeout = RETRY_SECONDS
+                try:
+                    await asyncio.wait_for(self.wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+        finally:
+            self.loop = None
+
+
+reminder_scheduler = ReminderScheduler()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def refresh_reminders_after_flush(session, flush_context):
+    changes = session.info.get("calendar_changes")
+    if changes:
+        refresh_reminders(session, [
+            (TOMBSTONE_KINDS[type(obj)], obj.id, None if op == "deleted" else obj) for obj, op, _ in changes
+        ])
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def reschedule_reminders(session):
+    due_at = session.info.pop("reminders_due", None)
+    if due_at is not None:
+        reminder_scheduler.reschedule(due_at)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_reminders(session):
+    session.info.pop("reminders_due", None)
@@ -0,0 +1,106 @@
+"""
+Auto-scheduler cost as the backlog of pending tasks grows: plan_schedule on
+its own (greedy placement through the gap segment tree, plus the local-search
+pass), and auto_schedule_tasks end to end against SQLite, including loading
+tasks, computing free time and flushing the placements.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_auto_scheduler
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import user, task, meeting, chat_message  # noqa: F401  (register tables)
+from app.models.meeting import Meeting
+from app.models.task import Task, TaskPriority
+from app.models.user import User
+from app.services.auto_scheduler import plan_schedule, auto_schedule_tasks
+
+HORIZON_START = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+DAYS = 90
+
+
+def random_gaps(rng):
+    """Working-day gaps in minutes from the horizon start, split by a few
+    meetings per day."""
+    gaps = []
+    for day in range(DAYS):
+        cursor = day * 1440 + 9 * 60
+        day_end = day * 1440 + 17 * 60
+        for _ in range(4):
+            meeting_start = cursor + rng.randrange(30, 120)
+            if meeting_start >= day_end:
+                break
+            gaps.append((cursor, meeting_start))
+            cursor = meeting_start + rng.choice((30, 60))
+        if cursor < day_end:
+            gaps.append((cursor, day_end))
+    return gaps
+
+
+def random_specs(count, rng):
+    return [
+        (i, rng.choice((1, 2, 3)), rng.choice((15, 20, 30, 45, 60, 90)),
+         rng.randrange(0, DAYS * 1440) if rng.random() < 0.3 else None)
+        for i in range(count)
+    ]
+
+
+def timed(fn, *args, repeat=3, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench_planner():
+    rng = random.Random(1)
+    gaps = random_gaps(rng)
+    print(f"plan_schedule, {len(gaps)} gaps over {DAYS} days")
+    print(f"{'tasks':>8} {'greedy ms':>12} {'+search ms':>12} {'placed':>8}")
+    for count in (100, 1000, 5000, 10000):
+        specs = random_specs(count, rng)
+        greedy_ms, _ = timed(plan_schedule, specs, gaps, improve=False)
+        improved_ms, (placements, _) = timed(plan_schedule, specs, gaps, improve=True)
+        print(f"{count:>8} {greedy_ms:>12.2f} {improved_ms:>12.2f} {len(placements):>8}")
+
+
+def bench_backend():
+    rng = random.Random(2)
+    priorities = list(TaskPriority)
+    print()
+    print(f"auto_schedule_tasks end to end on SQLite, {DAYS}-day horizon")
+    print(f"{'tasks':>8} {'ms':>12}")
+    for count in (100, 1000, 3000):
+        db_engine = create_engine("sqlite://")
+        Base.metadata.create_all(db_engine)
+        db = sessionmaker(bind=db_engine)()
+        db.add(User(id=1, email="u@example.com", full_name="u", hashed_password="x"))
+        for day in range(DAYS):
+            start = HORIZON_START + timedelta(days=day, hours=rng.randrange(9, 16))
+            db.add(Meeting(user_id=1, title="m", start_time=start, end_time=start + timedelta(minutes=60)))
+        db.add_all(
+            Task(user_id=1, title=f"t{i}", priority=rng.choice(priorities),
+                 duration_minutes=rng.choice((15, 30, 60)))
+            for i in range(count)
+        )
+        db.commit()
+        start = time.perf_counter()
+        auto_schedule_tasks(db, 1, HORIZON_START, DAYS)
+        db.commit()
+        print(f"{count:>8} {(time.perf_counter() - start) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    bench_planner()
+    bench_backend()
@@ -0,0 +1,95 @@
+"""
+Ingest throughput of bulk_write against one create and one commit per
+item, as the single-item task endpoints do. Uses a file-backed SQLite
+database so that every commit writes to disk. Covers creating, updating
+and deleting tasks, without the HTTP and auth cost that each single-item
+request also pays.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_bulk
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import user, task, meeting, chat_message, occurrence_exception, calendar_version  # noqa: F401  (register tables)
+from app.models.task import Task, TaskPriority
+from app.models.user import User
+from app.schemas.task import TaskBulkUpdate
+from app.services.bulk import bulk_write
+
+START = datetime(2030, 1, 7, 9)
+
+
+def items(count):
+    return [
+        {"title": f"t{i}", "description": None, "start_time": START + timedelta(hours=i), "end_time": START + timedelta(hours=i, minutes=30)}
+        for i in range(count)
+    ]
+
+
+def fresh_session(path):
+    db_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(db_engine)
+    db = sessionmaker(bind=db_engine)()
+    db.add(User(id=1, email="u@example.com", full_name="u", hashed_password="x"))
+    db.commit()
+    return db
+
+
+def one_by_one(db, rows):
+    ids = []
+    for row in rows:
+        obj = Task(**row, user_id=1)
+        db.add(obj)
+        db.commit()
+        db.refresh(obj)
+        ids.append(obj.id)
+    for obj_id in ids:
+        obj = db.get(Task, obj_id)
+        obj.title = "u"
+        db.commit()
+    for obj_id in ids:
+        db.delete(db.get(Task, obj_id))
+        db.commit()
+
+
+def in_bulk(db, rows):
+    result = bulk_write(db, Task, 1, rows)
+    db.commit()
+    ids = [item["id"] for item in result["created"]]
+    # Partial updates, parsed as POST /tasks/bulk parses them.
+    updates = [TaskBulkUpdate(id=obj_id, title="u").dict(exclude_unset=True) for obj_id in ids]
+    bulk_write(db, Task, 1, update_items=updates)
+    db.commit()
+    updated = db.get(Task, ids[0])
+    assert (updated.title, updated.start_time, updated.priority) == ("u", rows[0]["start_time"], TaskPriority.medium), "partial update overwrote fields"
+    bulk_write(db, Task, 1, delete_ids=ids)
+    db.commit()
+
+
+def main():
+    print("create + update + delete of N tasks, SQLite file")
+    print(f"{'tasks':>8} {'per item ms':>12} {'bulk ms':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (100, 1000):
+            rows = items(count)
+            timings = []
+            for name, fn in (("single", one_by_one), ("bulk", in_bulk)):
+                db = fresh_session(os.path.join(tmp, f"{name}-{count}.db"))
+                start = time.perf_counter()
+                fn(db, rows)
+                timings.append((time.perf_counter() - start) * 1000)
+                db.close()
+            print(f"{count:>8} {timings[0]:>12.1f} {timings[1]:>12.1f} {timings[0] / timings[1]:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-turn date parsing cost, before and after app.services.date_parsing.
+
+A chat turn parses the user message, each of the last 10 history messages
+(infer_context_from_history) and a handful of tool arguments. This replays
+that workload with plain dateparser (all installed languages, no cache, as
+the agent used to) and with parse_datetime, cold and warm.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_date_parsing
+"""
+import time
+from datetime import datetime
+
+import dateparser
+
+from app.services.date_parsing import parse_datetime, parse_cached
+
+MESSAGE = "Can you move my project sync to tomorrow at 3pm?"
+HISTORY = [
+    "What meetings do I have tomorrow?",
+    "You have 2 meeting(s) tomorrow (2026-10-18): Standup, Project sync",
+    "schedule a Design review on friday at 10:00",
+    "The meeting 'Design review' has been scheduled for 2026-10-23T10:00:00 to 2026-10-23T10:20:00!",
+    "am I free monday afternoon",
+    "You have some free time on Monday, 2026-10-19 afternoon: 12:00 - 17:00",
+    "Quelles sont mes tâches demain ?",
+    "Vous avez 1 tâche demain.",
+    "ok",
+    "Done!",
+]
+TOOL_ARGS = ["tomorrow at 3pm", "tomorrow at 4pm", "2026-10-18", "15:00", "16:00"]
+TURNS = 20
+
+
+def turn_texts():
+    return [MESSAGE] + HISTORY + TOOL_ARGS
+
+
+def run_baseline():
+    for text in turn_texts():
+        dateparser.parse(text, settings={"RELATIVE_BASE": datetime.now()})
+
+
+def run_service():
+    for text in turn_texts():
+        parse_datetime(text)
+
+
+def measure(fn, turns):
+    start = time.perf_counter()
+    for _ in range(turns):
+        fn()
+    return (time.perf_counter() - start) / turns * 1000
+
+
+def main():
+    # Warm dateparser's own language data so both sides pay the same import cost.
+    dateparser.parse("tomorrow")
+
+    baseline = measure(run_baseline, TURNS)
+    parse_cached.cache_clear()
+    cold = measure(run_service, 1)
+    warm = measure(run_service, TURNS)
+
+    print(f"parses per turn:             {len(turn_texts())}")
+    print(f"dateparser, all languages:   {baseline:8.2f} ms/turn")
+    print(f"parse_datetime, cold cache:  {cold:8.2f} ms/turn")
+    print(f"parse_datetime, warm cache:  {warm:8.2f} ms/turn")
+    print(f"speedup cold / warm:         {baseline / cold:8.1f}x / {baseline / warm:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
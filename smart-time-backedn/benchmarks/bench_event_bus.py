@@ -0,0 +1,62 @@
+"""
+Cost of idle event streams and of publishing to them: memory per idle
+subscription (the queue plus the coroutine waiting on it, as
+stream_events keeps one per open connection), and the time from
+publish() on a worker thread, as a committing route does, to delivery
+on the event loop, with many idle streams of other users open.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_event_bus
+"""
+import asyncio
+import os
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.events import InProcessEventBus, calendar_event
+
+
+async def idle(subscription, stop):
+    while not stop.is_set():
+        await subscription.next_event(3600)
+
+
+async def bench(idle_count: int, tabs: int = 3, rounds: int = 200):
+    bus = InProcessEventBus()
+    stop = asyncio.Event()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    idlers = [asyncio.create_task(idle(bus.subscribe(user_id), stop)) for user_id in range(1, idle_count + 1)]
+    await asyncio.sleep(0)
+    per_stream = (tracemalloc.get_traced_memory()[0] - before) / max(idle_count, 1)
+    tracemalloc.stop()
+
+    # One user with a few tabs open; publish from another thread.
+    listeners = [bus.subscribe(0) for _ in range(tabs)]
+    latencies = []
+    for i in range(rounds):
+        sent = time.perf_counter()
+        threading.Thread(target=bus.publish, args=(0, calendar_event("task", "updated", i, i))).start()
+        for listener in listeners:
+            await listener.next_event(5)
+        latencies.append(time.perf_counter() - sent)
+    stop.set()
+    for subscription_task in idlers:
+        subscription_task.cancel()
+    await asyncio.gather(*idlers, return_exceptions=True)
+    latencies.sort()
+    return per_stream, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    print(f"{'idle streams':>12} {'KiB/stream':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for idle_count in (0, 1000, 10000, 50000):
+        per_stream, p50, p99 = asyncio.run(bench(idle_count))
+        print(f"{idle_count:>12} {per_stream / 1024:>11.2f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Free-slot search cost as a calendar grows: the old per-candidate scanner
+(any() over every busy slot for each 30-minute candidate) against the
+sort-and-sweep engine in app.services.availability.
+
+Part 1 times the in-memory search over a one-week window while the number of
+busy intervals in that window grows. Part 2 times find_free_slots (what
+get_free_time_backend runs) end to end against SQLite while the user's total
+history grows.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_free_time
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import user, task, meeting, chat_message  # noqa: F401  (register tables)
+from app.models.meeting import Meeting
+from app.services.availability import merge_intervals, free_gaps, slots_in_gaps, find_free_slots, working_window
+
+WINDOW_START = datetime(2026, 3, 2, 9, 0)
+WINDOW_END = WINDOW_START + timedelta(days=7)
+DURATION = timedelta(minutes=30)
+GRANULARITY = timedelta(minutes=5)
+
+
+def random_intervals(count, start, end, rng):
+    span = int((end - start).total_seconds() // 60)
+    intervals = []
+    for _ in range(count):
+        offset = rng.randrange(0, span)
+        s = start + timedelta(minutes=offset)
+        intervals.append((s, s + timedelta(minutes=rng.choice((15, 30, 45, 60)))))
+    return intervals
+
+
+def legacy_slots(busy, window_start, window_end, duration, granularity):
+    slots = []
+    current = window_start
+    while current + duration <= window_end:
+        candidate_end = current + duration
+        if not any(s < candidate_end and e > current for s, e in busy):
+            slots.append((current, candidate_end))
+        current += granularity
+    return slots
+
+
+def engine_slots(busy, window_start, window_end, duration, granularity):
+    gaps = free_gaps(merge_intervals(busy), window_start, window_end)
+    return slots_in_gaps(gaps, window_start, duration, granularity)
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench_in_memory():
+    rng = random.Random(1)
+    print("in-memory, 1-week window, 5-minute grid")
+    print(f"{'busy':>8} {'legacy ms':>12} {'engine ms':>12}")
+    for count in (10, 100, 1000, 5000):
+        busy = random_intervals(count, WINDOW_START, WINDOW_END, rng)
+        legacy_ms, legacy = timed(legacy_slots, busy, WINDOW_START, WINDOW_END, DURATION, GRANULARITY)
+        engine_ms, engine = timed(engine_slots, busy, WINDOW_START, WINDOW_END, DURATION, GRANULARITY)
+        assert legacy == engine
+        print(f"{count:>8} {legacy_ms:>12.2f} {engine_ms:>12.2f}")
+
+
+def bench_backend():
+    rng = random.Random(2)
+    db_engine = create_engine("sqlite://")
+    Base.metadata.create_all(db_engine)
+    db = sessionmaker(bind=db_engine)()
+    history_start = WINDOW_START - timedelta(days=3 * 365)
+    print()
+    print("find_free_slots for one working day, growing history")
+    print(f"{'meetings':>8} {'ms/call':>12}")
+    total = 0
+    for target in (100, 1000, 10000, 50000):
+        rows = [
+            Meeting(user_id=1, title="m", start_time=s, end_time=e)
+            for s, e in random_intervals(target - total, history_start, WINDOW_END, rng)
+        ]
+        db.add_all(rows)
+        db.commit()
+        db.expunge_all()
+        total = target
+        day_start, day_end = working_window(WINDOW_START.date().isoformat())
+        ms, _ = timed(find_free_slots, db, 1, day_start, day_end, 30, repeat=20)
+        print(f"{total:>8} {ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    bench_in_memory()
+    bench_backend()
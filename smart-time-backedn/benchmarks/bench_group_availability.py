@@ -0,0 +1,126 @@
+"""
+Common free time for a group of 100 users over a two-week horizon: a per-user
+Python loop (every candidate slot checked against every user's busy
+intervals) against the NumPy occupancy-bitmap engine in
+app.services.group_availability.
+
+Part 1 times the in-memory search for growing calendars. Part 2 times
+find_common_slots end to end against SQLite, including the range queries.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_group_availability
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import user, task, meeting, chat_message  # noqa: F401  (register tables)
+from app.models.meeting import Meeting
+from app.models.user import User
+from app.services.group_availability import (
+    align_window, occupancy_bitmaps, working_hours_mask, common_free_starts, find_common_slots,
+)
+
+USERS = 100
+HORIZON_START = datetime(2026, 3, 2)
+HORIZON_END = HORIZON_START + timedelta(days=14)
+DURATION_MINUTES = 30
+GRANULARITY_MINUTES = 30
+RESOLUTION_MINUTES = 5
+
+
+def random_rows(per_user, rng):
+    """Random 5-minute-aligned meetings between 08:00 and 18:00, keeping a few
+    half-hour blocks per day clear for everyone so that there are common
+    slots to find."""
+    clear = {(day, rng.randrange(16)) for day in range(14) for _ in range(3)}
+    rows = []
+    for user_id in range(1, USERS + 1):
+        booked = 0
+        while booked < per_user:
+            day = rng.randrange(14)
+            offset = 5 * rng.randrange(12 * 10) - 60  # minutes after 09:00
+            length = rng.choice((15, 30, 45, 60))
+            if any((day, block) in clear and offset < 30 * block + 30 and offset + length > 30 * block
+                   for block in range(16)):
+                continue
+            start = HORIZON_START + timedelta(days=day, hours=9, minutes=offset)
+            rows.append((user_id, start, start + timedelta(minutes=length)))
+            booked += 1
+    return rows
+
+
+def legacy_common_slots(rows, limit):
+    busy = {}
+    for user_id, start, end in rows:
+        busy.setdefault(user_id, []).append((start, end))
+    slots = []
+    day = HORIZON_START
+    while day < HORIZON_END and len(slots) < limit:
+        current = day + timedelta(hours=9)
+        day_end = day + timedelta(hours=17)
+        while current + timedelta(minutes=DURATION_MINUTES) <= day_end and len(slots) < limit:
+            candidate_end = current + timedelta(minutes=DURATION_MINUTES)
+            if all(not any(s < candidate_end and e > current for s, e in busy.get(user_id, ()))
+                   for user_id in range(1, USERS + 1)):
+                slots.append((current, candidate_end))
+            current += timedelta(minutes=GRANULARITY_MINUTES)
+        day += timedelta(days=1)
+    return slots
+
+
+def bitmap_common_slots(rows, limit):
+    start, cells = align_window(HORIZON_START, HORIZON_END, RESOLUTION_MINUTES)
+    busy = occupancy_bitmaps(rows, list(range(1, USERS + 1)), start, cells, RESOLUTION_MINUTES)
+    free = ~busy.any(axis=0) & working_hours_mask(start, cells, RESOLUTION_MINUTES)
+    indices = common_free_starts(free, DURATION_MINUTES // RESOLUTION_MINUTES, GRANULARITY_MINUTES // RESOLUTION_MINUTES)[:limit]
+    resolution = timedelta(minutes=RESOLUTION_MINUTES)
+    return [(start + int(i) * resolution, start + int(i) * resolution + timedelta(minutes=DURATION_MINUTES)) for i in indices]
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench_in_memory():
+    rng = random.Random(1)
+    print(f"in-memory, {USERS} users, 14 days, all common slots")
+    print(f"{'events/user':>12} {'legacy ms':>12} {'bitmap ms':>12} {'slots':>8}")
+    for per_user in (5, 20, 50):
+        rows = random_rows(per_user, rng)
+        legacy_ms, legacy = timed(legacy_common_slots, rows, 10_000, repeat=1)
+        bitmap_ms, bitmap = timed(bitmap_common_slots, rows, 10_000)
+        assert legacy == bitmap
+        print(f"{per_user:>12} {legacy_ms:>12.1f} {bitmap_ms:>12.2f} {len(bitmap):>8}")
+
+
+def bench_backend():
+    rng = random.Random(2)
+    db_engine = create_engine("sqlite://")
+    Base.metadata.create_all(db_engine)
+    db = sessionmaker(bind=db_engine)()
+    db.add_all(User(id=i, email=f"u{i}@example.com", full_name="u", hashed_password="x") for i in range(1, USERS + 1))
+    db.add_all(Meeting(user_id=u, title="m", start_time=s, end_time=e) for u, s, e in random_rows(20, rng))
+    db.commit()
+    ms, slots = timed(find_common_slots, db, list(range(1, USERS + 1)), HORIZON_START, HORIZON_END, DURATION_MINUTES, 10, repeat=10)
+    print()
+    print(f"find_common_slots, {USERS} users x 20 meetings, 14 days: {ms:.2f} ms ({len(slots)} slots)")
+    print(f"numpy {np.__version__}")
+
+
+if __name__ == "__main__":
+    bench_in_memory()
+    bench_backend()
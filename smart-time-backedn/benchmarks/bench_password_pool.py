@@ -0,0 +1,63 @@
+"""
+Login throughput of the password pool against its number of worker
+processes. A burst of concurrent password checks runs with each pool size
+and with the threadpool (workers=0, close to the old synchronous routes).
+The worst event-loop stall seen meanwhile shows how much the burst holds
+up other requests.
+
+Run from smart-time-backedn/ (BCRYPT_ROUNDS sets the cost, 12 by default):
+    python -m benchmarks.bench_password_pool
+"""
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.auth.auth_handler import get_password_hash
+from app.auth.password_pool import PasswordHasher
+from app.config import BCRYPT_ROUNDS
+
+LOGINS = 16
+
+
+async def loop_stall(stop: asyncio.Event) -> float:
+    """Longest gap between 10 ms ticks of the event loop, in ms."""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(0.01)
+        worst = max(worst, (loop.time() - started - 0.01) * 1000)
+    return worst
+
+
+async def burst(hasher: PasswordHasher, hashed: str):
+    await hasher.verify_and_update("pw", hashed)  # pool warm-up
+    stop = asyncio.Event()
+    stall = asyncio.create_task(loop_stall(stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(hasher.verify_and_update("pw", hashed) for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    assert all(verified for verified, _ in results)
+    return LOGINS / elapsed, await stall
+
+
+def main():
+    hashed = get_password_hash("pw")
+    cores = os.cpu_count() or 1
+    print(f"bcrypt cost {BCRYPT_ROUNDS}, {LOGINS} concurrent logins, {cores} core(s)")
+    print(f"{'workers':>10} {'logins/s':>9} {'max loop stall ms':>18}")
+    for workers in sorted({0, 1, 2, cores, cores * 2}):
+        hasher = PasswordHasher(workers=workers, max_pending=LOGINS)
+        try:
+            rate, stall = asyncio.run(burst(hasher, hashed))
+        finally:
+            hasher.shutdown()
+        label = "threadpool" if workers == 0 else str(workers)
+        print(f"{label:>10} {rate:>9.2f} {stall:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+The reminder scheduler against 1M pending reminders spread over the next
+30 days. Compares reading one scheduler window of them through the due_at
+index with the full scan that polling every row each minute costs. Also
+measures the heap's push and pop cost and its memory per reminder, for
+the worst case where all of them fall due within one window.
+
+Run from smart-time-backedn/:
+    python -m benchmarks.bench_reminders
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import user, task, meeting, chat_message, notification, calendar_version, conversation_state, occurrence_exception, tombstone, reminder, calendar_share  # noqa: F401  (register tables)
+from app.models.reminder import Reminder
+from app.services.reminders import ReminderScheduler, reminders_due
+
+PENDING = 1_000_000
+SPREAD = timedelta(days=30)
+WINDOW = timedelta(minutes=10)
+NOW = datetime(2030, 1, 7, 9)
+
+
+def due_times(count, seed=1):
+    rng = random.Random(seed)
+    seconds = int(SPREAD.total_seconds())
+    return [NOW + timedelta(seconds=rng.randrange(seconds)) for _ in range(count)]
+
+
+def fill(db, count, chunk=50_000):
+    due = due_times(count)
+    for offset in range(0, count, chunk):
+        db.connection().execute(insert(Reminder.__table__), [
+            {"user_id": i % 10_000 + 1, "source": "meeting", "item_id": i, "event_at": d + timedelta(minutes=15), "due_at": d}
+            for i, d in enumerate(due[offset:offset + chunk], offset)
+        ])
+    db.commit()
+
+
+def timed(call, rounds):
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_queries(db):
+    rng = random.Random(2)
+    starts = [NOW + timedelta(seconds=rng.randrange(int((SPREAD - WINDOW).total_seconds()))) for _ in range(20)]
+    window_time, rows = timed(lambda: [len(reminders_due(db, start, start + WINDOW)) for start in starts], 3)
+    scan = text("SELECT id, due_at FROM reminders NOT INDEXED WHERE due_at >= :start AND due_at < :end ORDER BY due_at")
+    scan_time, _ = timed(lambda: [db.execute(scan, {"start": start, "end": start + WINDOW}).all() for start in starts[:3]], 1)
+    print(f"{'query':<28} {'ms/window':>10} {'rows':>6}")
+    print(f"{'due_at index (scheduler)':<28} {window_time * 1000 / len(starts):>10.3f} {sum(rows) // len(rows):>6}")
+    print(f"{'full scan (per-minute poll)':<28} {scan_time * 1000 / 3:>10.3f} {sum(rows) // len(rows):>6}")
+
+
+def bench_heap(count):
+    due = due_times(count, seed=3)
+    scheduler = ReminderScheduler(WINDOW)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for reminder_id, due_at in enumerate(due):
+        scheduler.push(reminder_id, due_at)
+    push_time = time.perf_counter() - started
+    per_reminder = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+    started = time.perf_counter()
+    popped = scheduler.pop_due(NOW + SPREAD)
+    pop_time = time.perf_counter() - started
+    assert len(popped) == count
+    print(f"\nheap of {count:,}: push {push_time / count * 1e6:.2f} us, pop {pop_time / count * 1e6:.2f} us, {per_reminder:.0f} B/reminder")
+    print("(the reminders themselves, already built, are not counted; the heap and id set are)")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        db_engine = create_engine(f"sqlite:///{os.path.join(directory, 'reminders.db')}")
+        Base.metadata.create_all(db_engine)
+        db = sessionmaker(bind=db_engine)()
+        started = time.perf_counter()
+        fill(db, PENDING)
+        print(f"{PENDING:,} pending reminders over {SPREAD.days} days, loaded in {time.perf_counter() - started:.1f} s\n")
+        bench_queries(db)
+        db.close()
+        db_engine.dispose()
+    bench_heap(PENDING)
+
+
+if __name__ == "__main__":
+    main()
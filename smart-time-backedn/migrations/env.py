@@ -0,0 +1,54 @@
+# migrations/env.py
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import Base, engine
+from app.models import user, task, meeting, chat_message, notification, calendar_version, conversation_state, occurrence_exception, tombstone, reminder, calendar_share  # noqa: F401  (register tables)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emits the migration SQL instead of running it (alembic upgrade --sql)."""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # app.database.upgrade_database passes its own connection in; the
+    # alembic command line connects with the application's engine.
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        configure_and_run(connection)
+        return
+    with engine.connect() as connection:
+        configure_and_run(connection)
+        connection.commit()
+
+
+def configure_and_run(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most constraints in place
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,30 @@
+# migrations/helpers.py
+"""
+Schema probes for the revisions written after the baseline. Databases created
+by the old Base.metadata.create_all() call may already have some of the
+tables and indexes those revisions add, depending on the version that
+created them, so the revisions only add what is missing. When generating
+SQL offline (alembic upgrade --sql) there is nothing to probe and the whole
+revision is emitted.
+"""
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def inspector():
+    return None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+
+def has_table(table: str) -> bool:
+    schema = inspector()
+    return schema is not None and schema.has_table(table)
+
+
+def has_column(table: str, column: str) -> bool:
+    schema = inspector()
+    return schema is not None and any(c["name"] == column for c in schema.get_columns(table))
+
+
+def has_index(table: str, index: str) -> bool:
+    schema = inspector()
+    return schema is not None and any(i["name"] == index for i in schema.get_indexes(table))
@@ -0,0 +1,45 @@
+"""conversation states
+
+The agent's working memory between turns, one row per user.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not has_table("conversation_states"):
+        op.create_table(
+            "conversation_states",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("context_meeting_title", sa.String(length=255), nullable=True),
+            sa.Column("context_meeting_date", sa.Date(), nullable=True),
+            sa.Column("context_task_title", sa.String(length=255), nullable=True),
+            sa.Column("context_task_date", sa.Date(), nullable=True),
+            sa.Column("pending_meeting", sa.JSON(), nullable=True),
+            sa.Column("pending_task", sa.JSON(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("conversation_states")
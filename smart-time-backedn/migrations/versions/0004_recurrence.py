@@ -0,0 +1,69 @@
+"""recurrence
+
+Recurring meetings and tasks stored as one series row, plus per-occurrence
+exceptions.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table, has_column, has_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("meetings", "tasks"):
+        if not has_column(table, "recurrence_rule"):
+            op.add_column(table, sa.Column("recurrence_rule", sa.String(length=255), nullable=True))
+            op.add_column(table, sa.Column("recurrence_until", sa.DateTime(), nullable=True))
+        if not has_index(table, f"ix_{table}_user_recurrence"):
+            op.create_index(f"ix_{table}_user_recurrence", table, ["user_id", "recurrence_rule"])
+
+    if not has_table("occurrence_exceptions"):
+        op.create_table(
+            "occurrence_exceptions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("meeting_id", sa.Integer(), nullable=True),
+            sa.Column("task_id", sa.Integer(), nullable=True),
+            sa.Column("original_start", sa.DateTime(), nullable=False),
+            sa.Column("is_cancelled", sa.Boolean(), nullable=False),
+            sa.Column("title", sa.String(length=255), nullable=True),
+            sa.Column("start_time", sa.DateTime(), nullable=True),
+            sa.Column("end_time", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["meeting_id"], ["meetings.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("meeting_id", "original_start"),
+            sa.UniqueConstraint("task_id", "original_start"),
+        )
+        op.create_index("ix_occurrence_exceptions_id", "occurrence_exceptions", ["id"])
+        op.create_index("ix_occurrence_exceptions_meeting_id", "occurrence_exceptions", ["meeting_id"])
+        op.create_index("ix_occurrence_exceptions_task_id", "occurrence_exceptions", ["task_id"])
+        op.create_index("ix_occurrence_exceptions_user_start", "occurrence_exceptions", ["user_id", "start_time"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("occurrence_exceptions")
+    for table in ("meetings", "tasks"):
+        op.drop_index(f"ix_{table}_user_recurrence", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("recurrence_until")
+            batch.drop_column("recurrence_rule")
@@ -0,0 +1,36 @@
+"""task scheduling fields
+
+Deadline and expected duration of a task, read by the auto-scheduler.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not has_column("tasks", "deadline"):
+        op.add_column("tasks", sa.Column("deadline", sa.DateTime(), nullable=True))
+        op.add_column("tasks", sa.Column("duration_minutes", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("tasks") as batch:
+        batch.drop_column("duration_minutes")
+        batch.drop_column("deadline")
@@ -0,0 +1,39 @@
+"""user/time indexes
+
+Composite indexes for the queries every endpoint and agent tool runs:
+overlap queries on (user_id, end_time), list pages on
+(user_id, start_time, id), and the agent's context lookups on chat_messages
+(user_id, role, id).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("meetings", "tasks"):
+        op.create_index(f"ix_{table}_user_end", table, ["user_id", "end_time"])
+        op.create_index(f"ix_{table}_user_start", table, ["user_id", "start_time", "id"])
+    op.create_index("ix_chat_messages_user_role_id", "chat_messages", ["user_id", "role", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_chat_messages_user_role_id", table_name="chat_messages")
+    for table in ("meetings", "tasks"):
+        op.drop_index(f"ix_{table}_user_start", table_name=table)
+        op.drop_index(f"ix_{table}_user_end", table_name=table)
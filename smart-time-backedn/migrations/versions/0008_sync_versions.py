@@ -0,0 +1,53 @@
+"""sync versions and tombstones
+
+Stamps meetings and tasks with the calendar version of their last write and
+records deletions, for the change feed (GET /sync/). Existing rows get
+version 0, so the first sync of a client returns them.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("meetings", "tasks"):
+        op.add_column(table, sa.Column("sync_version", sa.Integer(), nullable=False, server_default="0"))
+        op.create_index(f"ix_{table}_user_sync", table, ["user_id", "sync_version", "id"])
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("sync_version", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_tombstones_id"), "tombstones", ["id"], unique=False)
+    op.create_index("ix_tombstones_user_sync", "tombstones", ["user_id", "sync_version", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tombstones_user_sync", table_name="tombstones")
+    op.drop_index(op.f("ix_tombstones_id"), table_name="tombstones")
+    op.drop_table("tombstones")
+    for table in ("meetings", "tasks"):
+        op.drop_index(f"ix_{table}_user_sync", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("sync_version")
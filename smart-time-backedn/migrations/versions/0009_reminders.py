@@ -0,0 +1,67 @@
+"""reminders and notifications
+
+Adds the pending reminders read by the reminder scheduler and the inbox of
+sent ones. Existing meetings and tasks get a reminder on their next write;
+scripts/backfill_reminders.py schedules them all at once.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "reminders",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(length=16), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("event_at", sa.DateTime(), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_reminders_id"), "reminders", ["id"], unique=False)
+    op.create_index("ix_reminders_due", "reminders", ["due_at"])
+    op.create_index("ix_reminders_item", "reminders", ["source", "item_id"])
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(length=16), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("message", sa.String(length=512), nullable=False),
+        sa.Column("event_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("read_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_notifications_id"), "notifications", ["id"], unique=False)
+    op.create_index("ix_notifications_user_id", "notifications", ["user_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notifications_user_id", table_name="notifications")
+    op.drop_index(op.f("ix_notifications_id"), table_name="notifications")
+    op.drop_table("notifications")
+    op.drop_index("ix_reminders_item", table_name="reminders")
+    op.drop_index("ix_reminders_due", table_name="reminders")
+    op.drop_index(op.f("ix_reminders_id"), table_name="reminders")
+    op.drop_table("reminders")
@@ -0,0 +1,46 @@
+"""calendar shares
+
+Adds the addresses each user shares their free/busy times with. Group
+availability searches only include participants who shared with the
+requester.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "calendar_shares",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("viewer_email", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_calendar_shares_id"), "calendar_shares", ["id"], unique=False)
+    op.create_index("ix_calendar_shares_viewer", "calendar_shares", ["viewer_email", "owner_id"], unique=True)
+    op.create_index("ix_calendar_shares_owner", "calendar_shares", ["owner_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_calendar_shares_owner", table_name="calendar_shares")
+    op.drop_index("ix_calendar_shares_viewer", table_name="calendar_shares")
+    op.drop_index(op.f("ix_calendar_shares_id"), table_name="calendar_shares")
+    op.drop_table("calendar_shares")
@@ -0,0 +1,51 @@
+"""
+Schedules reminders for the meetings and tasks written before reminders
+existed (migration 0009); writes keep them current from then on. Safe to
+run again, since each item's pending reminder is replaced.
+
+Run from smart-time-backedn/ with the app's DATABASE_URL:
+    python -m scripts.backfill_reminders
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from app.database import SessionLocal
+from app.models import user, task, meeting, chat_message, notification, calendar_version, conversation_state, occurrence_exception, tombstone, reminder, calendar_share  # noqa: F401  (register tables)
+from app.models.meeting import Meeting
+from app.models.task import Task, TaskStatus
+from app.services.reminders import SOURCE_MODELS, refresh_reminders
+
+BATCH_SIZE = 500
+
+
+def upcoming(model, now: datetime):
+    """Rows that may still have a reminder to send."""
+    if model is Meeting:
+        return or_(
+            Meeting.start_time > now,
+            and_(Meeting.recurrence_rule.isnot(None), or_(Meeting.recurrence_until.is_(None), Meeting.recurrence_until > now)),
+        )
+    return and_(Task.deadline > now, or_(Task.status.is_(None), Task.status != TaskStatus.completed))
+
+
+def main():
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        for source, model in SOURCE_MODELS.items():
+            last_id, count = 0, 0
+            while True:
+                rows = db.query(model).filter(upcoming(model, now), model.id > last_id).order_by(model.id).limit(BATCH_SIZE).all()
+                if not rows:
+                    break
+                refresh_reminders(db, [(source, row.id, row) for row in rows], now)
+                last_id, count = rows[-1].id, count + len(rows)
+                db.commit()
+            print(f"{source}s: {count} checked")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
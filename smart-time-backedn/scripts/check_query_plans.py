@@ -0,0 +1,190 @@
+"""
+EXPLAIN check for the per-user hot queries. Builds the schema through the
+migrations, runs the code paths behind the list endpoints, free-time and
+group-availability searches, the agent's on-date tools and its context
+lookup, the change feed and the reminder scheduler, captures every SELECT
+they issue, and fails (exit status 1) if one of them reads a table with a
+full scan, or if the models and the migrations have drifted apart. A few
+of the paths' results are checked too, for rows the overlap queries have
+missed before.
+
+On SQLite, whose plans do not depend on table statistics, each path must
+also use the index it was designed around. On PostgreSQL the check runs with
+enable_seqscan off, so that a sequential scan in the plan means no index
+could serve the query at all.
+
+Run from smart-time-backedn/ (scratch in-memory SQLite by default; a real
+DATABASE_URL is migrated to head first):
+    python -m scripts.check_query_plans
+"""
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPENAI_API_KEY", "unused")  # app.routes.agent builds its client on import
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import event, text
+
+from app.database import Base, SessionLocal, engine, upgrade_database
+from app.models import user, task, meeting, chat_message, notification, calendar_version, conversation_state, occurrence_exception, tombstone, reminder, calendar_share  # noqa: F401  (register tables)
+from app.models.chat_message import ChatMessage
+from app.models.meeting import Meeting
+from app.models.task import Task
+from app.models.user import User
+from app.routes.agent import get_meetings_on_date_backend, get_tasks_on_date_backend, get_free_time_backend, get_recent_chat_history, is_time_slot_available
+from app.services import recurrence  # noqa: F401  (registers mapper hooks)
+from app.services.auto_scheduler import auto_schedule_tasks
+from app.services.group_availability import find_common_slots
+from app.services.pagination import paginate
+from app.services.reminders import list_notifications, reminders_due
+from app.services.sync import changes_since
+
+DAY = datetime(2026, 3, 2)
+
+# (name, call, indexes the SQLite plans must use)
+HOT_PATHS = [
+    ("meetings on a date", lambda db, u: get_meetings_on_date_backend(u, DAY.date().isoformat(), db),
+     ["ix_meetings_user_end"]),
+    ("tasks on a date", lambda db, u: get_tasks_on_date_backend(u, DAY.date().isoformat(), db),
+     ["ix_tasks_user_end"]),
+    ("free time", lambda db, u: get_free_time_backend(u, DAY.date().isoformat(), 30, db),
+     ["ix_meetings_user_end"]),
+    ("slot availability", lambda db, u: is_time_slot_available(u, db, DAY + timedelta(hours=9), DAY + timedelta(hours=10)),
+     ["ix_meetings_user_end"]),
+    ("group availability", lambda db, u: find_common_slots(db, [u, u + 1], DAY, DAY + timedelta(days=7), 30),
+     ["ix_meetings_user_end", "ix_tasks_user_end"]),
+    ("meeting list page", lambda db, u: paginate(db, Meeting, db.query(Meeting).filter(Meeting.user_id == u), u, limit=5),
+     ["ix_meetings_user_start"]),
+    ("task list page", lambda db, u: paginate(db, Task, db.query(Task).filter(Task.user_id == u), u, limit=50),
+     ["ix_tasks_user_start"]),
+    ("meeting list window", lambda db, u: paginate(db, Meeting, db.query(Meeting).filter(Meeting.user_id == u), u, limit=5,
+                                                   window=(DAY, DAY + timedelta(days=7))),
+     ["ix_meetings_user_end"]),
+    ("task list window", lambda db, u: paginate(db, Task, db.query(Task).filter(Task.user_id == u), u, limit=50,
+                                                window=(DAY, DAY + timedelta(days=7))),
+     ["ix_tasks_user_end"]),
+    ("auto-schedule", lambda db, u: auto_schedule_tasks(db, u, DAY, 7, dry_run=True),
+     ["ix_meetings_user_end"]),
+    ("chat context", lambda db, u: get_recent_chat_history(u, db),
+     ["ix_chat_messages_user_role_id"]),
+    ("change feed", lambda db, u: changes_since(db, u, limit=50),
+     ["ix_meetings_user_sync", "ix_tasks_user_sync", "ix_tombstones_user_sync"]),
+    ("reminder window", lambda db, u: reminders_due(db, DAY, DAY + timedelta(minutes=10)),
+     ["ix_reminders_due"]),
+    ("notification inbox", lambda db, u: list_notifications(db, u, unread=True, before=1000, limit=20),
+     ["ix_notifications_user_id"]),
+]
+
+# (name, call returning True when the result is right)
+RESULT_CHECKS = [
+    # A task with a start and no end is a point at its start.
+    ("open-ended task on its date", lambda db, u: "open-ended" in [t["title"] for t in get_tasks_on_date_backend(u, DAY.date().isoformat(), db)]),
+    ("open-ended task in a list window", lambda db, u: "open-ended" in [
+        t.title for t in paginate(db, Task, db.query(Task).filter(Task.user_id == u), u, limit=100, window=(DAY, DAY + timedelta(days=1)))[0]]),
+    ("open-ended task outside its date", lambda db, u: "open-ended" not in [
+        t["title"] for t in get_tasks_on_date_backend(u, (DAY - timedelta(days=1)).date().isoformat(), db)]),
+]
+
+EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN "}
+
+
+def seed(db):
+    """Two users with enough of everything that each path issues all of
+    its queries: one-off and recurring meetings, scheduled and unscheduled
+    tasks, and chat history."""
+    users = [User(email=f"plans-{os.getpid()}-{i}@example.com", full_name="plans", hashed_password="x") for i in range(2)]
+    db.add_all(users)
+    db.flush()
+    for u in users:
+        for day in range(-30, 30):
+            start = DAY + timedelta(days=day, hours=10)
+            db.add(Meeting(user_id=u.id, title="m", start_time=start, end_time=start + timedelta(hours=1)))
+            db.add(Task(user_id=u.id, title="t", start_time=start + timedelta(hours=3), end_time=start + timedelta(hours=4)))
+        db.add(Meeting(user_id=u.id, title="weekly", start_time=DAY - timedelta(days=7, hours=-14),
+                       end_time=DAY - timedelta(days=7, hours=-15), recurrence_rule="FREQ=WEEKLY"))
+        db.add_all(Task(user_id=u.id, title="todo", duration_minutes=30) for _ in range(5))
+        db.add(Task(user_id=u.id, title="open-ended", start_time=DAY + timedelta(hours=11)))
+        db.add_all(ChatMessage(user_id=u.id, role=("user", "assistant")[i % 2], content="hi") for i in range(20))
+    db.flush()
+    return users[0].id
+
+
+def capture_selects(db, call):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def full_scans(dialect: str, plan) -> list:
+    if dialect == "sqlite":
+        return [row[-1] for row in plan if re.match(r"SCAN \w+", row[-1]) and not row[-1].startswith("SCAN CONSTANT")]
+    if dialect == "postgresql":
+        return [row[0].strip() for row in plan if "Seq Scan" in row[0]]
+    if dialect == "mysql":
+        return [f"full scan of {row['table']}" for row in plan if row["type"] == "ALL"]
+    raise SystemExit(f"No plan check for the {dialect} dialect")
+
+
+def explain(connection, dialect: str, statement: str, parameters):
+    result = connection.exec_driver_sql(EXPLAIN_PREFIX[dialect] + statement, parameters)
+    return [dict(row._mapping) for row in result] if dialect == "mysql" else [tuple(row) for row in result]
+
+
+def main() -> int:
+    upgrade_database()
+    dialect = engine.dialect.name
+    failures = []
+    with engine.connect() as connection:
+        drift = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    for diff in drift:
+        failures.append(f"models and migrations differ: {diff}")
+
+    db = SessionLocal()
+    try:
+        user_id = seed(db)
+        connection = db.connection()
+        if dialect == "postgresql":
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, call, expected in HOT_PATHS:
+            statements = capture_selects(db, lambda: call(db, user_id))
+            used, scans = set(), []
+            for statement, parameters in statements:
+                plan = explain(connection, dialect, statement, parameters)
+                used.update(re.findall(r"INDEX (\w+)", " ".join(str(row[-1]) for row in plan)) if dialect == "sqlite" else [])
+                scans.extend(full_scans(dialect, plan))
+            missing = [index for index in expected if index not in used] if dialect == "sqlite" else []
+            ok = not scans and not missing
+            print(f"{'ok' if ok else 'FAIL':>4}  {name} ({len(statements)} queries)")
+            for scan in scans:
+                failures.append(f"{name}: {scan}")
+            for index in missing:
+                failures.append(f"{name}: does not use {index} (used: {', '.join(sorted(used)) or 'none'})")
+        for name, check in RESULT_CHECKS:
+            ok = check(db, user_id)
+            print(f"{'ok' if ok else 'FAIL':>4}  {name}")
+            if not ok:
+                failures.append(f"{name}: wrong result")
+    finally:
+        db.rollback()
+        db.close()
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
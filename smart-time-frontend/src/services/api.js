@@ -36,15 +36,41 @@ export const authService = {
     getProfile: () => apiClient.get('/users/me')
 }
 
+// List endpoints return one page at a time, newest first, with the next
+// page's cursor in the X-Next-Cursor header (absent on the last page).
+// Lists load further pages on demand by passing that cursor back.
+const getPage = async (url, params = {}) => {
+    const response = await apiClient.get(url, { params })
+    return { data: response.data, nextCursor: response.headers['x-next-cursor'] || null }
+}
+
+// Everything overlapping [from, to), recurring items expanded. Views ask for
+// the range they show, which normally fits in one page of RANGE_PAGE_SIZE.
+const RANGE_PAGE_SIZE = 500
+
+const getRange = async (url, from, to) => {
+    const params = { from, to, limit: RANGE_PAGE_SIZE }
+    const items = []
+    let cursor = null
+    do {
+        const page = await getPage(url, cursor ? { ...params, cursor } : params)
+        items.push(...page.data)
+        cursor = page.nextCursor
+    } while (cursor)
+    return { data: items }
+}
+
 export const taskService = {
-    getTasks: () => apiClient.get('/tasks'),
+    getTasks: (params = {}) => getPage('/tasks', params),
+    getTasksInRange: (from, to) => getRange('/tasks', from, to),
     createTask: (task) => apiClient.post('/tasks', task),
     updateTask: (id, task) => apiClient.put(`/tasks/${id}`, task),
     deleteTask: (id) => apiClient.delete(`/tasks/${id}`)
 }
 
 export const meetingService = {
-    getMeetings: () => apiClient.get('/meetings'),
+    getMeetings: (params = {}) => getPage('/meetings', params),
+    getMeetingsInRange: (from, to) => getRange('/meetings', from, to),
     createMeeting: (meeting) => apiClient.post('/meetings', meeting),
     updateMeeting: (id, meeting) => apiClient.put(`/meetings/${id}`, meeting),
     deleteMeeting: (id) => apiClient.delete(`/meetings/${id}`)